@@ -3,8 +3,9 @@ import traceback
 from core.login import login_menu
 from core.init import initialize
 from bbsio.rawio import (
-    set_encoding, set_channel, rawprint, rawinput, SessionIdleTimeout, ConnectionClosed,
+    set_encoding, set_channel, rawprint, rawinput, flush_output, SessionIdleTimeout, ConnectionClosed,
 )
+from bbsio.session import current as current_session
 
 def parse_channel():
     """dialup.py/telnet.py가 --channel=modem 또는 --channel=telnet 인자로
@@ -15,6 +16,17 @@ def parse_channel():
             return arg.split('=', 1)[1]
     return 'unknown'
 
+def parse_line_bps():
+    """dialup.py가 모뎀의 CONNECT 속도를 --line-bps=14400처럼 넘겨준다 -
+    모뎀 출력 속도 조절(bbsio.pacing)에 쓴다. 없으면 None(기본값 사용)."""
+    for arg in sys.argv[1:]:
+        if arg.startswith('--line-bps='):
+            try:
+                return int(arg.split('=', 1)[1])
+            except ValueError:
+                return None
+    return None
+
 def select_locale():
     rawprint("사용할 문자 인코딩을 선택하세요:\n", 'euc-kr')
     rawprint("1. 이 글자가 보이면 완성형 입니다.\n", 'euc-kr')
@@ -29,28 +41,49 @@ def select_locale():
     else:
         return 'euc-kr'
 
-def main():
+def main(channel=None):
     initialize()
-    set_channel(parse_channel())
+    set_channel(channel or parse_channel(), parse_line_bps())
     encoding = select_locale()
     set_encoding(encoding)
     login_menu()
 
-
-if __name__ == "__main__":
+def run(channel=None):
+    """세션 하나를 끝까지 돌리고 종료 코드를 반환한다. 접속마다 새로 뜬
+    bbs.py 프로세스뿐 아니라 server/sessionpool.py의 워커도 이 함수를 불러서
+    세션을 돌리므로, 세션 종료를 프로세스 종료(sys.exit)에 기대지 않는다."""
     # 예전엔 여기서 예외가 나면 stderr가 모뎀 PTY로 바로 나가서(도커 로그엔
     # 아무것도 안 남고) 세션이 그냥 조용히 죽었음 - "이유 없는 프리징"처럼
     # 보인 원인 중 하나였음. stderr를 이제 dialup.py가 별도로 캡처하니
     # 여기서 잡아서 제대로 로그를 남기고 정상 종료한다.
     try:
-        main()
+        try:
+            main(channel)
+        finally:
+            _finish_output()
     except ConnectionClosed:
         print('[세션 종료] 연결 정상 종료', file=sys.stderr)
-        sys.exit(0)
     except SessionIdleTimeout as e:
         print(f'[세션 종료] 입력 유휴 타임아웃: {e}', file=sys.stderr)
-        sys.exit(0)
+    except SystemExit as e:
+        # 종료 메뉴/로그인 실패 등에서 부르는 sys.exit()
+        return e.code if isinstance(e.code, int) else 0
     except Exception:
         print('[세션 종료] 처리되지 않은 예외:', file=sys.stderr)
         traceback.print_exc(file=sys.stderr)
-        sys.exit(1)
+        return 1
+    return 0
+
+
+def _finish_output():
+    # 종료 인사처럼 마지막 입력 대기 뒤에 찍은 출력은 화면 버퍼에 남아 있으므로
+    # 세션을 끝내기 전에 내보낸다. 회선이 이미 끊겼으면 내보낼 곳이 없다.
+    try:
+        flush_output()
+    except (ConnectionClosed, OSError):
+        pass
+    print(f'[세션 출력] {current_session().output_stats()}', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,185 @@
+"""한 줄/여러 줄 입력 편집기.
+
+예전엔 rawio의 rawinput/hidden_input/command_input/multiline_input 네 함수가
+각자 같은 루프(프롬프트 전 대기, 입력 버리기, 한 글자씩 읽기, 백스페이스
+디바운스, ESC 시퀀스 건너뛰기, 에코)를 복사해서 들고 있었다. 그래서 한쪽에서
+고친 것이 다른 쪽에 안 들어갔다 - 붙여 넣기 에코 모으기는 multiline_input에만
+있었고, hidden_input은 한글 비밀번호를 지울 때 '*' 한 칸 대신 글자 폭(2칸)만큼
+커서를 되돌렸다.
+
+LineEditor는 그 공통 부분을 입출력 없이 떼어 낸 것이다. 키(문자)를 넣으면
+편집 중인 줄(lines)을 바꾸고 화면에 내보낼 문자열을 모아 둔다. 실제로
+읽고 쓰는 건 rawio가 한다(rawio._edit) - 수신 캐시에 남은 입력이 있는 동안은
+키를 계속 넣기만 하고, 다 처리했을 때 모인 출력을 한 번에 쓴다. 입출력이
+없으므로 터미널 없이 키 입력 스크립트를 그대로 재생해 볼 수 있다
+(tools/replay_keys.py).
+
+동작 차이는 두 표로 정한다.
+  MODES  - 입력 방식별 설정(에코 대신 보여줄 글자, 여러 줄 여부, 돌려줄 때
+           앞뒤 공백 제거 여부). command 모드의 글로벌 명령어 처리는
+           rawio.command_input이 accept 훅으로 건다.
+  KEYMAP - 제어 문자별 처리(Enter, 백스페이스, ESC, Tab). 표에 없는 문자는
+           글자로 넣는다.
+"""
+import time
+from collections import namedtuple
+
+from bbsio.width import char_width, str_width
+
+# 일부 클라이언트(이야기 등)가 ESC[0m(RESET)을 완전히 처리하지 못해서,
+# 굵게/색 있는 프롬프트 문구 뒤에 사용자가 타이핑한 글자가 그 스타일을
+# 그대로 물려받아 보이는 현상이 있었다 (예: 노란 프롬프트 뒤에 입력한
+# 글자도 노랗게/흐릿하게 보임). RESET만으로는 부족해서, 에코하기 직전에
+# RESET에 더해 흰색·보통굵기를 명시적으로 지정한다 - "기본값으로 되돌리기"에
+# 기대지 않고 원하는 스타일을 못박아 버린다. 예전엔 글자마다 붙였는데, 이어서
+# 나가는 에코 글자 사이에는 스타일을 바꾸는 출력이 없으므로 에코가 시작될
+# 때 한 번만 붙인다.
+PLAIN = '\x1b[0m\x1b[1m\x1b[37m'  # RESET 후 볼드+흰색 - 볼드 없는 흰색(37)은 어두운 회색조로 보임
+
+# 일부 클라이언트(예: Win98 VM + 이야기 조합)에서 백스페이스 키 하나를
+# 눌러도 0x08 바이트가 짧은 간격(수~수십ms)으로 두 번 들어오는 현상이
+# 실사용에서 확인됨 - 그 결과 한 번 눌렀는데 두 글자가 지워짐. 원인은
+# 클라이언트/가상머신 키보드 쪽으로 보이나 서버에서 방어적으로 짧은
+# 시간 안의 중복 백스페이스는 한 번으로 처리(디바운스)한다.
+BACKSPACE_DEBOUNCE_SECONDS = 0.08
+
+Mode = namedtuple('Mode', 'mask multiline strip')
+
+MODES = {
+    'plain': Mode(mask=None, multiline=False, strip=False),       # rawinput
+    'masked': Mode(mask='*', multiline=False, strip=False),       # hidden_input
+    'command': Mode(mask=None, multiline=False, strip=True),      # command_input
+    'multiline': Mode(mask=None, multiline=True, strip=False),    # multiline_input
+}
+
+KEYMAP = {
+    '\r': 'enter',
+    '\n': 'enter',
+    '\x08': 'backspace',  # ^H
+    '\x7f': 'backspace',  # DEL
+    '\x1b': 'escape',
+    '\t': 'ignore',
+}
+
+# ESC 시퀀스 건너뛰기 상태. 예전엔 ESC 다음 한 글자만 보고 '['면 알파벳이
+# 나올 때까지 먹었는데, ESC O P(F1) 같은 SS3 시퀀스는 세 번째 글자('P')가
+# 그대로 입력으로 들어갔고, ESC [ 3 ~(Delete)처럼 '~'로 끝나는 CSI는 끝을
+# 못 알아봐서 그 뒤에 친 글자(알파벳이 나올 때까지)를 같이 삼켰다.
+_TEXT, _ESC, _CSI, _SS3 = range(4)
+
+
+class LineEditor:
+    def __init__(self, mode='plain', accept=None):
+        self.mode = MODES[mode]
+        # command 모드의 글로벌 명령어 훅 - Enter로 받은 줄을 넘겨서 False를
+        # 돌려주면(이미 처리함) 줄을 버리고 다시 입력받는다. 훅은 화면을 그리고
+        # 입력을 받기도 하므로 부르는 건 rawio가 한다(출력을 먼저 내보낸 뒤).
+        self.accept = accept
+        self.output = []
+        self.done = False
+        self.result = None
+        self._esc_state = _TEXT
+        self._echoing = False
+        self.restart()
+
+    def restart(self):
+        """편집 중인 내용을 비우고 처음부터 다시 받는다."""
+        self.lines = ['']
+        self.last_backspace_time = 0.0
+        self.done = False
+        self.result = None
+
+    def feed(self, keys, now=None):
+        """키(문자열)를 차례로 처리한다. 입력이 끝나면(done) 거기서 멈추고
+        처리하지 않은 나머지를 돌려준다."""
+        if now is None:
+            now = time.time()
+        for i, ch in enumerate(keys):
+            self._key(ch, now)
+            if self.done:
+                return keys[i + 1:]
+        return ''
+
+    def take_output(self):
+        """모아 둔 화면 출력을 꺼낸다(다음 출력의 에코는 스타일 지정부터 새로)."""
+        out = ''.join(self.output)
+        self.output.clear()
+        self._echoing = False
+        return out
+
+    def _key(self, ch, now):
+        if self._esc_state != _TEXT:
+            self._skip_escape(ch)
+            return
+        action = KEYMAP.get(ch)
+        if action is None:
+            self._insert(ch)
+        else:
+            getattr(self, '_' + action)(now)
+
+    def _emit(self, text):
+        self.output.append(text)
+        self._echoing = False
+
+    def _echo(self, text):
+        if not self._echoing:
+            self.output.append(PLAIN)
+            self._echoing = True
+        self.output.append(text)
+
+    def _insert(self, ch):
+        if char_width(ch) <= 0:
+            return  # 폭 없는 글자/제어 문자는 무시
+        self.lines[-1] += ch
+        self._echo(self.mode.mask or ch)
+
+    def _enter(self, now):
+        line = self.lines[-1]
+        if self.mode.multiline:
+            if line.strip() == '.':
+                self._finish('\n'.join(self.lines[:-1]))
+                return
+            self.lines.append('')
+            self._emit('\n')
+            return
+        self._emit('\n')
+        self._finish(line.strip() if self.mode.strip else line)
+
+    def _finish(self, result):
+        self.done = True
+        self.result = result
+
+    def _backspace(self, now):
+        if now - self.last_backspace_time < BACKSPACE_DEBOUNCE_SECONDS:
+            self.last_backspace_time = now
+            return
+        self.last_backspace_time = now
+        line = self.lines[-1]
+        if line:
+            self.lines[-1] = line[:-1]
+            width = char_width(self.mode.mask or line[-1])
+            if width > 0:
+                self._emit('\b' * width + ' ' * width + '\b' * width)
+        elif len(self.lines) > 1:
+            # 빈 줄에서 지우면 윗줄 끝으로 돌아간다
+            self.lines.pop()
+            prev = self.lines[-1]
+            self._emit('\x1b[F'  # Move cursor up one line
+                       + '\r' + ' ' * str_width(prev) + '\r'  # Clear line
+                       + prev)
+
+    def _escape(self, now):
+        self._esc_state = _ESC
+
+    def _ignore(self, now):
+        pass
+
+    def _skip_escape(self, ch):
+        if self._esc_state == _ESC:
+            self._esc_state = {'[': _CSI, 'O': _SS3}.get(ch, _TEXT)
+        elif self._esc_state == _CSI:
+            # 매개변수/중간 바이트(0x20-0x3F)가 이어지다 0x40-0x7E로 끝난다
+            if '\x40' <= ch <= '\x7e':
+                self._esc_state = _TEXT
+        else:
+            self._esc_state = _TEXT
@@ -0,0 +1,64 @@
+"""모뎀 회선 출력 속도 조절(pacing).
+
+예전엔 rawinput() 등 프롬프트 함수가 채널과 상관없이 프롬프트마다
+SCREEN_SETTLE_DELAY(0.3초), 에코 한 글자마다 ECHO_PACING_DELAY(0.02초)를
+고정으로 쉬었다. 둘 다 느린 모뎀 회선 때문에 생긴 것이다 - 서버는 화면을
+순식간에 PTY에 써 넣지만 실제로는 14400bps(초당 약 1800바이트) 회선으로
+천천히 흘러가므로, 화면이 다 도착하기 전에 입력을 받기 시작하거나 에코를
+몰아서 보내면 느린 터미널이 글자를 놓쳤다. 텔넷에서는 이 대기가 화면 전환마다
+0.3초, 타이핑 에코가 초당 50자로 묶이는 순수한 손해였다.
+
+Pacer는 고정 시간 대신 "지금까지 쓴 바이트가 회선으로 다 나가려면 얼마나
+남았나"를 계산한다. 쓸 때마다 바이트 수 / 회선 속도만큼 회선이 바쁜 시각
+(busy_until)을 뒤로 미루고, PTY에 아직 중계되지 않고 남은 바이트(TIOCOUTQ)도
+같이 본다. 세션은 회선이 비는 시각까지만 쉰다 - 에코 한 글자는 보통 이미
+다 나간 뒤라 쉬지 않고, 큰 화면을 그린 직후에만 그 화면이 도착할 때까지
+기다린다.
+
+모뎀 채널만 Pacer를 쓴다(rawio.set_channel). 텔넷/그 밖의 채널은 Pacer가
+없어서 인위적인 대기가 전혀 없다.
+"""
+import fcntl
+import os
+import struct
+import termios
+import time
+
+# 회선 속도(bps). dialup.py가 CONNECT 응답의 속도를 --line-bps=로 넘겨주면
+# 그걸 쓰고, 없으면 이 값(BBS_MODEM_LINE_BPS, 기본 V.32bis 14400)을 쓴다.
+DEFAULT_LINE_BPS = int(os.environ.get('BBS_MODEM_LINE_BPS', '14400'))
+
+# 8N1 - 바이트 하나에 시작/정지 비트 포함 10비트
+BITS_PER_BYTE = 10
+
+
+def _queued_bytes(fd):
+    """PTY 출력 큐에 아직 남은 바이트 수(중계가 아직 안 읽어 간 양). PTY가
+    아니면(in-process 모드의 소켓은 TIOCOUTQ가 버퍼 관리 오버헤드까지 세서
+    바이트 수로 쓸 수 없다) 또는 알 수 없으면 0."""
+    if not os.isatty(fd):
+        return 0
+    try:
+        raw = fcntl.ioctl(fd, termios.TIOCOUTQ, b'\0\0\0\0')
+        return struct.unpack('i', raw)[0]
+    except OSError:
+        return 0
+
+
+class Pacer:
+    def __init__(self, line_bps=None):
+        self.line_bps = line_bps or DEFAULT_LINE_BPS
+        self.bytes_per_sec = self.line_bps / BITS_PER_BYTE
+        self.busy_until = 0.0
+
+    def wrote(self, n):
+        now = time.monotonic()
+        self.busy_until = max(self.busy_until, now) + n / self.bytes_per_sec
+
+    def drain_delay(self, fd):
+        """쓴 출력이 회선으로 다 나갈 때까지 남은 시간(초)."""
+        remaining = self.busy_until - time.monotonic()
+        queued = _queued_bytes(fd)
+        if queued:
+            remaining = max(remaining, queued / self.bytes_per_sec)
+        return max(0.0, remaining)
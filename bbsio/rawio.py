@@ -1,62 +1,51 @@
 import sys
 import os
-import select
+import errno
 import time
 import tty
 import termios
-from wcwidth import wcwidth, wcswidth
+from bbsio.session import current as current_session
+from bbsio.pacing import Pacer
+from bbsio.lineedit import LineEditor
 
-current_encoding = 'utf-8'
+# 인코딩/채널/입출력 fd는 세션마다 다르므로 모듈 전역이 아니라 현재 세션
+# (bbsio.session)에 들고 있다 - 서버 프로세스 하나가 여러 접속을 스레드로
+# 돌리는 in-process 모드에서도 세션끼리 섞이지 않는다.
 
-# 어느 경로(모뎀 다이얼업 vs 텔넷)로 들어온 접속인지 - dialup.py/telnet.py가
-# bbs.py를 띄울 때 --channel=modem/--channel=telnet 인자로 알려주면
-# bbs.py가 set_channel()로 기록한다. 나중에 DUN(전화 접속 전용 PPP
-# 서비스) 같은, 채널에 따라 메뉴를 다르게 보여줘야 하는 기능의 기반이다.
-current_channel = 'unknown'
 
-
-def set_channel(channel):
-    global current_channel
-    current_channel = channel
+def set_channel(channel, line_bps=None):
+    # 어느 경로(모뎀 다이얼업 vs 텔넷)로 들어온 접속인지 - dialup.py/telnet.py가
+    # bbs.py를 띄울 때 --channel=modem/--channel=telnet 인자로 알려주면
+    # bbs.py가 set_channel()로 기록한다. 나중에 DUN(전화 접속 전용 PPP
+    # 서비스) 같은, 채널에 따라 메뉴를 다르게 보여줘야 하는 기능의 기반이다.
+    # 출력 속도 조절(bbsio.pacing)도 채널로 정한다 - 모뎀만 회선 속도에 맞춰
+    # 쉬고, 나머지는 쉬지 않는다.
+    session = current_session()
+    session.channel = channel
+    session.pacer = Pacer(line_bps) if channel == 'modem' else None
 
 
 def get_channel():
-    return current_channel
-
-# 일부 클라이언트(이야기 등)가 ESC[0m(RESET)을 완전히 처리하지 못해서,
-# 굵게/색 있는 프롬프트 문구 뒤에 사용자가 타이핑한 글자가 그 스타일을
-# 그대로 물려받아 보이는 현상이 있었다 (예: 노란 프롬프트 뒤에 입력한
-# 글자도 노랗게/흐릿하게 보임). RESET만으로는 부족해서, 매 글자를
-# 에코하기 직전에 RESET에 더해 흰색·보통굵기를 명시적으로 지정한다 -
-# "기본값으로 되돌리기"에 기대지 않고 원하는 스타일을 못박아 버린다.
-_RESET = '\x1b[0m'
-_PLAIN = '\x1b[0m\x1b[1m\x1b[37m'  # RESET 후 볼드+흰색 - 볼드 없는 흰색(37)은 어두운 회색조로 보임
-
-# 실제 통신 속도(14400bps 등)보다 서버 쪽 os.write()가 훨씬 빠르게 여러
-# 글자를 밀어넣을 수 있어서, 클라이언트(minicom 등)가 "몰아서" 도착한
-# 여러 글자를 한꺼번에 렌더링하지 못하고 일부를 놓치는 현상이 있었다.
-# 글자 에코 하나마다 아주 짧게 쉬어 클라이언트가 그릴 시간을 확보한다
-# (옛날 BBS/도어 프로그램들이 한글 깨짐 방지로 흔히 쓰던 pacing delay).
-ECHO_PACING_DELAY = 0.02
-
-# 직전에 박스/배너 등 화면을 잔뜩 그린 뒤 곧바로 입력을 받기 시작하면,
-# 느린 터미널 프로그램(minicom 등)이 그 화면을 다 그리기도 전에 사용자가
-# 타이핑을 시작해서 초반 키 입력 에코가 씹히는 현상이 있었다. 프롬프트
-# 함수에 들어가자마자 잠깐 쉬어 화면이 완전히 그려질 시간을 확보한다.
-SCREEN_SETTLE_DELAY = 0.3
-
-# 일부 클라이언트(예: Win98 VM + 이야기 조합)에서 백스페이스 키 하나를
-# 눌러도 0x08 바이트가 짧은 간격(수~수십ms)으로 두 번 들어오는 현상이
-# 실사용에서 확인됨 - 그 결과 한 번 눌렀는데 두 글자가 지워짐. 원인은
-# 클라이언트/가상머신 키보드 쪽으로 보이나 서버에서 방어적으로 짧은
-# 시간 안의 중복 백스페이스는 한 번으로 처리(디바운스)한다.
-BACKSPACE_DEBOUNCE_SECONDS = 0.08
+    return current_session().channel
+
+# 모뎀 회선에서는 서버가 화면을 PTY에 써 넣는 속도가 실제 통신 속도
+# (14400bps 등)보다 훨씬 빨라서, 화면이 다 도착하기 전에 입력을 받기
+# 시작하면 느린 터미널(minicom 등)이 초반 키 입력 에코를 씹고, 에코를 몰아서
+# 보내면 일부를 놓쳤다. 예전엔 프롬프트마다 0.3초, 에코마다 0.02초를 채널과
+# 상관없이 고정으로 쉬었는데, 이제는 회선이 실제로 비는 시각까지만 쉰다
+# (bbsio.pacing.Pacer - 모뎀 채널에만 있음). 화면이 회선으로 다 나간 뒤에도
+# 터미널이 그리는 데 걸리는 시간만큼 프롬프트 전에 이만큼 더 여유를 둔다.
+SCREEN_SETTLE_MARGIN = 0.1
 
 # 모뎀→PTY 중계가 죽거나 회선이 소리소문없이 끊겨도 getchar()가 여기서
 # 영원히 블로킹해선 안 된다 (이게 "랜덤 프리징"의 핵심 원인이었음).
 # 이 시간 동안 입력이 전혀 없으면 SessionIdleTimeout을 던진다.
 IDLE_TIMEOUT_SECONDS = 180
 
+# 반대편이 끊겼을 때 읽기/쓰기에서 나는 오류들 - PTY는 EIO, in-process 모드의
+# 소켓은 EPIPE/ECONNRESET.
+_HANGUP_ERRNOS = (errno.EIO, errno.EPIPE, errno.ECONNRESET)
+
 class SessionIdleTimeout(Exception):
     pass
 
@@ -67,8 +56,11 @@ class ConnectionClosed(Exception):
     pass
 
 def set_encoding(enc):
-    global current_encoding
-    current_encoding = enc
+    current_session().encoding = enc
+
+
+def get_encoding():
+    return current_session().encoding
 
 def flush_input():
     """이미 도착해 입력 버퍼에 쌓여 있는 바이트를 전부 버린다.
@@ -78,51 +70,111 @@ def flush_input():
     새 프롬프트 문구를 출력하기 '직전'에만 호출해야 한다 - 출력 후에
     호출하면 사용자가 프롬프트를 보고 바로 친, 정당한 빠른 입력까지
     같이 버려질 수 있다."""
-    try:
-        termios.tcflush(sys.stdin.fileno(), termios.TCIFLUSH)
-    except termios.error:
-        pass
+    current_session().discard_input()
 
 def beep():
     """터미널 벨(BEL, \\x07)을 울린다. 잘못된 명령 등 사용자에게 즉시
     피드백을 줘야 하는 상황에 rawprint 대신/함께 쓴다."""
     try:
-        sys.stdout.buffer.write(b'\x07')
-        sys.stdout.buffer.flush()
+        current_session().queue(b'\x07')
     except Exception:
         pass
 
 def rawprint(text: str, encoding=None):
+    session = current_session()
     if encoding is None:
-        encoding = current_encoding
+        encoding = session.encoding
     try:
         # PTY가 raw 모드라 OPOST/ONLCR이 꺼져 있어 커널이 \n -> \r\n 변환을
         # 해주지 않는다. 여기서 명시적으로 정규화해야 클라이언트 터미널에서
         # 줄바꿈이 계단식으로 깨지지 않는다 (커서만 아래로 가고 컬럼 복귀 안 됨).
         normalized = text.replace('\r\n', '\n').replace('\n', '\r\n')
         encoded = normalized.encode(encoding, errors='replace')
-        sys.stdout.buffer.write(encoded)
-        sys.stdout.buffer.flush()
+        session.queue(encoded)
+    except ConnectionClosed:
+        raise
+    except OSError as e:
+        if e.errno not in _HANGUP_ERRNOS:
+            raise
+        # 입력 쪽(_fill_input)과 같은 이유 - 반대편이 닫힌 PTY에
+        # 쓰면 EIO가(in-process 모드의 소켓이면 EPIPE가) 난다. 오류 문구를
+        # 다시 써 봐야 똑같이 실패하니 바로 끊긴 걸로 본다.
+        raise ConnectionClosed(f'출력 스트림 종료({errno.errorcode.get(e.errno, e.errno)})')
     except Exception as e:
-        sys.stdout.write(f"[출력 오류] {e}\n")
+        session.queue(f"[출력 오류] {e}\r\n".encode(encoding, errors='replace'))
+
+
+def flush_output():
+    """화면 버퍼(bbsio.session 참고)에 모아 둔 출력을 지금 내보낸다. 입력을
+    기다리기 직전(getchar)에는 자동으로 불리고, 그 밖에 출력을 먼저 보여줘야
+    하는 곳(쉬기 직전 등)에서 부른다."""
+    try:
+        current_session().end_frame()
+    except OSError as e:
+        if e.errno not in _HANGUP_ERRNOS:
+            raise
+        raise ConnectionClosed(f'출력 스트림 종료({errno.errorcode.get(e.errno, e.errno)})')
+
+
+def _settle():
+    """프롬프트를 내기 전: 모뎀이면 앞서 그린 화면이 회선으로 다 나가고
+    터미널이 그릴 때까지 기다린다. 텔넷 등은 바로 돌아간다."""
+    _wait_for_line(SCREEN_SETTLE_MARGIN)
 
-def _read_byte_with_timeout(fd):
-    ready, _, _ = select.select([fd], [], [], IDLE_TIMEOUT_SECONDS)
-    if not ready:
+
+def _pace_echo():
+    """에코 한 글자를 쓴 뒤: 모뎀이면 그 에코가 회선으로 나갈 때까지만
+    기다린다(보통은 이미 나가서 0)."""
+    _wait_for_line(0)
+
+
+def _wait_for_line(margin):
+    session = current_session()
+    if session.pacer is None:
+        return
+    # 쉬는 동안 회선으로 흘러가도록 모아 둔 출력을 먼저 내보낸다 - 화면 버퍼에
+    # 든 채로 쉬면 쉬는 의미가 없다.
+    flush_output()
+    delay = session.pacer.drain_delay(session.out_fd)
+    if delay > 0:
+        time.sleep(delay + margin)
+
+def _fill_input(session):
+    """수신 캐시(Session.rx_buf)가 비었을 때 입력이 올 때까지 기다렸다가 커널에
+    와 있는 만큼을 한 번에 채운다. 예전엔 바이트 하나마다 select()+os.read(fd, 1)
+    을 왕복해서, 여러 줄 글을 붙여 넣으면 바이트마다 시스템 콜이 두 번씩
+    나갔다 - 이제는 붙여 넣은 덩어리 하나에 두 번이다.
+
+    sys.stdin.buffer(BufferedReader)를 쓰지 않는 이유는 그대로다 - 그쪽은 자기
+    버퍼에 미리 당겨 둔 바이트를 select()가 모르기 때문에, 이미 도착한 다음
+    바이트를 "데이터 없음"으로 착각해서 영원히 대기하는 버그가 있었다(예: '1'을
+    보내면 '1'은 읽히는데 '\r'이 BufferedReader 내부 버퍼에 들어간 채로 select()가
+    다음 바이트를 영원히 기다림). 세션의 캐시는 캐시가 비었을 때만 select()를
+    부르므로 둘이 어긋나지 않고, flush_input()이 캐시도 같이 비운다."""
+    try:
+        n = session.fill(IDLE_TIMEOUT_SECONDS)
+    except OSError as e:
+        if e.errno not in _HANGUP_ERRNOS:
+            raise
+        # 리눅스 PTY는 반대편(마스터)이 닫히면 EOF 대신 EIO를 준다 - 중계가
+        # 먼저 끝나서 마스터를 닫은 경우도 회선이 끊긴 것과 똑같이 다룬다.
+        raise ConnectionClosed(f'입력 스트림 종료({errno.errorcode.get(e.errno, e.errno)})')
+    if n is None:
         raise SessionIdleTimeout(f'{IDLE_TIMEOUT_SECONDS}초간 입력 없음')
-    # sys.stdin.buffer(BufferedReader)로 읽으면 안 된다 - 1바이트만
-    # 요청해도 내부적으로 커널에서 더 많은 바이트를 미리 당겨와 유저스페이스
-    # 버퍼에 쌓아두는데, 위 select()는 커널 큐만 보기 때문에 이미 버퍼에
-    # 들어와 있는(하지만 아직 안 돌려준) 바이트를 "데이터 없음"으로 착각해서
-    # 영원히 대기하는 버그가 있었다 (두 번째 문자부터 응답이 없어지는 원인 -
-    # 예: '1'을 보내면 '1'은 읽히는데 ''이 이미 BufferedReader
-    # 내부 버퍼에 들어간 채로 select()가 다음 바이트를 영원히 기다림).
-    # os.read()는 버퍼링 없이 커널에서 직접 읽으므로 select()와 짝이 맞는다.
-    byte = os.read(fd, 1)
-    if not byte:
+    if not n:
         # PTY 반대편(모뎀/텔넷 중계)이 닫힘 - 회선이 정상적으로 끊긴 것
         raise ConnectionClosed('입력 스트림 종료(EOF)')
-    return byte
+
+
+def _read_bytes(session, n):
+    """정확히 n바이트를 수신 캐시에서 꺼낸다(모자라면 채우면서)."""
+    if not session.pending():
+        _fill_input(session)
+    raw = session.take(n)
+    while len(raw) < n:
+        _fill_input(session)
+        raw += session.take(n - len(raw))
+    return raw
 
 def _expected_char_len(first_byte, encoding):
     """첫 바이트만 보고 이 문자가 총 몇 바이트인지 정확히 계산한다.
@@ -155,241 +207,88 @@ def getchar():
     # 커널 버퍼에 대기 중이던 다음 글자의 바이트가 그대로 삭제되는 버그였음
     # (한글 멀티바이트 입력 중간 글자가 씹히는 원인). raw 모드는 dialup.py가
     # PTY 만들 때 이미 한 번 걸어두므로 여기서 매번 다시 걸 필요가 없다.
-    fd = sys.stdin.fileno()
-    first = _read_byte_with_timeout(fd)
-    length = _expected_char_len(first, current_encoding)
+    session = current_session()
+    # 모아 둔 출력은 입력을 기다려야 할 때(수신 캐시가 빔)만 내보낸다 - 붙여
+    # 넣기처럼 이미 도착한 입력이 남아 있는 동안은 그 에코/줄바꿈을 계속 모아
+    # 뒀다가 한 번에 쓴다.
+    if not session.pending():
+        flush_output()
+    first = _read_bytes(session, 1)
+    length = _expected_char_len(first, session.encoding)
     raw = first
-    while len(raw) < length:
-        raw += _read_byte_with_timeout(fd)
+    if length > 1:
+        raw += _read_bytes(session, length - 1)
     try:
-        return raw.decode(current_encoding)
+        return raw.decode(session.encoding)
     except UnicodeDecodeError:
         # 정확히 기대한 바이트 수만큼만 읽었는데도 깨져 있으면 진짜 회선
         # 노이즈 - 이 문자 하나만 대체문자로 포기하고, 다음 바이트부터는
         # 건드리지 않는다 (뒤따라오는 글자를 더 이상 잡아먹지 않음).
         return '�'
 
-def rawinput(prompt='', encoding=None) -> str:
-    if encoding is None:
-        encoding = current_encoding
-    time.sleep(SCREEN_SETTLE_DELAY)
-    flush_input()
-    rawprint(prompt, encoding)
-    buffer = []
-    last_backspace_time = 0.0
+def _edit(editor, encoding):
+    """LineEditor(bbsio.lineedit)에 키를 넣어 가며 입력이 끝날 때까지 받는다.
+    예전엔 네 입력 함수가 각자 글자마다 에코를 썼는데, 이제 수신 캐시에
+    이미 도착한 입력이 남아 있는 동안은(붙여 넣기, 빠른 타이핑, 방향키 같은
+    ESC 시퀀스) 편집기에 넣기만 하고, 다 처리했을 때 모인 에코를 한 번에
+    내보낸다 - 스타일 지정(_PLAIN)도 에코 묶음마다 한 번이다. 한 글자씩
+    타이핑할 때는 매번 캐시가 비니 예전처럼 바로 에코된다."""
+    session = current_session()
     while True:
-        ch = getchar()
-        if ch in ('\n', '\r'):
-            rawprint('\n', encoding)
-            return ''.join(buffer)
-        elif ord(ch) in (8, 127):  # Backspace: ^H or DEL
-            now = time.time()
-            if now - last_backspace_time < BACKSPACE_DEBOUNCE_SECONDS:
-                last_backspace_time = now
-                continue
-            last_backspace_time = now
-            if buffer:
-                last = buffer.pop()
-                width = wcwidth(last)
-                if width > 0:
-                    rawprint('\b' * width, encoding)
-                    rawprint(' ' * width, encoding)
-                    rawprint('\b' * width, encoding)
-        elif ch == '\x1b':  # Start of escape sequence
-            seq = ch + getchar()
-            if seq.endswith('['):
-                while True:
-                    c = getchar()
-                    seq += c
-                    if c.isalpha():
-                        break
-                continue  # Ignore full sequence
-            elif seq in ('\x1bOP', '\x1bOQ', '\x1bOR', '\x1bOS'):  # F1–F4
-                continue
-            else:
-                continue
-        elif ch == '\t':
-            continue  # Ignore tab key
-        else:
-            width = wcwidth(ch)
-            if width > 0:
-                buffer.append(ch)
-                rawprint(_PLAIN + ch, encoding)
-                time.sleep(ECHO_PACING_DELAY)
-            # else: ignore zero-width characters
+        editor.feed(getchar())
+        if editor.done or not session.pending():
+            output = editor.take_output()
+            if output:
+                rawprint(output, encoding)
+                _pace_echo()
+        if not editor.done:
+            continue
+        if editor.accept is None or editor.accept(editor.result):
+            return editor.result
+        editor.restart()
 
-def hidden_input(prompt='비밀번호: ', encoding=None) -> str:
+
+def _line_input(mode, prompt, encoding, accept=None):
     if encoding is None:
-        encoding = current_encoding
-    time.sleep(SCREEN_SETTLE_DELAY)
+        encoding = current_session().encoding
+    _settle()
     flush_input()
     rawprint(prompt, encoding)
-    buffer = []
-    last_backspace_time = 0.0
-    while True:
-        ch = getchar()
-        if ch in ('\n', '\r'):
-            rawprint('\n', encoding)
-            return ''.join(buffer)
-        elif ord(ch) in (8, 127):  # Backspace: ^H or DEL
-            now = time.time()
-            if now - last_backspace_time < BACKSPACE_DEBOUNCE_SECONDS:
-                last_backspace_time = now
-                continue
-            last_backspace_time = now
-            if buffer:
-                last = buffer.pop()
-                width = wcwidth(last)
-                if width > 0:
-                    rawprint('\b' * width, encoding)
-                    rawprint(' ', encoding)
-                    rawprint('\b' * width, encoding)
-        elif ch == '\x1b':  # Escape sequence
-            seq = ch + getchar()
-            if seq.endswith('['):
-                while True:
-                    c = getchar()
-                    seq += c
-                    if c.isalpha():
-                        break
-                continue
-            elif seq in ('\x1bOP', '\x1bOQ', '\x1bOR', '\x1bOS'):
-                continue
-            else:
-                continue
-        elif ch == '\t':
-            continue
-        else:
-            width = wcwidth(ch)
-            if width > 0:
-                buffer.append(ch)
-                rawprint(_PLAIN + '*', encoding)
-                time.sleep(ECHO_PACING_DELAY)
+    return _edit(LineEditor(mode, accept), encoding)
+
+
+def rawinput(prompt='', encoding=None) -> str:
+    return _line_input('plain', prompt, encoding)
+
+
+def hidden_input(prompt='비밀번호: ', encoding=None) -> str:
+    return _line_input('masked', prompt, encoding)
+
 
 def command_input(prompt=' > ', encoding=None) -> str:
     """
     명령어 입력 전용 함수.
-    - prompt 출력 후 명령어를 한 줄로 입력받음.
+    - prompt 출력 후 명령어를 한 줄로 입력받음(앞뒤 공백 제거).
     - 글로벌 명령어가 감지되면 handle_global_command() 호출.
     """
     if encoding is None:
-        encoding = current_encoding
+        encoding = current_session().encoding
 
     from core.command import is_global_command, handle_global_command
 
-    while True:
-        time.sleep(SCREEN_SETTLE_DELAY)
-        flush_input()
-        rawprint(prompt, encoding)
-        buffer = []
-        last_backspace_time = 0.0
-        while True:
-            ch = getchar()
-            if ch in ('\n', '\r'):
-                rawprint('\n', encoding)
-                command = ''.join(buffer).strip()
-                if is_global_command(command):
-                    handled = handle_global_command(command)
-                    if handled:
-                        # 여기서 buffer를 비우지 않으면 방금 처리한 명령(예: 'x')이
-                        # 그대로 남아 있다가 다음 줄 입력 앞에 붙어버린다 - 특히
-                        # 사용자가 그냥 Enter만 치면 buffer가 그대로 재구성되어
-                        # 'x'가 다시 감지되고 exit_program()이 무한히 재실행되는
-                        # 버그였다(예: 종료 확인에 y/n 이외의 값을 입력했을 때).
-                        buffer = []
-                        last_backspace_time = 0.0
-                        rawprint(prompt, encoding)
-                        continue  # 다시 입력 받기
-                return command
-            elif ord(ch) in (8, 127):  # Backspace
-                now = time.time()
-                if now - last_backspace_time < BACKSPACE_DEBOUNCE_SECONDS:
-                    last_backspace_time = now
-                    continue
-                last_backspace_time = now
-                if buffer:
-                    last = buffer.pop()
-                    width = wcwidth(last)
-                    if width > 0:
-                        rawprint('\b' * width, encoding)
-                        rawprint(' ' * width, encoding)
-                        rawprint('\b' * width, encoding)
-            elif ch == '\x1b':
-                seq = ch + getchar()
-                if seq.endswith('['):
-                    while True:
-                        c = getchar()
-                        seq += c
-                        if c.isalpha():
-                            break
-                    continue
-                elif seq in ('\x1bOP', '\x1bOQ', '\x1bOR', '\x1bOS'):
-                    continue
-                else:
-                    continue
-            elif ch == '\t':
-                continue
-            else:
-                width = wcwidth(ch)
-                if width > 0:
-                    buffer.append(ch)
-                    rawprint(_PLAIN + ch, encoding)
-                    time.sleep(ECHO_PACING_DELAY)
+    def accept(command):
+        if is_global_command(command) and handle_global_command(command):
+            # 편집기를 비우지 않으면 방금 처리한 명령(예: 'x')이 그대로 남아
+            # 있다가 다음 줄 입력 앞에 붙어버린다 - 특히 사용자가 그냥 Enter만
+            # 치면 'x'가 다시 감지되고 exit_program()이 무한히 재실행되는
+            # 버그였다(예: 종료 확인에 y/n 이외의 값을 입력했을 때). _edit가
+            # editor.restart()로 비운다.
+            rawprint(prompt, encoding)
+            return False
+        return True
 
-def multiline_input(prompt='내용 입력 (한 줄에 . 입력 시 종료)', encoding=None):
-    if encoding is None:
-        encoding = current_encoding
+    return _line_input('command', prompt, encoding, accept)
 
-    time.sleep(SCREEN_SETTLE_DELAY)
-    flush_input()
-    rawprint(prompt + '\n', encoding)
-    lines = [""]
-    current_line = 0
-    last_backspace_time = 0.0
 
-    while True:
-        ch = getchar()
-        if ch in ('\n', '\r'):
-            if lines[current_line].strip() == ".":
-                return "\n".join(lines[:-1])
-            lines.append("")
-            current_line += 1
-            rawprint('\n', encoding)
-        elif ord(ch) in (8, 127):  # Backspace
-            now = time.time()
-            if now - last_backspace_time < BACKSPACE_DEBOUNCE_SECONDS:
-                last_backspace_time = now
-                continue
-            last_backspace_time = now
-            if lines[current_line]:
-                last = lines[current_line][-1]
-                width = wcwidth(last)
-                lines[current_line] = lines[current_line][:-1]
-                if width > 0:
-                    rawprint('\b' * width, encoding)
-                    rawprint(' ' * width, encoding)
-                    rawprint('\b' * width, encoding)
-            else:
-                if current_line > 0:
-                    lines.pop()
-                    current_line -= 1
-                    rawprint('\x1b[F', encoding)  # Move cursor up one line
-                    rawprint('\r' + ' ' * wcswidth(lines[current_line]) + '\r', encoding)  # Clear line
-                    rawprint(lines[current_line], encoding)
-        elif ch == '\x1b':  # Skip escape sequences
-            seq = ch + getchar()
-            if seq.endswith('['):
-                while True:
-                    c = getchar()
-                    seq += c
-                    if c.isalpha():
-                        break
-            continue
-        elif ch == '\t':
-            continue
-        else:
-            width = wcwidth(ch)
-            if width > 0:
-                lines[current_line] += ch
-                rawprint(_PLAIN + ch, encoding)
-                time.sleep(ECHO_PACING_DELAY)
+def multiline_input(prompt='내용 입력 (한 줄에 . 입력 시 종료)', encoding=None):
+    return _line_input('multiline', prompt + '\n', encoding)
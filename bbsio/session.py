@@ -0,0 +1,207 @@
+"""세션(접속 하나)의 입출력 상태.
+
+예전엔 bbs.py가 접속마다 별도 프로세스로 떠서 "현재 세션" = "이 프로세스"였고,
+rawio/transport/zmodem_proc이 sys.stdin/sys.stdout(fd 0/1)과 모듈 전역
+(current_encoding, 수신 버퍼 등)을 그대로 세션 상태로 썼다. 서버 프로세스
+하나가 여러 접속을 동시에 돌리려면(BBS_SESSION_MODE=inprocess, telnet.py 참고)
+이 상태가 접속마다 따로 있어야 한다.
+
+Session은 그 상태를 한데 모은 것이다.
+  in_fd / out_fd  - 입력을 읽고 출력을 쓸 fd(PTY 슬레이브, 또는 in-process
+                    모드에서 텔넷 중계와 이어진 소켓). 같은 fd여도 된다.
+  encoding        - 사용자가 고른 문자 인코딩(rawio.set_encoding)
+  channel         - modem/telnet 등 접속 경로(rawio.set_channel)
+  rx_buf / rx_pos - 수신 캐시(아래 참고). rawio(키 입력)와 xfer.transport
+                    (파일 전송 바이너리)가 같이 쓴다.
+  out_buf         - 화면 버퍼(아래 참고)
+  window_size     - 텔넷 NAWS로 받은 (가로, 세로). PTY 세션은 이 값 대신
+                    PTY의 창 크기(TIOCGWINSZ)를 쓴다(screen_size()).
+
+화면 버퍼(BBS_FRAME_BUFFER=1, 기본): rawprint()는 바로 쓰지 않고 out_buf에
+쌓기만 하고(queue), 세션이 입력을 기다리기 직전(end_frame)에 한 번에 내보낸다.
+박스/헤더를 줄 단위로 그리는 tui 헬퍼 때문에 화면 하나가 수십 번의 작은
+write()가 되어, 텔넷에서는(TCP_NODELAY) 그만큼의 TCP 세그먼트로, 모뎀에서는
+잘게 쪼개진 버스트로 나가던 걸 화면당 write 한두 번으로 줄인다. 0이면 예전처럼
+rawprint마다 바로 쓴다. 어느 쪽이든 "화면"(입력 대기 사이의 출력) 수와 write
+횟수/바이트를 세어 두므로(frames/writes/bytes_out) 둘을 비교할 수 있다.
+
+수신 캐시: 예전엔 rawio가 키 입력을 바이트 하나마다 select()+os.read(fd, 1)로
+읽어서, 한글 한 글자에 시스템 콜 네 번, 여러 줄 글을 붙여 넣으면 바이트마다
+두 번씩 나갔다(xfer.transport만 따로 자기 캐시를 두고 있었다). 이제 둘 다
+fill()로 커널에 와 있는 만큼(최대 READ_CHUNK)을 한 번에 rx_buf로 가져오고, 다
+쓸 때까지 거기서 꺼내 간다. 캐시는 커널 큐보다 앞에 있는 입력이므로, 입력을
+버릴 때(discard_input)는 캐시도 같이 비운다.
+
+current()는 지금 스레드에 연결된 세션을 돌려준다. 아무것도 연결하지 않은
+스레드(접속마다 프로세스가 뜨는 기존 방식)는 fd 0/1을 쓰는 프로세스 기본
+세션을 쓰므로, 예전 코드 경로는 그대로 동작한다.
+"""
+import fcntl
+import os
+import select
+import struct
+import termios
+import threading
+
+FRAME_BUFFER = os.environ.get('BBS_FRAME_BUFFER', '1') != '0'
+
+# fill() 한 번에 커널에서 가져올 최대 바이트 수. ZModem 블록(수 KB)이나 붙여
+# 넣은 글 한 편이 보통 한 번에 들어온다.
+READ_CHUNK = 65536
+
+_local = threading.local()
+_process_session = None
+
+
+class Session:
+    def __init__(self, in_fd=0, out_fd=1, channel='unknown', encoding='utf-8'):
+        self.in_fd = in_fd
+        self.out_fd = out_fd
+        self.channel = channel
+        self.encoding = encoding
+        self.rx_buf = b''
+        self.rx_pos = 0
+        self.buffered = FRAME_BUFFER
+        self.out_buf = bytearray()
+        # 출력 통계 - 화면(입력 대기 사이의 출력) 수, write() 시스템 콜 수, 바이트 수
+        self.frames = 0
+        self.writes = 0
+        self.bytes_out = 0
+        self.max_frame_writes = 0
+        self._frame_writes = 0
+        # 입력 통계 - read() 시스템 콜 수, 바이트 수
+        self.reads = 0
+        self.bytes_in = 0
+        # 모뎀 채널이면 bbsio.pacing.Pacer - 쓴 바이트로 회선이 언제 비는지 계산
+        self.pacer = None
+        self.window_size = None
+
+    def queue(self, data):
+        """화면 출력. 화면 버퍼가 켜져 있으면 모아 두기만 한다."""
+        if self.buffered:
+            self.out_buf += data
+        else:
+            self._write_all(data)
+
+    def write(self, data):
+        """바로 써야 하는 출력(파일 전송 바이너리 등). 순서가 뒤바뀌지 않도록
+        모아 둔 화면 출력부터 내보낸다."""
+        self.flush()
+        self._write_all(data)
+
+    def flush(self):
+        if self.out_buf:
+            data = bytes(self.out_buf)
+            self.out_buf.clear()
+            self._write_all(data)
+
+    def end_frame(self):
+        """입력을 기다리기 직전에 부른다 - 모아 둔 화면을 내보내고 통계를
+        화면 하나로 마감한다."""
+        self.flush()
+        if self._frame_writes:
+            self.frames += 1
+            self.max_frame_writes = max(self.max_frame_writes, self._frame_writes)
+            self._frame_writes = 0
+
+    def _write_all(self, data):
+        # os.write()는 요청보다 적게 쓰고 반환할 수 있어서(PTY/소켓 버퍼가 찬
+        # 경우) 다 쓸 때까지 반복한다.
+        view = memoryview(data)
+        while view:
+            n = os.write(self.out_fd, view)
+            view = view[n:]
+            self.writes += 1
+            self._frame_writes += 1
+            self.bytes_out += n
+            if self.pacer is not None:
+                self.pacer.wrote(n)
+
+    def output_stats(self):
+        """세션 종료 로그용 한 줄 요약."""
+        frames = max(self.frames, 1)
+        return (f'화면 {self.frames}개, write {self.writes}회/{self.bytes_out}바이트 '
+                f'(화면당 평균 {self.writes / frames:.1f}회/{self.bytes_out // frames}바이트, '
+                f'최대 {self.max_frame_writes}회), 화면 버퍼 {"켬" if self.buffered else "끔"}')
+
+    def screen_size(self):
+        """상대 터미널의 (가로, 세로). 모르면 None(모뎀, NAWS를 안 하는
+        텔넷 클라이언트). 텔넷 서버가 창 크기가 바뀔 때마다 PTY에 기록하므로
+        (telnet.py의 _set_window_size) 부를 때마다 새로 읽는다."""
+        if self.window_size:
+            return self.window_size
+        if not os.isatty(self.out_fd):
+            return None
+        try:
+            raw = fcntl.ioctl(self.out_fd, termios.TIOCGWINSZ, b'\0' * 8)
+        except OSError:
+            return None
+        rows, cols = struct.unpack('HHHH', raw)[:2]
+        if not rows or not cols:
+            return None
+        return cols, rows
+
+    def pending(self):
+        """수신 캐시에 남아 있는(이미 읽어 왔지만 아직 안 꺼내 간) 바이트 수."""
+        return len(self.rx_buf) - self.rx_pos
+
+    def fill(self, timeout):
+        """수신 캐시가 비었을 때 부른다 - 모아 둔 화면을 먼저 내보내고, 입력이
+        올 때까지 최대 timeout초 기다렸다가 커널에 와 있는 만큼을 캐시에 채운다.
+        채운 바이트 수를 돌려준다. 시간 안에 안 오면 None, 상대가 닫았으면(EOF)
+        0. 읽기 오류(PTY 반대편이 닫혀서 나는 EIO 등)는 그대로 올린다 - 그걸
+        어떤 예외로 바꿀지는 부르는 쪽(rawio/transport)이 정한다."""
+        self.end_frame()
+        ready, _, _ = select.select([self.in_fd], [], [], timeout)
+        if not ready:
+            return None
+        chunk = os.read(self.in_fd, READ_CHUNK)
+        self.reads += 1
+        self.bytes_in += len(chunk)
+        self.rx_buf = chunk
+        self.rx_pos = 0
+        return len(chunk)
+
+    def take(self, n):
+        """수신 캐시에서 최대 n바이트를 꺼낸다(캐시가 비어 있으면 b'')."""
+        start = self.rx_pos
+        data = self.rx_buf[start:start + n]
+        self.rx_pos = start + len(data)
+        return data
+
+    def discard_input(self):
+        """이미 도착해 있는 입력을 전부 버린다. PTY면 tcflush로 커널 큐를
+        비우고, 소켓처럼 tcflush가 안 되는 fd면 지금 읽을 수 있는 만큼
+        읽어서 버린다."""
+        self.rx_buf = b''
+        self.rx_pos = 0
+        try:
+            termios.tcflush(self.in_fd, termios.TCIFLUSH)
+            return
+        except termios.error:
+            pass
+        while True:
+            ready, _, _ = select.select([self.in_fd], [], [], 0)
+            if not ready:
+                return
+            try:
+                if not os.read(self.in_fd, 4096):
+                    return
+            except OSError:
+                return
+
+
+def current():
+    session = getattr(_local, 'session', None)
+    if session is None:
+        global _process_session
+        if _process_session is None:
+            _process_session = Session()
+        session = _process_session
+    return session
+
+
+def activate(session):
+    """지금 스레드의 현재 세션을 session으로 바꾼다(None이면 프로세스 기본
+    세션으로 되돌림)."""
+    _local.session = session
@@ -1,29 +1,26 @@
 """하이텔풍 화면 렌더링 유틸리티 (색상/박스 문자/헤더-풋터 바)."""
-import re
 from bbsio.rawio import rawprint
-from wcwidth import wcswidth
+from bbsio.session import current as current_session
+from bbsio.width import str_width, truncate
 import shutil
 
-# board.py의 format_board_entry()처럼 색상 코드(ESC 시퀀스)를 이미 섞어
-# 만든 문자열을 pad()/box_line()에 그대로 넘기는 경우가 있는데, 그러면
-# ESC 시퀀스 바이트까지 "보이는 글자"로 세어져서 패딩 계산이 틀어지고
-# 박스 테두리가 줄마다 다르게 어긋나는 문제가 있었다. 폭을 잴 때는 항상
-# ESC 시퀀스를 먼저 걷어내고 계산한다.
-_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
-
-
-def _visible_width(text):
-    w = wcswidth(_ANSI_RE.sub('', text))
-    if w < 0:
-        w = len(_ANSI_RE.sub('', text))
-    return w
-
+# 기본 화면 크기. 터미널 크기를 모르면(모뎀, NAWS를 안 하는 텔넷 클라이언트)
+# 이 크기로 그린다. 알면 그 크기를 쓰되, 화면 문구/박스가 80x24 기준으로
+# 짜여 있어 그보다 작게는 줄이지 않고, 너무 큰 창에 박스가 끝없이 늘어나지
+# 않도록 MAX_SCREEN_*에서 자른다.
 SCREEN_WIDTH = 80
 SCREEN_HEIGHT = 24
+MAX_SCREEN_WIDTH = 160
+MAX_SCREEN_HEIGHT = 120
 
 
 def get_screen_size():
-    return SCREEN_WIDTH, SCREEN_HEIGHT
+    size = current_session().screen_size()
+    if size is None:
+        return SCREEN_WIDTH, SCREEN_HEIGHT
+    width, height = size
+    return (min(max(width, SCREEN_WIDTH), MAX_SCREEN_WIDTH),
+            min(max(height, SCREEN_HEIGHT), MAX_SCREEN_HEIGHT))
 
 
 # --- ANSI 색상 -----------------------------------------------------------
@@ -67,30 +64,12 @@ def color(text, code):
 
 
 def pad(text, width, align='left'):
-    """보이는 폭(wcswidth, 한글 2칸 + ESC 시퀀스 제외) 기준으로 폭을 맞춰 채운다."""
-    w = _visible_width(text)
+    """보이는 폭(한글 2칸 + ESC 시퀀스 제외, bbsio.width) 기준으로 폭을 맞춰 채운다."""
+    w = str_width(text)
     if w >= width:
         # 넘치면 잘라낸다 - ESC 시퀀스는 그대로 통과시키고, 보이는 문자만
         # 세면서 자른다.
-        result = ""
-        visible = 0
-        i = 0
-        while i < len(text):
-            m = _ANSI_RE.match(text, i)
-            if m:
-                result += m.group(0)
-                i = m.end()
-                continue
-            c = text[i]
-            cw = wcswidth(c)
-            if cw < 0:
-                cw = 1
-            if visible + cw > width:
-                break
-            result += c
-            visible += cw
-            i += 1
-        return result
+        return truncate(text, width)
     fill = width - w
     if align == 'right':
         return ' ' * fill + text
@@ -110,7 +89,7 @@ def draw_top_bar(site_title, right_text, width=None):
     굵은 노랑, 우측 시각/사용자 정보는 청록으로 구분하고 밑줄을 긋는다."""
     if width is None:
         width, _ = get_screen_size()
-    gap = max(1, width - wcswidth(site_title) - wcswidth(right_text) - 1)
+    gap = max(1, width - str_width(site_title) - str_width(right_text) - 1)
     rawprint(C_TITLE + site_title + RESET + (' ' * gap) + C_DIM + right_text + RESET + '\n')
     rawprint(hline(width) + '\n')
 
@@ -121,7 +100,7 @@ def draw_header(title, right_text='', width=None):
         width, _ = get_screen_size()
     rawprint(hline(width) + '\n')
     if right_text:
-        gap = max(2, width - wcswidth(title) - wcswidth(right_text))
+        gap = max(2, width - str_width(title) - str_width(right_text))
         rawprint(C_TITLE + title + RESET + (' ' * gap) + C_DIM + right_text + RESET + '\n')
     else:
         rawprint(C_TITLE + title + RESET + '\n')
@@ -138,7 +117,7 @@ def draw_footer(text, width=None):
 def box_top(width, title=''):
     if title:
         t = f" {title} "
-        remain = width - 2 - wcswidth(t)
+        remain = width - 2 - str_width(t)
         left = remain // 2
         right = remain - left
         rawprint(C_BORDER + '+' + ('-' * left) + RESET + C_TITLE + t + RESET +
@@ -0,0 +1,106 @@
+"""화면 폭(터미널 칸 수) 계산.
+
+게시판/쪽지 목록의 줄마다 tui.pad()가 폭을 재고, 넘치면 자르는데 예전엔
+wcswidth()를 여러 번 불렀다 - ESC 시퀀스를 걷어 낸 문자열로 한 번, 실패하면
+또 한 번, 자를 때는 글자마다 wcswidth(c)에 더해 위치마다 정규식 매치까지
+시도했다. board.format_board_entry()는 이름을 한 글자씩 늘려 가며
+wcswidth(trimmed_name + c)를 다시 재서 이름 길이의 제곱에 비례했다. 화면에
+나오는 글자는 거의 ASCII와 한글이므로:
+
+  char_width()  - ASCII는 미리 만든 표에서, 한글 음절/자모는 범위 비교로 바로
+                  돌려주고, 그 밖의 글자만 wcwidth()에 묻는다.
+  str_width()   - 문자열 전체의 폭(ESC 시퀀스 제외). 목록 화면은 같은 제목/
+                  이름/날짜를 페이지마다 다시 그리므로 결과를 LRU 캐시에 둔다.
+  truncate()    - 보이는 폭이 width를 넘지 않게 한 번 훑으면서 자른다(ESC
+                  시퀀스는 그대로 통과). 넘치는 제목도 페이지마다 다시 잘리므로
+                  이것도 캐시에 둔다.
+
+폭을 모르는 제어 문자가 섞이면 예전 tui._visible_width()처럼 (ESC 시퀀스를
+뺀) 글자 수를 폭으로 본다.
+"""
+import re
+from functools import lru_cache
+
+from wcwidth import wcwidth
+
+# board.py의 format_board_entry()처럼 색상 코드(ESC 시퀀스)를 이미 섞어
+# 만든 문자열을 pad()/box_line()에 그대로 넘기는 경우가 있는데, 그러면
+# ESC 시퀀스 바이트까지 "보이는 글자"로 세어져서 패딩 계산이 틀어지고
+# 박스 테두리가 줄마다 다르게 어긋나는 문제가 있었다. 폭을 잴 때는 항상
+# ESC 시퀀스를 먼저 걷어내고 계산한다.
+ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+
+# str_width()/truncate() 캐시 크기 - 한 화면에 나오는 문자열 수십 개 x 여러 세션/페이지
+WIDTH_CACHE_SIZE = 4096
+
+# ASCII 폭 표(wcwidth와 같은 값 - NUL은 0, 그 밖의 제어 문자는 -1)
+_ASCII_WIDTH = [0] + [-1] * 31 + [1] * 95 + [-1]
+
+
+def char_width(c):
+    """글자 하나의 폭(2/1/0, 폭을 모르는 제어 문자는 -1)."""
+    o = ord(c)
+    if o < 0x80:
+        return _ASCII_WIDTH[o]
+    if 0xAC00 <= o <= 0xD7A3 or 0x3131 <= o <= 0x318E or 0x1100 <= o <= 0x115F:
+        return 2  # 한글 음절, 호환 자모, 초성 자모
+    return wcwidth(c)
+
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def str_width(text):
+    """보이는 폭(한글 2칸, ESC 시퀀스 제외)."""
+    if '\x1b' in text:
+        text = ANSI_RE.sub('', text)
+    if text.isascii() and text.isprintable():
+        return len(text)
+    total = 0
+    for c in text:
+        w = char_width(c)
+        if w < 0:
+            return len(text)
+        total += w
+    return total
+
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def truncate(text, width):
+    """보이는 폭이 width를 넘지 않는 앞부분. ESC 시퀀스는 폭 없이 그대로
+    통과시키고, 잘린 뒤에 오는 ESC 시퀀스는 버린다. 폭을 모르는 제어 문자는
+    1칸으로 센다."""
+    out = []
+    visible = 0
+    pos = 0
+    for m in ANSI_RE.finditer(text):
+        piece, visible, cut = _take(text[pos:m.start()], width - visible, visible)
+        out.append(piece)
+        if cut:
+            return ''.join(out)
+        out.append(m.group(0))
+        pos = m.end()
+    piece, visible, cut = _take(text[pos:], width - visible, visible)
+    out.append(piece)
+    return ''.join(out)
+
+
+def _take(segment, room, visible):
+    """ESC 시퀀스 없는 segment에서 room칸까지 잘라 (조각, 누적 폭, 잘렸나)."""
+    if segment.isascii() and segment.isprintable():
+        if len(segment) <= room:
+            return segment, visible + len(segment), False
+        return segment[:room], visible + room, True
+    used = 0
+    for i, c in enumerate(segment):
+        w = char_width(c)
+        if w < 0:
+            w = 1
+        if used + w > room:
+            return segment[:i], visible + used, True
+        used += w
+    return segment, visible + used, False
+
+
+def clear_cache():
+    """폭/자르기 캐시를 비운다(벤치마크용)."""
+    str_width.cache_clear()
+    truncate.cache_clear()
@@ -19,10 +19,11 @@ CRC만 안 맞아, 코드 리뷰/바이트 단위 분석으로는 원인을 못
 import os
 import resource
 import subprocess
-import sys
 import tempfile
 import threading
 
+from bbsio.session import current as current_session
+
 DEFAULT_TIMEOUT = 600  # 초 - 큰 파일/느린 회선을 감안한 전체 전송 상한
 
 # 구식 터미널 자동인식용 배너 - 실제 rz(1)이 대화형 터미널에서 사람이 보라고
@@ -40,7 +41,8 @@ class ZModemProcError(Exception):
 
 
 def _raw_fds():
-    return sys.stdin.fileno(), sys.stdout.fileno()
+    session = current_session()
+    return session.in_fd, session.out_fd
 
 
 def _drain_stderr(proc, into):
@@ -70,7 +72,8 @@ def _make_fsize_limit(max_size):
 def receive(max_size=None, timeout=DEFAULT_TIMEOUT):
     """rz로 파일 하나를 받아 (filename, data)를 반환한다. 실패 시 ZModemProcError."""
     in_fd, out_fd = _raw_fds()
-    os.write(out_fd, _AUTOSTART_BANNER)
+    # 화면 버퍼에 남은 안내 문구를 배너보다 먼저 내보낸다(Session.write).
+    current_session().write(_AUTOSTART_BANNER)
     with tempfile.TemporaryDirectory(prefix='zrecv_') as tmpdir:
         try:
             # --disable-timeouts: rz의 기본 내부 타임아웃이 우리 텔넷 릴레이
@@ -120,6 +123,8 @@ def send(filepath, display_name=None, timeout=DEFAULT_TIMEOUT):
     display_name을 주면 그 이름으로 상대에게 전달된다(우리 내부 저장
     파일명 대신 사용자가 보던 원래 파일명을 그대로 보여주기 위함)."""
     in_fd, out_fd = _raw_fds()
+    # sz가 fd에 직접 쓰기 시작하기 전에 화면 버퍼를 비운다.
+    current_session().end_frame()
     if display_name is None:
         display_name = os.path.basename(filepath)
 
@@ -4,7 +4,7 @@ from bbsio.tui import (
     clear_screen, draw_top_bar, draw_footer,
     box_top, box_bottom, box_line, get_screen_size,
 )
-from core.profile import load_users, save_users, show_user_info, now_str
+from core.profile import load_users, put_user, delete_user, show_user_info, now_str
 
 SITE_NAME = "M I N I - T E L"
 
@@ -84,7 +84,7 @@ def manage_user(target_id):
                     rawinput("계속하려면 Enter를 누르세요.\n")
                     continue
                 users[target_id]['is_admin'] = not users[target_id].get('is_admin', False)
-                save_users(users)
+                put_user(target_id, users[target_id])
                 state = "부여" if users[target_id]['is_admin'] else "해제"
                 rawprint(C_OK + f"관리자 권한이 {state}되었습니다.\n" + RESET)
                 rawinput("계속하려면 Enter를 누르세요.\n")
@@ -96,7 +96,7 @@ def manage_user(target_id):
                 confirm = rawinput(C_ERR + f"정말 '{target_id}' 계정을 삭제하시겠습니까? (Y/N): " + RESET).strip().upper()
                 if confirm == 'Y':
                     users.pop(target_id, None)
-                    save_users(users)
+                    delete_user(target_id)
                     rawprint(C_OK + "계정이 삭제되었습니다.\n" + RESET)
                     rawinput("계속하려면 Enter를 누르세요.\n")
                     return
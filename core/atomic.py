@@ -0,0 +1,96 @@
+"""세션 프로세스 간에 안전한 JSON 파일 쓰기 - fcntl 잠금 + 임시파일/os.replace.
+
+접속마다 bbs.py가 별도 프로세스로 뜨는데, 예전엔 다들 같은 JSON 파일을
+"읽고 -> 고치고 -> open(..., 'w')로 통째로 쓰기"로 다뤘다. 두 사람이 동시에
+쪽지를 보내면 나중에 쓴 쪽이 먼저 쓴 쪽의 변경을 덮어써서 하나가 사라졌고,
+json.dump 도중 프로세스가 죽으면 파일이 반쯤 잘린 채 남아 다음 접속부터
+json.load가 계속 실패했다.
+
+  - 고치기는 update_json()으로 한다: 파일별 잠금(<파일>.lock)을 잡은 채로
+    최신 내용을 다시 읽고, 고치고, 쓴다. 잠금 안에서 읽으므로 다른 세션의
+    변경을 덮어쓰지 않는다.
+  - 쓰기는 같은 디렉토리의 임시 파일에 끝까지 쓴 뒤 os.replace로 바꿔치기한다.
+    읽는 쪽은 잠금 없이도 항상 "이전 파일 전체" 아니면 "새 파일 전체"만 본다.
+  - BBS_FSYNC=1(기본)이면 바꿔치기 전에 파일을, 후에 디렉토리를 fsync해서
+    정전 같은 상황에도 내용이 남게 한다. 0이면 생략(테스트/벤치마크용).
+"""
+import os
+import json
+import fcntl
+import tempfile
+from contextlib import contextmanager
+
+FSYNC = os.environ.get('BBS_FSYNC', '1') == '1'
+
+
+@contextmanager
+def locked(path):
+    """path 전용 잠금 파일(path + '.lock')에 배타 잠금을 건다. 데이터 파일
+    자체를 잠그지 않는 건, os.replace로 파일이 바뀌면 잠금이 옛 inode에
+    남아버리기 때문이다."""
+    fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path):
+    if not FSYNC:
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_json(path, default_factory):
+    if not os.path.exists(path):
+        return default_factory()
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    """data를 path에 원자적으로 쓴다(임시 파일 + os.replace)."""
+    _write_atomic(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=2))
+
+
+def write_text(path, text, sync=None):
+    """text를 path에 원자적으로 쓴다. 줄바꿈은 바꾸지 않고 그대로 쓴다.
+    sync=False면 fsync를 건너뛴다(여러 파일을 쓰고 한 번에 동기화할 때)."""
+    _write_atomic(path, lambda f: f.write(text), newline='', sync=sync)
+
+
+def _write_atomic(path, write, newline=None, sync=None):
+    if sync is None:
+        sync = FSYNC
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline=newline) as f:
+            write(f)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if sync:
+        fsync_dir(path)
+
+
+def update_json(path, default_factory, fn):
+    """잠금을 잡고 path의 최신 내용을 읽어 fn(data)로 고친 뒤 다시 쓴다.
+    fn은 data를 제자리에서 고치고, 그 반환값이 그대로 반환된다."""
+    with locked(path):
+        data = read_json(path, default_factory)
+        result = fn(data)
+        write_json(path, data)
+        return result
@@ -1,5 +1,4 @@
 import os
-import json
 import uuid
 from datetime import datetime
 from bbsio.rawio import rawprint, rawinput, command_input, multiline_input, beep
@@ -8,15 +7,17 @@ from bbsio.tui import (
     clear_screen, hline, pad, draw_top_bar, draw_footer,
     box_top, box_bottom, box_line, box_sep, get_screen_size,
 )
-from wcwidth import wcswidth
+from bbsio.width import str_width, truncate
 from core import mail
 from core import admin
 from core import files as file_board
 from core.profile import is_admin, edit_profile
 from bbsio.xfer.xmodem import XModemReceiver, XModemError
 from bbsio.xfer import zmodem_proc
+from core.storage import get_store
+from core.cache import read_json
+from core import search
 
-POST_FILE = os.path.join('data', 'posts.json')
 SITE_NAME = "M I N I - T E L"
 
 
@@ -29,12 +30,10 @@ def format_board_entry(index, name, board_id, post_count, width):
     name_pad = 22
     id_pad = 10
 
-    trimmed_name = ""
-    for c in name:
-        if wcswidth(trimmed_name + c) >= name_pad:
-            break
-        trimmed_name += c
-    name_space = " " * (name_pad - wcswidth(trimmed_name))
+    # 이름 칸은 name_pad보다 한 칸 좁게 채운다(뒤에 공백 한 칸 이상). 예전엔
+    # 한 글자씩 늘려 가며 폭을 다시 재서 이름 길이의 제곱에 비례했다.
+    trimmed_name = truncate(name, name_pad - 1)
+    name_space = " " * (name_pad - str_width(trimmed_name))
 
     id_str = f"[{board_id:<{id_pad}}]"
     post_str = f"({post_count:>3}건)"
@@ -43,20 +42,21 @@ def format_board_entry(index, name, board_id, post_count, width):
 
 
 def load_boards():
-    with open('data/boards.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    # 메인 메뉴를 다시 그릴 때마다 부른다 - 파일이 안 바뀌었으면 다시 파싱하지 않는다
+    return read_json(os.path.join('data', 'boards.json'), list)
 
 
 def load_posts():
-    if not os.path.exists(POST_FILE):
-        return []
-    with open(POST_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return get_store().load_posts()
 
 
 def save_posts(posts):
-    with open(POST_FILE, 'w', encoding='utf-8') as f:
-        json.dump(posts, f, ensure_ascii=False, indent=2)
+    get_store().save_posts(posts)
+
+
+def board_page(board_id, offset, limit):
+    """게시판의 글 offset번째(0부터)부터 limit개와 전체 글 수를 반환한다."""
+    return get_store().board_page(board_id, offset, limit)
 
 
 def _can_edit(username, post):
@@ -123,6 +123,9 @@ def _upload_attachment():
 
 
 def view_post(post, username):
+    # 목록(board_page)에서 넘어온 글에는 글 머리만 있다 - 본문은 여기서 이 글
+    # 하나만 읽는다.
+    post = dict(post, content=get_store().post_body(post['id']) or '')
     width, height = get_screen_size()
     page = 0
     while True:
@@ -164,12 +167,7 @@ def view_post(post, username):
                     post['title'] = new_title
                 if new_content.strip():
                     post['content'] = new_content
-                all_posts = load_posts()
-                for i, p in enumerate(all_posts):
-                    if p.get('id') == post.get('id'):
-                        all_posts[i] = post
-                        break
-                save_posts(all_posts)
+                get_store().update_post(post)
                 rawprint(C_OK + "수정되었습니다.\n" + RESET)
                 rawinput("계속하려면 Enter를 누르세요.\n")
             elif cmd == 'dd':
@@ -179,8 +177,7 @@ def view_post(post, username):
                     continue
                 confirm = rawinput(C_ERR + "정말 삭제하시겠습니까? (Y/N): " + RESET).strip().upper()
                 if confirm == 'Y':
-                    all_posts = [p for p in load_posts() if p.get('id') != post.get('id')]
-                    save_posts(all_posts)
+                    get_store().delete_post(post.get('id'))
                     rawprint(C_OK + "삭제되었습니다.\n" + RESET)
                     rawinput("계속하려면 Enter를 누르세요.\n")
                     return
@@ -219,13 +216,10 @@ def write_post(username, board_id):
     attach_choice = rawinput(C_TITLE + "첨부파일을 업로드하시겠습니까? (Y/N): " + RESET).strip().upper()
     attachment = _upload_attachment() if attach_choice == 'Y' else None
 
-    # 게시판별로 걸러낸 목록이 아니라 항상 전체 글 목록을 불러와서 그
-    # 위에 이어붙여야 한다 - 필터링된 목록을 그대로 저장하면 다른
-    # 게시판의 글이 전부 사라지는 버그가 있었다.
-    all_posts = load_posts()
-    next_id = max((p.get('id', 0) for p in all_posts), default=0) + 1
+    # id는 저장소가 잠금/트랜잭션 안에서 최신 상태 기준으로 매긴다 - 전체
+    # 목록을 불러와 이어붙인 뒤 통째로 저장하던 예전 방식은 글 하나 쓰는 데
+    # 전체 파일 재작성이 필요했다.
     post = {
-        'id': next_id,
         'board': board_id,
         'author': username,
         'title': title,
@@ -233,8 +227,7 @@ def write_post(username, board_id):
         'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'attachment': attachment,
     }
-    all_posts.append(post)
-    save_posts(all_posts)
+    get_store().add_post(post)
     rawprint(C_OK + "\n글이 등록되었습니다!\n" + RESET)
     rawinput("계속하려면 Enter를 누르세요.")
 
@@ -249,11 +242,13 @@ def main_menu(username):
         rawprint('\n')
         box_top(width, '메 인 메 뉴')
 
-        all_posts = load_posts()
+        # 게시판별 글 수는 저장소가 글을 쓰고 지울 때마다 갱신해 두는
+        # 카운터에서 한 번에 읽는다 - 글 목록을 훑지 않는다.
+        post_counts = get_store().board_counts()
         for i, board in enumerate(boards):
             board_name = board["name"]
             board_id = board["id"]
-            post_count = sum(1 for p in all_posts if p.get("board") == board_id)
+            post_count = post_counts.get(board_id, 0)
             box_line(format_board_entry(i + 1, board_name, board_id, post_count, width), width)
 
         box_bottom(width)
@@ -262,7 +257,7 @@ def main_menu(username):
         if unread > 0:
             mail_hint += C_ERR + f"({unread})" + RESET
         mail_hint += C_TITLE + "]" + RESET
-        hint = f"번호 선택 (게시판 ID 직접 입력도 가능)  {mail_hint}  [I:내정보]"
+        hint = f"번호 선택 (게시판 ID 직접 입력도 가능)  {mail_hint}  [S:검색] [I:내정보]"
         user_is_admin = is_admin(username)
         if user_is_admin:
             hint += C_TITLE + "  [A:관리자]" + RESET
@@ -277,6 +272,9 @@ def main_menu(username):
         if choice in ('i', '내정보', 'info'):
             edit_profile(username)
             continue
+        if choice in ('s', '검색', 'search'):
+            search_menu(username)
+            continue
         if user_is_admin and choice in ('a', '관리', 'admin'):
             admin.admin_menu(username)
             continue
@@ -300,10 +298,9 @@ def main_menu(username):
 
         board_id = board['id']
         board_type = board.get('type', 'normal')
-        posts = [p for p in load_posts() if p.get('board') == board_id]
 
         if board_type in ('normal', 'restricted'):
-            board_menu(username, board, posts)
+            board_menu(username, board)
         elif board_type == 'file':
             file_board.file_board_menu(username, board)
         elif board_type == 'internal':
@@ -317,26 +314,31 @@ def main_menu(username):
             rawinput("계속하려면 Enter를 누르세요.\n")
 
 
-def board_menu(username, board, posts):
+def board_menu(username, board):
     page = 0
     while True:
         try:
             width, height = get_screen_size()
             posts_per_page = max(1, height - 9)
+            # 화면에 보일 한 페이지만 저장소에서 가져온다. 매번 다시 가져오므로
+            # 글을 쓰거나 지운 뒤(다른 세션이 쓴 것 포함)에도 따로 새로고칠 필요가 없다.
+            current_posts, total = board_page(board['id'], page * posts_per_page, posts_per_page)
+            total_pages = max(1, (total + posts_per_page - 1) // posts_per_page)
+            if page >= total_pages:
+                # 마지막 페이지의 글이 지워져 페이지가 줄어든 경우
+                page = total_pages - 1
+                continue
             start = page * posts_per_page
-            end = start + posts_per_page
-            current_posts = posts[start:end]
 
             clear_screen()
             board_name = board['name']
             board_type = board.get('type', 'normal')
-            total_pages = max(1, (len(posts) + posts_per_page - 1) // posts_per_page)
 
             draw_top_bar(SITE_NAME, f"{username}  {now_str()}", width)
             rawprint('\n')
             box_top(width, f"{board_name} ({page + 1}/{total_pages})")
 
-            if not posts:
+            if not total:
                 box_line("(등록된 글이 없습니다)", width)
             else:
                 for i, post in enumerate(current_posts):
@@ -344,7 +346,7 @@ def board_menu(username, board, posts):
                     box_line(line, width)
 
             box_bottom(width)
-            hint = "[번호:읽기] [W:쓰기] [F:다음] [B:이전] [P:뒤로]"
+            hint = "[번호:읽기] [W:쓰기] [S:검색] [F:다음] [B:이전] [P:뒤로]"
             if board_type == 'restricted':
                 hint += "  (관리자 전용 게시판)"
             draw_footer(hint, width)
@@ -357,8 +359,9 @@ def board_menu(username, board, posts):
                     rawinput("계속하려면 Enter를 누르세요.\n")
                 else:
                     write_post(username, board['id'])
-                    posts = [p for p in load_posts() if p.get('board') == board['id']]
-            elif cmd in ('', 'f') and (page + 1) * posts_per_page < len(posts):
+            elif cmd == 's':
+                search_menu(username, board)
+            elif cmd in ('', 'f') and (page + 1) * posts_per_page < total:
                 page += 1
                 continue
             elif cmd == 'b' and page > 0:
@@ -369,9 +372,80 @@ def board_menu(username, board, posts):
             else:
                 try:
                     sel = int(cmd)
-                    if 1 <= sel <= len(posts):
-                        view_post(posts[sel - 1], username)
-                        posts = [p for p in load_posts() if p.get('board') == board['id']]
+                    if start < sel <= start + len(current_posts):
+                        selected = current_posts[sel - start - 1:sel - start]
+                    elif 1 <= sel <= total:
+                        # 다른 페이지의 번호를 바로 입력한 경우 그 한 건만 가져온다.
+                        selected = board_page(board['id'], sel - 1, 1)[0]
+                    else:
+                        selected = []
+                    if selected:
+                        view_post(selected[0], username)
+                    else:
+                        beep()
+                        rawprint(C_ERR + "잘못된 번호입니다.\n" + RESET)
+                except ValueError:
+                    beep()
+                    rawprint(C_ERR + "잘못된 명령입니다.\n" + RESET)
+        except KeyboardInterrupt:
+            break
+
+
+def search_menu(username, board=None):
+    """검색어가 들어간 글을 최신순으로 보여준다. board가 없으면 모든 게시판에서
+    찾는다. 목록처럼 한 페이지 몫만 저장소(검색 색인)에서 가져온다."""
+    rawprint('\n')
+    query = rawinput(C_TITLE + "검색어 : " + RESET).strip()
+    if not query:
+        return
+    board_id = board['id'] if board else None
+    scope = board['name'] if board else '전체 게시판'
+    page = 0
+    while True:
+        try:
+            width, height = get_screen_size()
+            per_page = max(1, height - 9)
+            results, total = get_store().search_posts(query, board_id, page * per_page, per_page)
+            if not total:
+                rawprint(C_ERR + f"'{query}'(으)로 찾은 글이 없습니다.\n" + RESET)
+                rawinput("계속하려면 Enter를 누르세요.\n")
+                return
+            total_pages = (total + per_page - 1) // per_page
+            if page >= total_pages:
+                page = total_pages - 1
+                continue
+            start = page * per_page
+
+            clear_screen()
+            draw_top_bar(SITE_NAME, f"{username}  {now_str()}", width)
+            rawprint('\n')
+            found = f"{total}건" if total < search.MAX_RESULTS else f"최근 {total}건"
+            box_top(width, f"{scope} 검색: {query} ({found}, {page + 1}/{total_pages})")
+            for i, post in enumerate(results):
+                where = '' if board else f"{C_DIM}[{post['board']}]{RESET} "
+                line = (f"{C_HILITE}{start + i + 1:>3}{RESET} {where}{C_TEXT}{post['title']}{RESET} "
+                        f"{C_DIM}/ {post['author']} / {post['date']}{RESET}")
+                box_line(line, width)
+            box_bottom(width)
+            draw_footer("[번호:읽기] [F:다음] [B:이전] [P:뒤로]", width)
+
+            cmd = command_input(C_TITLE + " > " + RESET).strip().lower()
+
+            if cmd in ('', 'f') and page + 1 < total_pages:
+                page += 1
+            elif cmd == 'b' and page > 0:
+                page -= 1
+            elif cmd == 'p':
+                break
+            else:
+                try:
+                    sel = int(cmd)
+                    if start < sel <= start + len(results):
+                        view_post(results[sel - start - 1], username)
+                    elif 1 <= sel <= total:
+                        selected = get_store().search_posts(query, board_id, sel - 1, 1)[0]
+                        if selected:
+                            view_post(selected[0], username)
                     else:
                         beep()
                         rawprint(C_ERR + "잘못된 번호입니다.\n" + RESET)
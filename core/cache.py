@@ -0,0 +1,174 @@
+"""JSON 파일 읽기 캐시 - 파일이 안 바뀌었으면 다시 파싱하지 않는다.
+
+메뉴는 command_input()을 도는 루프라서 한 바퀴마다(명령 하나, 잘못 친 키
+하나마다) 화면을 다시 그리면서 boards.json, 자료실 색인, 접속 통계, 쪽지함,
+게시판 글 수 파일을 통째로 다시 열어 json.load했다 - 아무것도 안 바뀌었어도.
+
+read_json()은 core.atomic.read_json()과 같은 모양인데, 파일의 (inode,
+mtime_ns, 크기)(core.journal.stat_key)가 지난번과 같으면 그때 파싱해 둔
+스냅샷을 그대로 쓴다. 파일 쓰기는 전부 임시 파일 + os.replace라
+(core.atomic) 다른 세션이 고치면 inode부터 달라져서 다음 읽기 때 다시
+파싱한다. stat을 먼저 하고 파일을 읽으므로, 그 사이에 바뀌었으면 다음 읽기에서
+키가 또 달라 보여 한 번 더 읽을 뿐 옛 내용이 남지는 않는다.
+
+스냅샷은 한 프로세스의 모든 호출자(in-process 모드에서는 모든 세션 스레드)가
+같이 쓰므로 절대 고치면 안 된다. 그래서 호출자에게는 스냅샷을 그대로 주지
+않고 쓰기 시 복사(copy-on-write) 뷰를 준다.
+
+  _CowDict/_CowList - dict/list 하위 클래스. 만들 때 맨 위 한 단계만 얕게
+                      복사하고(포인터 복사라 파싱보다 훨씬 싸다), 안에 든
+                      dict/list는 꺼낼 때 처음 한 번 그 단계만 다시 뷰로 바꿔
+                      넣는다. 그래서 users[uid]['is_admin'] = True처럼 안쪽을
+                      고쳐도 스냅샷은 그대로고, 안 건드린 부분은 복사하지
+                      않는다. dict/list 하위 클래스라 json.dump, isinstance,
+                      == 비교가 예전 그대로 된다.
+
+읽기 잠금 안에서 최신 내용을 다시 읽어 고치는 core.atomic.update_json()은
+캐시를 거치지 않는다(항상 파일에서 읽는다).
+"""
+import json
+import threading
+
+from core.journal import stat_key
+
+
+def _is_shared(value):
+    return type(value) is dict or type(value) is list
+
+
+def _view(value):
+    if type(value) is dict:
+        return _CowDict(value)
+    if type(value) is list:
+        return _CowList(value)
+    return value
+
+
+class _CowDict(dict):
+    """스냅샷 dict 하나의 쓰기 시 복사 뷰."""
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if _is_shared(value):
+            value = _view(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __iter__(self):
+        # 일부러 덮어쓴다 - dict(view)/{**view}는 __iter__가 dict 그대로면 안쪽
+        # 값을 __getitem__ 없이 바로 복사해서 스냅샷의 dict/list가 새어 나간다.
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def values(self):
+        self._unshare()
+        return dict.values(self)
+
+    def items(self):
+        self._unshare()
+        return dict.items(self)
+
+    def copy(self):
+        return _CowDict(self)
+
+    def _unshare(self):
+        for key, value in dict.items(self):
+            if _is_shared(value):
+                dict.__setitem__(self, key, _view(value))
+
+
+class _CowList(list):
+    """스냅샷 list 하나의 쓰기 시 복사 뷰."""
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = list.__getitem__(self, index)
+        if _is_shared(value):
+            value = _view(value)
+            list.__setitem__(self, index, value)
+        return value
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self[i]
+
+    def pop(self, index=-1):
+        value = self[index]
+        list.__delitem__(self, index)
+        return value
+
+    def copy(self):
+        return _CowList(self)
+
+
+class FileCache:
+    """경로 -> (stat 키, 파싱한 스냅샷)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0      # 다시 파싱하지 않고 스냅샷을 쓴 횟수(벤치마크용)
+        self.misses = 0    # 파일을 읽어 파싱한 횟수
+
+    def read_json(self, path, default_factory):
+        key = stat_key(path)
+        if key is None:
+            return default_factory()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return _view(entry[1])
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with self._lock:
+            self._entries[path] = (key, data)
+            self.misses += 1
+        return _view(data)
+
+    def forget(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = FileCache()
+
+
+def read_json(path, default_factory):
+    """core.atomic.read_json()과 같지만 파일이 안 바뀌었으면 다시 파싱하지 않는다.
+    돌려준 값은 고쳐도 된다(쓰기 시 복사 뷰)."""
+    return _cache.read_json(path, default_factory)
+
+
+def file_cache():
+    return _cache
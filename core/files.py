@@ -1,6 +1,6 @@
 import os
 import sys
-import json
+import uuid
 from datetime import datetime
 
 from bbsio.rawio import rawprint, rawinput, command_input
@@ -12,8 +12,8 @@ from bbsio.tui import (
 from bbsio.xfer.xmodem import XModemSender, XModemReceiver, XModemError
 from bbsio.xfer import zmodem_proc
 from core.profile import is_admin
+from core.storage import get_store
 
-INDEX_FILE = os.path.join('data', 'file_index.json')
 FILES_DIR = os.path.join('data', 'files')
 SITE_NAME = "M I N I - T E L"
 
@@ -29,21 +29,26 @@ def now_str():
 
 def _ensure_dirs():
     os.makedirs(FILES_DIR, exist_ok=True)
-    if not os.path.exists(INDEX_FILE):
-        with open(INDEX_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
 
 
 def load_index():
-    _ensure_dirs()
-    with open(INDEX_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return get_store().load_index()
 
 
 def save_index(entries):
+    get_store().save_index(entries)
+
+
+def _store_upload(safe_name, data):
+    """업로드 받은 데이터를 data/files/에 저장하고 저장 파일명을 반환한다.
+    예전엔 "{다음 id}_{파일명}"으로 저장했는데, 색인 등록 전에 id를 미리
+    계산하는 방식이라 두 세션이 동시에 올리면 같은 이름으로 서로 덮어쓸 수
+    있었다 - 글 첨부(_upload_attachment)처럼 무작위 접두어를 쓴다."""
     _ensure_dirs()
-    with open(INDEX_FILE, 'w', encoding='utf-8') as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
+    stored_name = f"{uuid.uuid4().hex[:12]}_{safe_name}"
+    with open(os.path.join(FILES_DIR, stored_name), 'wb') as f:
+        f.write(data)
+    return stored_name
 
 
 def _can_manage(username, entry):
@@ -189,8 +194,7 @@ def file_info_menu(username, entry):
                     continue
                 confirm = rawinput(C_ERR + "정말 삭제하시겠습니까? (Y/N): " + RESET).strip().upper()
                 if confirm == 'Y':
-                    entries = [e for e in load_index() if e['id'] != entry['id']]
-                    save_index(entries)
+                    get_store().delete_file_entry(entry['id'])
                     try:
                         os.remove(os.path.join(FILES_DIR, entry['stored_name']))
                     except OSError:
@@ -237,16 +241,8 @@ def upload_file(username):
         rawinput("계속하려면 Enter를 누르세요.\n")
         return
 
-    entries = load_index()
-    next_id = max((e.get('id', 0) for e in entries), default=0) + 1
-    stored_name = f"{next_id}_{safe_name}"
-
-    _ensure_dirs()
-    with open(os.path.join(FILES_DIR, stored_name), 'wb') as f:
-        f.write(data)
-
-    entries.append({
-        'id': next_id,
+    stored_name = _store_upload(safe_name, data)
+    get_store().add_file_entry({
         'filename': safe_name,
         'stored_name': stored_name,
         'description': description,
@@ -254,7 +250,6 @@ def upload_file(username):
         'size': len(data),
         'date': now_str(),
     })
-    save_index(entries)
 
     _log(f'{username} 업로드 완료: {safe_name} ({len(data)}바이트)')
     rawprint(C_OK + f"\n업로드가 완료되었습니다! ({len(data)}바이트)\n" + RESET)
@@ -291,16 +286,8 @@ def zmodem_upload(username):
         rawinput("계속하려면 Enter를 누르세요.\n")
         return
 
-    entries = load_index()
-    next_id = max((e.get('id', 0) for e in entries), default=0) + 1
-    stored_name = f"{next_id}_{safe_name}"
-
-    _ensure_dirs()
-    with open(os.path.join(FILES_DIR, stored_name), 'wb') as f:
-        f.write(data)
-
-    entries.append({
-        'id': next_id,
+    stored_name = _store_upload(safe_name, data)
+    get_store().add_file_entry({
         'filename': safe_name,
         'stored_name': stored_name,
         'description': description,
@@ -308,7 +295,6 @@ def zmodem_upload(username):
         'size': len(data),
         'date': now_str(),
     })
-    save_index(entries)
 
     _log(f'{username} ZMODEM 업로드 완료: {safe_name} ({len(data)}바이트)')
     rawprint(C_OK + f"\n업로드가 완료되었습니다! ({safe_name}, {len(data)}바이트)\n" + RESET)
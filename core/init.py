@@ -12,10 +12,6 @@ def initialize():
         with open("data/posts.json", "w", encoding="utf-8") as f:
             json.dump([], f, ensure_ascii=False, indent=2)
 
-    if not os.path.exists("data/messages.json"):
-        with open("data/messages.json", "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
-
     if not os.path.exists("data/login_banner.txt"):
         with open("data/login_banner.txt", "w", encoding="utf-8") as f:
             f.write("RETRO BBS\n\n")
@@ -35,5 +31,9 @@ def initialize():
         with open("data/file_index.json", "w", encoding="utf-8") as f:
             json.dump([], f, ensure_ascii=False, indent=2)
 
+    # 쪽지는 받는 사람별 쪽지함 파일(core/mailbox.py). 예전 data/messages.json은
+    # JSON 저장소가 처음 열릴 때 여기로 옮긴다.
+    os.makedirs("data/mail", exist_ok=True)
+    # 게시글 본문(글마다 <id>.txt) - core/postlog.py
     os.makedirs("data/posts", exist_ok=True)
     os.makedirs("data/files", exist_ok=True)
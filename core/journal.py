@@ -0,0 +1,188 @@
+"""추가 전용(append-only) 저널 + 스냅샷 방식 저장소의 공통 뼈대.
+
+예전엔 글 하나를 쓰거나 고칠 때마다 posts.json 전체를 다시 파싱하고
+indent=2로 통째로 다시 써야 했다 - 자료가 쌓일수록 한 줄짜리 답글 하나가
+수 MB 재작성이 됐다. 여기서는 데이터를 두 파일로 나눈다.
+
+  스냅샷(예: posts.json) - 마지막 압축 시점의 전체 상태. 형식은 예전 파일과
+                           같아서 기존 데이터를 그대로 스냅샷으로 쓴다.
+  저널(예: posts.log)    - 그 뒤의 변경 레코드를 한 줄에 JSON 하나씩 덧붙인다.
+
+쓰기는 레코드 한 줄 append라 O(레코드)이고, 읽는 쪽은 프로세스당 처음 한
+번만 스냅샷을 읽은 뒤로는 저널에서 "지난번에 읽은 위치 이후"만 따라 읽는다.
+저널이 충분히 길어지면 스냅샷을 새로 쓰고 저널을 비운다(압축).
+
+세션마다 bbs.py가 별도 프로세스로 뜨므로(telnet.py/dialup.py 참고) 여러
+프로세스가 같은 저널에 동시에 쓸 수 있다. 쓰기는 항상 fcntl 잠금을 잡고
+최신 상태로 따라잡은 다음에만 하고, 압축은 스냅샷과 저널을 os.replace로
+통째로 바꿔치기해서 읽는 쪽이 inode 변화로 알아챌 수 있게 한다.
+"""
+import os
+import sys
+import json
+import threading
+
+from core.atomic import FSYNC, locked, write_json, fsync_dir
+
+# 저널 레코드 수가 이 값과 살아있는 항목 수 중 큰 쪽을 넘으면 압축한다 -
+# 항목이 적을 땐 너무 자주 압축하지 않게, 많을 땐 저널이 스냅샷보다 커지기
+# 전에 정리되게 하는 기준.
+COMPACT_MIN_RECORDS = 500
+
+
+def stat_key(path):
+    """파일이 바뀌었는지 비교할 때 쓰는 (inode, mtime_ns, 크기). 없으면 None."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def encode_record(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class Journal:
+    """스냅샷 + 저널 파일 한 쌍을 메모리 상태로 유지한다. 하위 클래스는
+    _reset()/_apply()/_dump()/_live_count()를 구현한다."""
+
+    def __init__(self, snapshot_path, journal_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        # 같은 프로세스 안의 여러 스레드가 메모리 상태를 같이 쓰는 경우 대비
+        self._mutex = threading.RLock()
+        self._snapshot_key = False      # 아직 한 번도 안 읽음
+        self._journal_ino = None
+        self._offset = 0
+        self._records = 0
+
+    # --- 하위 클래스 구현부 ---------------------------------------------
+
+    def _empty_snapshot(self):
+        return []
+
+    def _reset(self, snapshot):
+        raise NotImplementedError
+
+    def _apply(self, record):
+        raise NotImplementedError
+
+    def _dump(self):
+        raise NotImplementedError
+
+    def _live_count(self):
+        raise NotImplementedError
+
+    # --- 읽기 ------------------------------------------------------------
+
+    def refresh(self):
+        """다른 프로세스가 그사이 덧붙인 레코드까지 메모리 상태에 반영한다.
+        바뀐 게 없으면 stat 두 번으로 끝난다."""
+        with self._mutex:
+            # 압축이 스냅샷 교체와 저널 교체 사이에 끼어들면 "옛 스냅샷 +
+            # 새 저널" 조합을 읽을 수 있다 - 다 읽은 뒤 스냅샷이 그사이
+            # 바뀌었으면 처음부터 다시 맞춘다.
+            while True:
+                key = stat_key(self.snapshot_path)
+                if key != self._snapshot_key:
+                    self._load_snapshot(key)
+                self._tail()
+                if stat_key(self.snapshot_path) == self._snapshot_key:
+                    return
+
+    def _load_snapshot(self, key):
+        if key is None:
+            data = self._empty_snapshot()
+        else:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self._reset(data)
+        self._snapshot_key = key
+        self._journal_ino = None
+        self._offset = 0
+        self._records = 0
+
+    def _tail(self):
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if self._journal_ino is not None and (
+                    st.st_ino != self._journal_ino or st.st_size < self._offset):
+                # 우리가 읽던 저널이 압축으로 교체됨 - 스냅샷부터 다시 읽는다.
+                self._load_snapshot(stat_key(self.snapshot_path))
+            self._journal_ino = st.st_ino
+            if st.st_size <= self._offset:
+                return
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+        # 다른 프로세스가 아직 쓰는 중인 마지막 줄(개행 전)은 다음 번에 읽는다.
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return
+        for line in chunk[:end].split(b'\n'):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 쓰는 도중 죽은 프로세스가 남긴 잘린 줄 - 그 한 줄만 버린다.
+                print(f'[journal] {self.journal_path}: 손상된 레코드 무시', file=sys.stderr)
+                continue
+            self._apply(record)
+            self._records += 1
+        self._offset += end + 1
+
+    # --- 쓰기 ------------------------------------------------------------
+
+    def transact(self, fn):
+        """잠금을 잡고 최신 상태로 따라잡은 뒤 fn()을 호출한다. fn은
+        (덧붙일 레코드 목록, 반환값)을 돌려준다 - 레코드를 만드는 시점에
+        메모리 상태가 항상 최신이라 id 할당 등이 다른 프로세스와 겹치지 않는다."""
+        with self._mutex, locked(self.journal_path):
+            self.refresh()
+            records, result = fn()
+            if records:
+                self._append(records)
+                self._maybe_compact()
+            return result
+
+    def _append(self, records):
+        payload = b''.join(encode_record(r) for r in records)
+        fd = os.open(self.journal_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size > 0 and os.pread(fd, 1, size - 1) != b'\n':
+                # 이전 쓰기가 줄 중간에 죽었으면 새 레코드가 그 뒤에 붙어
+                # 같이 깨지지 않도록 줄을 먼저 끊어준다.
+                payload = b'\n' + payload
+            view = memoryview(payload)
+            while view:
+                n = os.write(fd, view)
+                view = view[n:]
+            if FSYNC:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        # 방금 쓴 레코드도 다른 프로세스가 쓴 것과 똑같은 경로로 반영한다.
+        self._tail()
+
+    def _maybe_compact(self):
+        if self._records > max(COMPACT_MIN_RECORDS, self._live_count()):
+            self.compact()
+
+    def compact(self):
+        """현재 상태로 스냅샷을 새로 쓰고 저널을 비운다. 잠금을 잡은
+        상태(transact 안)에서만 불러야 한다."""
+        write_json(self.snapshot_path, self._dump())
+        journal_tmp = self.journal_path + '.tmp'
+        open(journal_tmp, 'wb').close()
+        os.replace(journal_tmp, self.journal_path)
+        fsync_dir(self.journal_path)
+        self._snapshot_key = stat_key(self.snapshot_path)
+        self._journal_ino = os.stat(self.journal_path).st_ino
+        self._offset = 0
+        self._records = 0
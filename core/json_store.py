@@ -0,0 +1,193 @@
+"""JSON 파일 백엔드 - data/ 아래 데이터 종류별 JSON 파일 하나씩.
+
+게시글만은 posts.json 스냅샷 + posts.log 저널(core/postlog.py, 글 머리만)과
+글마다 본문 파일 하나(data/posts/<id>.txt), 게시판별 글 수 카운터
+(board_counts.json)이고, 쪽지는 받는 사람별 쪽지함 파일(data/mail/,
+core/mailbox.py)이고, 나머지는 예전처럼 파일 하나를 통째로 읽고 쓴다. 쓰기는 전부 core.atomic을 거친다 - 한 건을 고치는 연산은 잠금 안에서
+최신 내용을 다시 읽어 고치므로 동시에 접속한 다른 세션의 변경을 덮어쓰지
+않는다. 통째로 읽는 쪽(load_users/load_index/load_stats)은 core.cache를 거쳐서
+파일이 안 바뀌었으면 다시 파싱하지 않는다. 게시글 검색 색인은 다시 만들 수
+있는 파생 데이터라 data/search.sqlite3에 따로 둔다(core/search.py).
+"""
+import os
+
+from core.atomic import locked, write_json, update_json
+from core.cache import read_json
+from core.journal import stat_key
+from core.postlog import PostLog
+from core.mailbox import Mailboxes
+from core.search import SearchIndex
+
+USER_FILE = os.path.join('data', 'users.json')
+POST_FILE = os.path.join('data', 'posts.json')
+POST_JOURNAL = os.path.join('data', 'posts.log')
+POST_BODY_DIR = os.path.join('data', 'posts')
+BOARD_COUNT_FILE = os.path.join('data', 'board_counts.json')
+SEARCH_INDEX_FILE = os.path.join('data', 'search.sqlite3')
+# 예전 한 파일짜리 쪽지 - 있으면 처음 한 번 MAIL_DIR로 옮긴다
+MAIL_FILE = os.path.join('data', 'messages.json')
+MAIL_DIR = os.path.join('data', 'mail')
+MAIL_SEQ_FILE = os.path.join('data', 'mail_seq.json')
+INDEX_FILE = os.path.join('data', 'file_index.json')
+STATS_FILE = os.path.join('data', 'stats.json')
+
+
+def _default_stats():
+    return {'total_visits': 0, 'last_visit_date': '', 'today_visits': 0}
+
+
+def _save_json(path, data):
+    with locked(path):
+        write_json(path, data)
+
+
+def _next_id(items):
+    return max((item.get('id', 0) for item in items), default=0) + 1
+
+
+class JsonStore:
+    def __init__(self):
+        self.posts = PostLog(POST_FILE, POST_JOURNAL, POST_BODY_DIR, BOARD_COUNT_FILE)
+        self.posts.migrate()
+        self.search = SearchIndex(SEARCH_INDEX_FILE)
+        self.search.ensure_built(self.posts.all_posts)
+        self.mail = Mailboxes(MAIL_DIR, MAIL_SEQ_FILE)
+        self.mail.migrate(MAIL_FILE)
+
+    # --- 회원 ------------------------------------------------------------
+
+    def load_users(self):
+        return read_json(USER_FILE, dict)
+
+    def users_version(self):
+        # 쓰기는 전부 임시 파일 + os.replace라 바뀌면 inode부터 달라진다
+        return stat_key(USER_FILE)
+
+    def save_users(self, users):
+        _save_json(USER_FILE, users)
+
+    def put_user(self, user_id, info):
+        def _put(users):
+            users[user_id] = info
+        update_json(USER_FILE, dict, _put)
+
+    def delete_user(self, user_id):
+        def _delete(users):
+            users.pop(user_id, None)
+        update_json(USER_FILE, dict, _delete)
+
+    # --- 게시글 ----------------------------------------------------------
+
+    def load_posts(self):
+        return self.posts.all_posts()
+
+    def save_posts(self, posts):
+        self.posts.replace_all(posts)
+        self.rebuild_search_index()
+
+    def get_post(self, post_id):
+        return self.posts.get(post_id)
+
+    def post_body(self, post_id):
+        return self.posts.body(post_id)
+
+    def board_posts(self, board_id):
+        return self.posts.board_posts(board_id)
+
+    def board_page(self, board_id, offset, limit):
+        return self.posts.board_page(board_id, offset, limit)
+
+    def board_count(self, board_id):
+        return self.posts.board_counts().get(board_id, 0)
+
+    def board_counts(self):
+        return self.posts.board_counts()
+
+    def check_board_counts(self, repair=False):
+        return self.posts.check_counts(repair)
+
+    def add_post(self, post):
+        post_id = self.posts.add(post)
+        self.search.add(post)
+        return post_id
+
+    def update_post(self, post):
+        updated = self.posts.update(post)
+        if updated:
+            if 'content' not in post:
+                post = dict(post, content=self.posts.body(post['id']))
+            self.search.add(post)
+        return updated
+
+    def delete_post(self, post_id):
+        deleted = self.posts.delete(post_id)
+        if deleted:
+            self.search.remove(post_id)
+        return deleted
+
+    def search_posts(self, query, board_id, offset, limit):
+        ids, total = self.search.search(query, board_id, offset, limit)
+        posts = [self.posts.get(post_id) for post_id in ids]
+        return [p for p in posts if p is not None], total
+
+    def rebuild_search_index(self):
+        posts = self.posts.all_posts()
+        self.search.rebuild(posts)
+        return len(posts)
+
+    # --- 쪽지 ------------------------------------------------------------
+
+    def load_messages(self):
+        return self.mail.load_all()
+
+    def save_messages(self, messages):
+        self.mail.replace_all(messages)
+
+    def inbox(self, username):
+        return self.mail.inbox(username)
+
+    def inbox_page(self, username, offset, limit):
+        return self.mail.inbox_page(username, offset, limit)
+
+    def unread_count(self, username):
+        return self.mail.unread_count(username)
+
+    def add_message(self, message):
+        return self.mail.add(message)
+
+    def mark_read(self, username, message_id):
+        self.mail.mark_read(username, message_id)
+
+    def delete_message(self, username, message_id):
+        self.mail.delete(username, message_id)
+
+    # --- 자료실 색인 -----------------------------------------------------
+
+    def load_index(self):
+        return read_json(INDEX_FILE, list)
+
+    def save_index(self, entries):
+        _save_json(INDEX_FILE, entries)
+
+    def add_file_entry(self, entry):
+        def _add(entries):
+            entry['id'] = _next_id(entries)
+            entries.append(entry)
+            return entry['id']
+        return update_json(INDEX_FILE, list, _add)
+
+    def delete_file_entry(self, entry_id):
+        def _delete(entries):
+            entries[:] = [e for e in entries if e['id'] != entry_id]
+        update_json(INDEX_FILE, list, _delete)
+
+    # --- 접속 통계 -------------------------------------------------------
+
+    def load_stats(self):
+        return read_json(STATS_FILE, _default_stats)
+
+    def save_stats(self, stats):
+        _save_json(STATS_FILE, stats)
+
+    def update_stats(self, fn):
+        return update_json(STATS_FILE, _default_stats, fn)
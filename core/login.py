@@ -14,7 +14,7 @@ from core.board import main_menu
 from core import stats as stats_mod
 from core import mail
 from core.profile import (
-    load_users, save_users, collect_profile, show_user_info,
+    load_users, put_user, collect_profile, show_user_info, user_directory,
 )
 
 QUOTES_FILE = os.path.join('data', 'quotes.txt')
@@ -51,7 +51,7 @@ def draw_splash(visit_stats=None, quote=''):
     rawprint('\n')
 
     if visit_stats is not None:
-        member_count = len(load_users())
+        member_count = user_directory().count()
         info = (f"총 회원 {member_count}명  |  오늘 접속 {visit_stats.get('today_visits', 0)}회"
                 f"  |  누적 접속 {visit_stats.get('total_visits', 0)}회")
         rawprint(C_DIM + pad(info, width, 'center') + RESET + '\n')
@@ -131,7 +131,7 @@ def login_prompt(users, session_state):
             last_login = user_info.get('last_login')
             now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             users[user_id]['last_login'] = now
-            save_users(users)
+            put_user(user_id, users[user_id])
 
             width = _draw_minimal_header()
             box_top(width, '로그인 성공')
@@ -234,7 +234,7 @@ def register(users):
         else:
             rawprint(C_ERR + "잘못된 입력입니다. Y, E 또는 N 중에서 선택해 주세요.\n" + RESET)
 
-    save_users(users)
+    put_user(username, users[username])
     rawprint(C_OK + "\n회원가입이 완료되었습니다. 환영합니다!\n" + RESET)
     rawinput("계속하려면 Enter를 누르세요.")
     return username
@@ -1,5 +1,3 @@
-import os
-import json
 from datetime import datetime
 
 from bbsio.rawio import rawprint, rawinput, command_input, multiline_input
@@ -8,9 +6,9 @@ from bbsio.tui import (
     clear_screen, draw_top_bar, draw_footer,
     box_top, box_bottom, box_line, box_sep, get_screen_size,
 )
+from core.storage import get_store
+from core.profile import user_directory
 
-MAIL_FILE = os.path.join('data', 'messages.json')
-USER_FILE = os.path.join('data', 'users.json')
 SITE_NAME = "M I N I - T E L"
 
 
@@ -18,43 +16,26 @@ def now_str():
     return datetime.now().strftime('%y/%m/%d %H:%M')
 
 
-def _load_users():
-    # core.login의 load_users()를 그대로 쓰면 core.board -> core.login ->
-    # core.board 순환 임포트가 생겨서, 여기서는 users.json을 직접 읽는다.
-    if not os.path.exists(USER_FILE):
-        return {}
-    with open(USER_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
 def load_messages():
-    if not os.path.exists(MAIL_FILE):
-        return []
-    with open(MAIL_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return get_store().load_messages()
 
 
 def save_messages(messages):
-    with open(MAIL_FILE, 'w', encoding='utf-8') as f:
-        json.dump(messages, f, ensure_ascii=False, indent=2)
+    get_store().save_messages(messages)
 
 
 def unread_count(username):
-    return sum(1 for m in load_messages() if m['to'] == username and not m['read'])
+    return get_store().unread_count(username)
 
 
 def send_message(sender, recipient, content):
-    messages = load_messages()
-    next_id = max((m['id'] for m in messages), default=0) + 1
-    messages.append({
-        'id': next_id,
+    get_store().add_message({
         'from': sender,
         'to': recipient,
         'content': content,
         'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'read': False,
     })
-    save_messages(messages)
 
 
 def mail_menu(username):
@@ -64,19 +45,22 @@ def mail_menu(username):
 
     while True:
         try:
-            clear_screen()
-            draw_top_bar(SITE_NAME + " 쪽지함", f"{username}  {now_str()}", width)
-            rawprint('\n')
-
-            inbox = [m for m in load_messages() if m['to'] == username]
-            inbox.sort(key=lambda m: m['id'], reverse=True)
-            total_pages = max(1, (len(inbox) + messages_per_page - 1) // messages_per_page)
+            # 예전엔 매번 쪽지함 전체를 가져와 잘랐는데, 화면에 보일 한 페이지만
+            # 가져온다(board_menu와 같은 방식).
             start = page * messages_per_page
+            current, total = get_store().inbox_page(username, start, messages_per_page)
+            total_pages = max(1, (total + messages_per_page - 1) // messages_per_page)
+            if page >= total_pages:
+                # 마지막 페이지의 쪽지를 지워 페이지가 줄어든 경우
+                page = total_pages - 1
+                continue
             end = start + messages_per_page
-            current = inbox[start:end]
 
+            clear_screen()
+            draw_top_bar(SITE_NAME + " 쪽지함", f"{username}  {now_str()}", width)
+            rawprint('\n')
             box_top(width, f"받은 쪽지함 ({page + 1}/{total_pages})")
-            if not inbox:
+            if not total:
                 box_line("(받은 쪽지가 없습니다)", width)
             else:
                 for i, m in enumerate(current):
@@ -94,15 +78,17 @@ def mail_menu(username):
                 break
             elif cmd == 'w':
                 compose_mail(username)
-            elif cmd in ('', 'f') and end < len(inbox):
+            elif cmd in ('', 'f') and end < total:
                 page += 1
             elif cmd == 'b' and page > 0:
                 page -= 1
             else:
                 try:
                     sel = int(cmd)
-                    if 1 <= sel <= len(inbox):
-                        view_mail(username, inbox[sel - 1])
+                    if start < sel <= start + len(current):
+                        view_mail(username, current[sel - 1 - start])
+                    elif 1 <= sel <= total:
+                        view_mail(username, get_store().inbox_page(username, sel - 1, 1)[0][0])
                     else:
                         rawprint(C_ERR + "잘못된 번호입니다.\n" + RESET)
                         rawinput("계속하려면 Enter를 누르세요.\n")
@@ -116,11 +102,7 @@ def mail_menu(username):
 def view_mail(username, msg):
     width, _ = get_screen_size()
     if not msg['read']:
-        messages = load_messages()
-        for m in messages:
-            if m['id'] == msg['id']:
-                m['read'] = True
-        save_messages(messages)
+        get_store().mark_read(username, msg['id'])
 
     clear_screen()
     draw_top_bar(SITE_NAME + " 쪽지 읽기", now_str(), width)
@@ -136,8 +118,7 @@ def view_mail(username, msg):
 
     cmd = command_input(C_TITLE + " > " + RESET).strip().lower()
     if cmd == 'd':
-        messages = [m for m in load_messages() if m['id'] != msg['id']]
-        save_messages(messages)
+        get_store().delete_message(username, msg['id'])
         rawprint(C_OK + "쪽지를 삭제했습니다.\n" + RESET)
         rawinput("계속하려면 Enter를 누르세요.\n")
 
@@ -151,8 +132,7 @@ def compose_mail(sender):
     recipient = rawinput(C_TITLE + "받는 사람 ID : " + RESET).strip()
     if not recipient:
         return
-    users = _load_users()
-    if recipient not in users:
+    if recipient not in user_directory():
         rawprint(C_ERR + "존재하지 않는 아이디입니다.\n" + RESET)
         rawinput("계속하려면 Enter를 누르세요.\n")
         return
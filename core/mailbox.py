@@ -0,0 +1,151 @@
+"""쪽지 저장소(JSON 백엔드) - 받는 사람별 쪽지함 파일.
+
+예전엔 모든 쪽지가 data/messages.json 한 파일에 있어서, 메인 메뉴를 다시 그릴
+때마다(안 읽은 쪽지 수 표시), 로그인 직후, 쪽지함 화면의 매 루프마다 BBS
+전체의 쪽지를 읽어 받는 사람으로 거르고 정렬했다 - 쪽지가 쌓일수록 내 쪽지가
+없어도 느려졌다. 여기서는 받는 사람마다 파일을 나눈다.
+
+  <directory>/<받는 사람>.json - {"unread": 안 읽은 수, "messages": [...]}
+                                 messages는 id 오름차순
+  seq_path(예: mail_seq.json)  - {"last_id": 마지막으로 준 쪽지 id}
+
+안 읽은 수는 쪽지를 넣고(add), 읽고(mark_read), 지울 때(delete) 같은 파일 잠금
+안에서 함께 고치므로, 쪽지 표시(unread_count)와 쪽지함 한 페이지(inbox_page)는
+그 사람의 쪽지함 파일 하나만 읽는다. 쪽지 id는 쪽지함이 나뉘어도 BBS 전체에서
+겹치지 않게 seq_path에서 하나씩 받는다(SQLite로 옮길 때 그대로 기본 키가 된다).
+
+예전 messages.json이 남아 있으면 처음 한 번 받는 사람별로 나눠 옮기고
+messages.json.migrated로 이름을 바꿔 둔다(migrate).
+"""
+import os
+from urllib.parse import quote, unquote
+
+from core.atomic import locked, read_json, write_json, update_json
+from core import cache
+
+
+def _empty_mailbox():
+    return {'unread': 0, 'messages': []}
+
+
+def _empty_seq():
+    return {'last_id': 0}
+
+
+class Mailboxes:
+    def __init__(self, directory, seq_path):
+        self.directory = directory
+        self.seq_path = seq_path
+
+    def _path(self, username):
+        # 아이디는 영문/숫자지만 '/' 같은 문자가 들어와도 파일 경로를 벗어나지
+        # 않게 인코딩해서 파일 이름으로 쓴다.
+        return os.path.join(self.directory, quote(username, safe='') + '.json')
+
+    def _read(self, username):
+        return cache.read_json(self._path(username), _empty_mailbox)
+
+    def _update(self, username, fn):
+        os.makedirs(self.directory, exist_ok=True)
+        return update_json(self._path(username), _empty_mailbox, fn)
+
+    # --- 읽기 ------------------------------------------------------------
+
+    def inbox(self, username):
+        """받은 쪽지 전체, 최신순."""
+        return self._read(username)['messages'][::-1]
+
+    def inbox_page(self, username, offset, limit):
+        """최신순 offset번째(0부터)부터 limit개와 받은 쪽지 수."""
+        messages = self._read(username)['messages']
+        total = len(messages)
+        end = max(0, total - offset)
+        start = max(0, end - limit)
+        return messages[start:end][::-1], total
+
+    def unread_count(self, username):
+        return self._read(username)['unread']
+
+    def load_all(self):
+        """모든 쪽지함의 쪽지, id 오름차순(예전 messages.json 형식)."""
+        messages = []
+        for username in self._recipients():
+            messages.extend(self._read(username)['messages'])
+        messages.sort(key=lambda m: m['id'])
+        return messages
+
+    def _recipients(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # '.'으로 시작하는 아이디의 쪽지함도 '.'으로 시작하므로 걸러내지 않는다 -
+        # 쓰기 임시 파일(.<이름>.json.XXXX)과 잠금 파일은 .json으로 끝나지 않는다.
+        return [unquote(n[:-len('.json')]) for n in names if n.endswith('.json')]
+
+    # --- 쓰기 ------------------------------------------------------------
+
+    def add(self, message):
+        def _next(seq):
+            seq['last_id'] += 1
+            return seq['last_id']
+        message['id'] = update_json(self.seq_path, _empty_seq, _next)
+
+        def _add(box):
+            box['messages'].append(message)
+            if not message.get('read'):
+                box['unread'] += 1
+        self._update(message['to'], _add)
+        return message['id']
+
+    def mark_read(self, username, message_id):
+        def _mark(box):
+            for m in box['messages']:
+                if m['id'] == message_id and not m.get('read'):
+                    m['read'] = True
+                    box['unread'] -= 1
+        self._update(username, _mark)
+
+    def delete(self, username, message_id):
+        def _delete(box):
+            kept = []
+            for m in box['messages']:
+                if m['id'] == message_id:
+                    if not m.get('read'):
+                        box['unread'] -= 1
+                else:
+                    kept.append(m)
+            box['messages'] = kept
+        self._update(username, _delete)
+
+    def replace_all(self, messages):
+        """쪽지 전체를 통째로 바꾼다(예전 save_messages 호환, 옮기기용)."""
+        os.makedirs(self.directory, exist_ok=True)
+        boxes = {}
+        for m in sorted(messages, key=lambda m: m['id']):
+            box = boxes.setdefault(m['to'], _empty_mailbox())
+            box['messages'].append(m)
+            if not m.get('read'):
+                box['unread'] += 1
+        with locked(self.seq_path):
+            for username in set(self._recipients()) - set(boxes):
+                with locked(self._path(username)):
+                    os.unlink(self._path(username))
+            for username, box in boxes.items():
+                with locked(self._path(username)):
+                    write_json(self._path(username), box)
+            last_id = max((m['id'] for m in messages), default=0)
+            seq = read_json(self.seq_path, _empty_seq)
+            write_json(self.seq_path, {'last_id': max(seq['last_id'], last_id)})
+
+    def migrate(self, legacy_path):
+        """예전 한 파일짜리 쪽지(legacy_path)가 있으면 쪽지함으로 나눠 옮긴다."""
+        if not os.path.exists(legacy_path):
+            return False
+        with locked(legacy_path):
+            # 다른 세션이 먼저 옮겼을 수 있다
+            if not os.path.exists(legacy_path):
+                return False
+            self.replace_all(read_json(legacy_path, list))
+            os.replace(legacy_path, legacy_path + '.migrated')
+        return True
@@ -0,0 +1,318 @@
+"""게시글 저장소 - posts.json 스냅샷 + posts.log 저널 위의 메모리 색인.
+
+저널 레코드는 세 종류뿐이다.
+  {"op": "put", "post": {...}}  - 새 글이거나 수정된 글 전체
+  {"op": "del", "id": 3}        - 삭제
+  {"op": "seq", "last_id": 7}   - 지금까지 준 가장 큰 글 id(압축 직후에만)
+같은 id로 put이 다시 오면 그 글을 통째로 교체한다(수정). 색인은 id -> 글,
+게시판 id -> (오름차순) 글 id 목록 두 가지를 유지한다.
+
+새 글 id는 지금까지 본 가장 큰 id 다음이다. 압축하면 지운 글의 put/del이
+없어져서 맨 끝 글을 지운 뒤면 그 id를 다시 주게 된다 - 목록이나 검색 색인에서
+본 id가 다른 글을 가리키지 않도록 압축 뒤 새 저널 첫 줄에 seq를 남긴다.
+
+게시판별 글 수는 따로 작은 카운터 파일(counts_path, 예: board_counts.json)에도
+유지한다. 메인 메뉴는 게시판 목록만 그리면 되는데, 글 수를 알자고 세션마다
+스냅샷+저널 전체를 읽어 색인을 만들 필요가 없게 하려는 것이다. 카운터는
+글을 쓰거나 지울 때 저널과 같은 잠금 안에서 증감분만 반영하고, 어긋났을
+때는 check_counts()로 찾아 다시 세어 고친다(tools/check_board_counts.py).
+
+스냅샷과 저널에는 글 머리(id, 게시판, 글쓴이, 제목, 날짜, 첨부)만 두고
+본문은 글마다 body_dir/<id>.txt 파일 하나에 따로 둔다. 예전엔 본문이 글 안에
+같이 있어서 게시판 목록 한 페이지를 그리려고 해도 세션마다 모든 게시판의
+모든 글 본문까지 파싱해 메모리에 올렸다. 이제 목록/글 수는 글 머리만 보고,
+본문은 글을 읽을 때(body) 그 글 하나만 읽는다. 본문 파일은 저널 레코드보다
+먼저 쓰고(글 머리가 없는 본문을 가리키는 일이 없게) 글을 지울 때는 저널
+다음에 지운다 - 그 사이에 죽으면 주인 없는 본문 파일만 남는다.
+
+본문이 글 안에 있는 예전 posts.json은 migrate()가 한 번 본문을 꺼내 파일로
+쓰고 스냅샷을 글 머리만으로 다시 쓴다(body_dir의 표시 파일로 끝났는지 안다).
+"""
+import bisect
+import os
+
+from core.atomic import FSYNC, locked, read_json, write_json, write_text
+from core import cache
+from core.journal import Journal
+
+# 없는 글의 "게시판" 자리 표시 - board가 None인 글과 구분하려고 쓴다.
+_MISSING = object()
+
+# body_dir 안의 표시 파일 - 있으면 본문 옮기기(migrate)가 끝난 것
+MIGRATED_MARKER = '.split'
+
+
+def _split(post):
+    """글을 (본문을 뺀 글 머리, 본문 또는 None)으로 나눈다."""
+    header = dict(post)
+    return header, header.pop('content', None)
+
+
+class PostLog(Journal):
+    def __init__(self, snapshot_path, journal_path, body_dir, counts_path=None):
+        super().__init__(snapshot_path, journal_path)
+        self.body_dir = body_dir
+        self.counts_path = counts_path
+
+    def _body_path(self, post_id):
+        return os.path.join(self.body_dir, f'{post_id}.txt')
+
+    def _write_body(self, post_id, content, sync=None):
+        os.makedirs(self.body_dir, exist_ok=True)
+        write_text(self._body_path(post_id), content or '', sync)
+
+    def _remove_body(self, post_id):
+        try:
+            os.unlink(self._body_path(post_id))
+        except FileNotFoundError:
+            pass
+
+    def _reset(self, snapshot):
+        self._posts = {}
+        self._by_board = {}
+        self._max_id = 0
+        for post in snapshot:
+            self._put(post)
+
+    def _apply(self, record):
+        op = record.get('op')
+        if op == 'put':
+            self._put(record['post'])
+        elif op == 'del':
+            self._del(record['id'])
+        elif op == 'seq':
+            self._max_id = max(self._max_id, record['last_id'])
+
+    def _dump(self):
+        return list(self._posts.values())
+
+    def _live_count(self):
+        return len(self._posts)
+
+    def _put(self, post):
+        post_id = post.get('id', 0)
+        old = self._posts.get(post_id)
+        if old is not None and old.get('board') != post.get('board'):
+            self._unindex(old)
+        self._posts[post_id] = post
+        ids = self._by_board.setdefault(post.get('board'), [])
+        i = bisect.bisect_left(ids, post_id)
+        if i == len(ids) or ids[i] != post_id:
+            ids.insert(i, post_id)
+        self._max_id = max(self._max_id, post_id)
+
+    def _del(self, post_id):
+        old = self._posts.pop(post_id, None)
+        if old is not None:
+            self._unindex(old)
+
+    def _append(self, records):
+        # 증감분은 레코드를 반영하기 "전" 상태를 기준으로 계산해야 한다 -
+        # 수정으로 게시판이 바뀐 글은 옛 게시판에서 빼고 새 게시판에 더한다.
+        deltas = self._count_deltas(records) if self.counts_path else None
+        super()._append(records)
+        if deltas:
+            # 저널이 원본이라 저널을 먼저 쓰고 카운터를 나중에 고친다. 그 사이에
+            # 죽으면 카운터만 어긋나고, check_counts(repair=True)로 복구된다.
+            counts = read_json(self.counts_path, dict)
+            for board_id, delta in deltas.items():
+                counts[board_id] = counts.get(board_id, 0) + delta
+            write_json(self.counts_path, counts)
+
+    def _count_deltas(self, records):
+        boards = {}     # 이번 레코드 묶음에서 이미 다룬 글 id -> 그 뒤의 게시판
+        deltas = {}
+        for record in records:
+            if record.get('op') == 'put':
+                post_id = record['post'].get('id', 0)
+                new_board = record['post'].get('board')
+            elif record.get('op') == 'del':
+                post_id = record['id']
+                new_board = _MISSING
+            else:
+                continue
+            if post_id in boards:
+                old_board = boards[post_id]
+            else:
+                old = self._posts.get(post_id)
+                old_board = old.get('board') if old is not None else _MISSING
+            boards[post_id] = new_board
+            if old_board == new_board:
+                continue
+            if old_board is not _MISSING:
+                deltas[old_board] = deltas.get(old_board, 0) - 1
+            if new_board is not _MISSING:
+                deltas[new_board] = deltas.get(new_board, 0) + 1
+        return {b: d for b, d in deltas.items() if d}
+
+    def compact(self):
+        max_id = self._max_id
+        super().compact()
+        if max_id > max(self._posts, default=0):
+            # 지운 글의 id가 스냅샷에서 사라졌다 - 다시 주지 않게 남겨 둔다
+            super()._append([{'op': 'seq', 'last_id': max_id}])
+
+    def _unindex(self, post):
+        ids = self._by_board.get(post.get('board'), [])
+        i = bisect.bisect_left(ids, post.get('id', 0))
+        if i < len(ids) and ids[i] == post.get('id', 0):
+            del ids[i]
+
+    # --- 조회 ------------------------------------------------------------
+    # 색인 안의 dict를 그대로 내주면 호출자가 고친 내용이 저장도 안 된 채
+    # 색인에 섞여버린다 - 항상 얕은 복사본을 돌려준다. all_posts() 말고는 전부
+    # 글 머리만 돌려준다(본문은 body()).
+
+    def all_posts(self):
+        """본문까지 붙인 모든 글(예전 load_posts 호환 - 옮기기 도구용, 본문
+        파일을 전부 읽으므로 메뉴에서는 쓰지 않는다)."""
+        with self._mutex:
+            self.refresh()
+            posts = [dict(p) for p in self._posts.values()]
+        for post in posts:
+            if 'content' not in post:
+                post['content'] = self.body(post.get('id', 0)) or ''
+        return posts
+
+    def body(self, post_id):
+        """글 하나의 본문. 본문 파일이 없으면 None."""
+        try:
+            with open(self._body_path(post_id), 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get(self, post_id):
+        with self._mutex:
+            self.refresh()
+            post = self._posts.get(post_id)
+            return dict(post) if post is not None else None
+
+    def board_posts(self, board_id):
+        with self._mutex:
+            self.refresh()
+            return [dict(self._posts[i]) for i in self._by_board.get(board_id, [])]
+
+    def board_page(self, board_id, offset, limit):
+        """게시판의 글 offset번째부터 limit개와 그 게시판의 전체 글 수.
+        게시판별 id 목록에서 필요한 구간만 잘라 그 글들만 복사한다."""
+        with self._mutex:
+            self.refresh()
+            ids = self._by_board.get(board_id, [])
+            return [dict(self._posts[i]) for i in ids[offset:offset + limit]], len(ids)
+
+    def last_id(self):
+        """지금까지 준 가장 큰 글 id(지운 글 포함 - 압축 뒤에도 seq 레코드로 남는다)."""
+        with self._mutex:
+            self.refresh()
+            return self._max_id
+
+    def board_count(self, board_id):
+        with self._mutex:
+            self.refresh()
+            return len(self._by_board.get(board_id, ()))
+
+    def board_counts(self):
+        """카운터 파일에서 게시판 id -> 글 수를 읽는다. 스냅샷/저널은 읽지
+        않으므로 글이 아무리 많아도 비용이 같다. 카운터 파일이 아직 없으면
+        (이 기능 이전의 데이터) 한 번 다시 세어 만든다."""
+        if not os.path.exists(self.counts_path):
+            self.check_counts(repair=True)
+        return cache.read_json(self.counts_path, dict)
+
+    def check_counts(self, repair=False):
+        """카운터 파일을 실제 글 색인과 비교해 어긋난 게시판을
+        {게시판 id: (카운터 값, 실제 값)}으로 반환한다. repair면 실제 값으로
+        카운터 파일을 다시 쓴다."""
+        with self._mutex, locked(self.journal_path):
+            self.refresh()
+            actual = {board_id: len(ids) for board_id, ids in self._by_board.items() if ids}
+            stored = read_json(self.counts_path, dict)
+            mismatched = {}
+            for board_id in set(actual) | set(stored):
+                if stored.get(board_id, 0) != actual.get(board_id, 0):
+                    mismatched[board_id] = (stored.get(board_id), actual.get(board_id, 0))
+            if repair and (mismatched or not os.path.exists(self.counts_path)):
+                write_json(self.counts_path, actual)
+            return mismatched
+
+    # --- 변경 ------------------------------------------------------------
+
+    def add(self, post):
+        """post에 새 id를 붙여 저장하고 그 id를 반환한다."""
+        def _do():
+            header, content = _split(post)
+            header['id'] = self._max_id + 1
+            self._write_body(header['id'], content)
+            return [{'op': 'put', 'post': header}], header['id']
+        post_id = self.transact(_do)
+        post['id'] = post_id
+        return post_id
+
+    def update(self, post):
+        """글 머리를 바꾼다. post에 'content'가 있으면 본문도 바꾼다."""
+        def _do():
+            if post.get('id') not in self._posts:
+                return [], False
+            header, content = _split(post)
+            if 'content' in post:
+                self._write_body(header['id'], content)
+            return [{'op': 'put', 'post': header}], True
+        return self.transact(_do)
+
+    def delete(self, post_id):
+        def _do():
+            if post_id not in self._posts:
+                return [], False
+            return [{'op': 'del', 'id': post_id}], True
+        deleted = self.transact(_do)
+        if deleted:
+            self._remove_body(post_id)
+        return deleted
+
+    def replace_all(self, posts):
+        """예전 save_posts(전체 목록 덮어쓰기)와 같은 결과를 내되, 실제로
+        달라진 글만 레코드로 남긴다."""
+        def _do():
+            records = []
+            keep = set()
+            for p in posts:
+                keep.add(p.get('id'))
+                header, content = _split(p)
+                if 'content' in p and self.body(p.get('id')) != (content or ''):
+                    self._write_body(p.get('id'), content)
+                if self._posts.get(p.get('id')) != header:
+                    records.append({'op': 'put', 'post': header})
+            removed = [post_id for post_id in self._posts if post_id not in keep]
+            records.extend({'op': 'del', 'id': post_id} for post_id in removed)
+            return records, removed
+        for post_id in self.transact(_do):
+            self._remove_body(post_id)
+
+    def migrate(self):
+        """본문이 글 안에 있는 예전 스냅샷/저널이면 본문을 body_dir로 옮기고
+        스냅샷을 글 머리만으로 다시 쓴다. 옮긴 게 있으면 True."""
+        marker = os.path.join(self.body_dir, MIGRATED_MARKER)
+        if os.path.exists(marker):
+            return False
+        os.makedirs(self.body_dir, exist_ok=True)
+        with self._mutex, locked(self.journal_path):
+            # 다른 세션이 먼저 옮겼을 수 있다
+            if os.path.exists(marker):
+                return False
+            self.refresh()
+            inline = [p for p in self._posts.values() if 'content' in p]
+            # 글마다 fsync하면 글이 많을 때 한참 걸린다 - 다 쓰고 한 번에 동기화한다.
+            for post in inline:
+                self._write_body(post.get('id', 0), post.pop('content'), sync=False)
+            if inline:
+                if FSYNC:
+                    os.sync()
+                self.compact()
+            if self.counts_path and not os.path.exists(self.counts_path):
+                # 카운터 파일보다 오래된 데이터 - 첫 글쓰기가 빈 카운터에 증감분만
+                # 더하지 않도록 지금 센다
+                write_json(self.counts_path, {board_id: len(ids)
+                                              for board_id, ids in self._by_board.items() if ids})
+            write_text(marker, '')
+        return bool(inline)
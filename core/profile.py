@@ -1,6 +1,5 @@
-import os
-import json
 import hashlib
+import threading
 from datetime import datetime
 
 from bbsio.rawio import rawinput, hidden_input, command_input
@@ -9,8 +8,8 @@ from bbsio.tui import (
     clear_screen, draw_top_bar, draw_footer,
     box_top, box_bottom, box_line, box_sep, get_screen_size,
 )
+from core.storage import get_store
 
-USER_FILE = os.path.join('data', 'users.json')
 SITE_NAME = "M I N I - T E L"
 
 # login.py(가입/로그인)와 board.py(내 정보 수정, 관리자 메뉴)가 둘 다
@@ -23,20 +22,92 @@ def now_str():
     return datetime.now().strftime('%y/%m/%d %H:%M')
 
 
+class UserDirectory:
+    """회원 목록을 들고 있다가 저장소의 users_version()이 바뀔 때만 다시 읽는다.
+
+    예전엔 is_admin()이 부를 때마다 load_users()로 users.json 전체를 파싱했는데,
+    메인 메뉴를 그릴 때마다, 글/자료마다 고치기·지우기 권한을 볼 때마다,
+    관리자 전용 게시판에 쓸 때마다 불렸다. 쪽지 받는 사람 확인도 같았다.
+    회원 목록은 거의 안 바뀌므로 한 번 읽어 두고, 조회할 때마다 버전(JSON은
+    stat 한 번, SQLite는 kv 한 행)만 확인한다. 다른 세션이 가입/정보 수정을
+    하면 버전이 바뀌어 다음 조회 때 다시 읽고, 이 세션이 쓸 때는 아래
+    put_user()/delete_user()/save_users()가 invalidate()로 바로 버린다.
+
+    in-process 모드에서는 세션 스레드들이 하나를 같이 쓴다(조회 결과는 버전을
+    확인한 것이라 공유해도 안전하다). 돌려주는 회원 정보는 복사본이다.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._users = {}
+        self._version = False   # 아직 한 번도 안 읽음
+        self.parses = 0         # 회원 목록을 실제로 다시 읽은 횟수(벤치마크용)
+
+    def _current(self):
+        version = self.store.users_version()
+        with self._lock:
+            if self._version is False or version != self._version:
+                # 버전을 먼저 보고 읽으므로, 그 사이에 바뀌었으면 다음 조회에서
+                # 버전이 또 달라 보여 한 번 더 읽을 뿐 옛 목록이 남지는 않는다.
+                self._users = self.store.load_users()
+                self._version = version
+                self.parses += 1
+            return self._users
+
+    def invalidate(self):
+        with self._lock:
+            self._version = False
+
+    def get(self, user_id):
+        info = self._current().get(user_id)
+        return dict(info) if info is not None else None
+
+    def __contains__(self, user_id):
+        return user_id in self._current()
+
+    def count(self):
+        return len(self._current())
+
+    def is_admin(self, user_id):
+        return self._current().get(user_id, {}).get('is_admin', False)
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def user_directory():
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = UserDirectory(get_store())
+    return _directory
+
+
 def load_users():
-    if not os.path.exists(USER_FILE):
-        return {}
-    with open(USER_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return get_store().load_users()
 
 
 def save_users(users):
-    with open(USER_FILE, 'w', encoding='utf-8') as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
+    get_store().save_users(users)
+    user_directory().invalidate()
+
+
+def put_user(user_id, info):
+    """회원 한 명의 정보만 저장한다 - 전체 회원 목록을 다시 쓰지 않는다."""
+    get_store().put_user(user_id, info)
+    user_directory().invalidate()
+
+
+def delete_user(user_id):
+    get_store().delete_user(user_id)
+    user_directory().invalidate()
 
 
 def is_admin(username):
-    return load_users().get(username, {}).get('is_admin', False)
+    return user_directory().is_admin(username)
 
 
 def collect_profile():
@@ -87,7 +158,7 @@ def edit_profile(username):
                 rawprint(C_DIM + "\n새 정보를 입력하세요.\n" + RESET)
                 new_profile = collect_profile()
                 users[username].update(new_profile)
-                save_users(users)
+                put_user(username, users[username])
                 rawprint(C_OK + "정보가 수정되었습니다.\n" + RESET)
                 rawinput("계속하려면 Enter를 누르세요.\n")
             elif cmd == 'w':
@@ -102,7 +173,7 @@ def edit_profile(username):
                     rawinput("계속하려면 Enter를 누르세요.\n")
                     continue
                 users[username]['password'] = hashlib.sha256(pw1.encode()).hexdigest()
-                save_users(users)
+                put_user(username, users[username])
                 rawprint(C_OK + "비밀번호가 변경되었습니다.\n" + RESET)
                 rawinput("계속하려면 Enter를 누르세요.\n")
             else:
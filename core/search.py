@@ -0,0 +1,223 @@
+"""게시글 검색 - 한글은 두 글자(바이그램), 영문/숫자는 단어 단위 역색인.
+
+예전엔 검색이 없어서 옛 글을 찾으려면 게시판 목록을 한 화면씩 넘겨 가며
+눈으로 찾았다 - 느린 회선에서 가장 많은 바이트를 쓰는 일이었다. 여기서는
+제목/글쓴이/본문을 낱말(term)로 쪼개 "낱말 -> 글 id" 색인을 글을 쓰고(write_post)
+고치고 지울 때마다 그 글 몫만 고쳐 둔다.
+
+  한글       - 이어진 한글을 두 글자씩 겹쳐 자른다("모뎀통신" -> 모뎀, 뎀통, 통신).
+               형태소 분석 없이도 조사가 붙은 말("모뎀을")이나 띄어 쓰지 않은
+               말에서 찾을 수 있다. 글 쪽은 한 글자씩(모, 뎀, 통, 신)도 색인에
+               넣는다 - 검색어가 한 글자("모")면 그 한 글자로 찾는다.
+  영문/숫자  - 단어 하나가 낱말 하나(소문자로 맞춤). ZMODEM, 14400 같은 것.
+
+검색어도 똑같이 쪼개서 낱말이 전부 들어 있는 글을 최신순으로 돌려준다.
+바이그램이라 "통신모뎀"으로 찾으면 "모뎀 통신"이 들어간 글도 나올 수 있다
+(낱말 순서는 보지 않는다) - 찾는 쪽에서는 빠뜨리는 것보다 낫다.
+
+색인은 글 수 x 글당 낱말 수(본문 300자면 수백 개)만큼 커져서, 세션 프로세스마다
+JSON으로 읽어 메모리에 올릴 수 없다. 그래서 두 백엔드 모두 SQLite 테이블에
+둔다 - SQLite 백엔드는 같은 DB에서 글과 같은 트랜잭션으로, JSON 백엔드는 다시
+만들 수 있는 파생 데이터로 보고 data/search.sqlite3 한 파일에(SearchIndex).
+검색은 (낱말, 글 id) 기본 키를 타고 가장 드문 낱말의 글 목록을 최신 글부터
+훑으면서 나머지 낱말이 있는지만 확인하고, MAX_RESULTS건을 찾으면 멈춘다.
+그중 한 페이지 몫의 글 머리만 저장소에서 꺼낸다. 본문은 읽지 않는다.
+"""
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from core.atomic import FSYNC
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    post_id INTEGER PRIMARY KEY,
+    board TEXT
+);
+CREATE TABLE IF NOT EXISTS search_terms (
+    term TEXT NOT NULL,
+    post_id INTEGER NOT NULL,
+    PRIMARY KEY (term, post_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS search_terms_post ON search_terms(post_id);
+"""
+
+# 다른 세션이 색인을 고치고 있을 때 기다려 줄 최대 시간(초)
+BUSY_TIMEOUT = 10
+
+# 검색 결과는 최신 글부터 이만큼까지만 찾는다. 흔한 낱말("모뎀")은 글 대부분에
+# 들어 있어서 끝까지 세면 검색마다 색인을 수만 행씩 훑게 된다 - 모뎀으로 수십
+# 페이지를 넘겨 볼 사람은 없으니 그 전에 검색어를 좁히게 한다.
+MAX_RESULTS = 1000
+
+# 색인 낱말 규칙이 바뀌면 올린다 - 저장된 버전이 다르면 처음 열 때 다시 만든다.
+# 2: 한글 한 글자 낱말 추가
+INDEX_VERSION = '2'
+
+_TOKEN_RE = re.compile(r'[가-힣]+|[0-9A-Za-z]+')
+
+
+def terms(text):
+    """검색어 text를 낱말 집합으로 쪼갠다. 한글은 두 글자 이상이면 바이그램만,
+    한 글자면 그 한 글자."""
+    found = set()
+    for m in _TOKEN_RE.finditer(text or ''):
+        token = m.group(0)
+        if token[0] >= '가':
+            if len(token) == 1:
+                found.add(token)
+            else:
+                found.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            found.add(token.lower())
+    return found
+
+
+def _index_terms(text):
+    """글 text의 색인 낱말 - terms()에 한글 한 글자씩을 더한다. 바이그램만
+    넣으면 한 글자 검색어("모")는 "모뎀"이 든 글도 못 찾는다."""
+    found = terms(text)
+    for m in _TOKEN_RE.finditer(text or ''):
+        token = m.group(0)
+        if token[0] >= '가':
+            found.update(token)
+    return found
+
+
+def post_terms(post):
+    """글 하나(본문 포함)의 색인 낱말 - 제목, 글쓴이, 본문."""
+    return (_index_terms(post.get('title')) | _index_terms(post.get('author'))
+            | _index_terms(post.get('content')))
+
+
+# --- 연결 하나 위의 연산(SQLite 백엔드는 자기 트랜잭션 안에서 부른다) ----
+
+def index_post(db, post):
+    """post(본문 포함)의 낱말을 색인에 넣는다. 이미 있던 글이면 바꾼다."""
+    remove_post(db, post['id'])
+    _insert(db, post)
+
+
+def _insert(db, post):
+    db.execute('INSERT INTO search_docs (post_id, board) VALUES (?, ?)', (post['id'], post.get('board')))
+    db.executemany('INSERT INTO search_terms (term, post_id) VALUES (?, ?)',
+                   [(term, post['id']) for term in post_terms(post)])
+
+
+def remove_post(db, post_id):
+    db.execute('DELETE FROM search_terms WHERE post_id = ?', (post_id,))
+    db.execute('DELETE FROM search_docs WHERE post_id = ?', (post_id,))
+
+
+def rebuild(db, posts):
+    """posts(본문 포함) 전체로 색인을 처음부터 다시 만든다."""
+    db.execute('DELETE FROM search_terms')
+    db.execute('DELETE FROM search_docs')
+    for post in posts:
+        _insert(db, post)
+
+
+def search(db, query, board_id, offset, limit):
+    """query의 낱말이 전부 들어 있는 글 id를 최신순으로 offset번째부터 limit개와
+    찾은 글 수(MAX_RESULTS까지만 센다). 낱말이 하나도 없는 검색어면 ([], 0)."""
+    wanted = terms(query)
+    if not wanted:
+        return [], 0
+    # 가장 드문 낱말의 글 목록을 기준으로 최신 글부터 훑는다
+    counts = {term: db.execute('SELECT COUNT(*) FROM search_terms WHERE term = ?', (term,)).fetchone()[0]
+              for term in wanted}
+    driver = min(wanted, key=counts.get)
+    if counts[driver] == 0:
+        return [], 0
+    where = ['t.term = ?']
+    params = [driver]
+    for term in sorted(wanted - {driver}, key=counts.get):
+        where.append('EXISTS (SELECT 1 FROM search_terms WHERE term = ? AND post_id = t.post_id)')
+        params.append(term)
+    join = ''
+    if board_id is not None:
+        join = 'JOIN search_docs d ON d.post_id = t.post_id'
+        where.append('d.board = ?')
+        params.append(board_id)
+    ids = [row[0] for row in db.execute(
+        f'SELECT t.post_id FROM search_terms t {join} WHERE {" AND ".join(where)} '
+        'ORDER BY t.post_id DESC LIMIT ?', params + [MAX_RESULTS])]
+    return ids[offset:offset + limit], len(ids)
+
+
+# --- JSON 백엔드용 색인 파일 -------------------------------------------
+
+class SearchIndex:
+    """색인 전용 SQLite 파일. JSON 백엔드가 글 저장(저널)과 따로 고치므로,
+    그 사이에 프로세스가 죽으면 색인만 어긋난다 - tools/rebuild_search_index.py로
+    다시 만든다."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._db().executescript(SCHEMA + """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=' + ('FULL' if FSYNC else 'NORMAL'))
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _write(self):
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def ensure_built(self, load_posts):
+        """색인을 아직 안 만들었거나(이 기능 이전의 데이터) INDEX_VERSION 이전
+        규칙으로 만들었으면 load_posts()(본문 포함 전체 글)로 만든다. 만들었으면 True."""
+        if self._built(self._db()):
+            return False
+        with self._write() as db:
+            # 다른 세션이 먼저 만들었을 수 있다
+            if self._built(db):
+                return False
+            self._build(db, load_posts())
+        return True
+
+    def _built(self, db):
+        return db.execute("SELECT 1 FROM meta WHERE key = 'built' AND value = ?",
+                          (INDEX_VERSION,)).fetchone() is not None
+
+    def rebuild(self, posts):
+        """posts(본문 포함) 전체로 색인을 처음부터 다시 만든다."""
+        with self._write() as db:
+            self._build(db, posts)
+
+    def _build(self, db, posts):
+        rebuild(db, posts)
+        db.execute("INSERT INTO meta (key, value) VALUES ('built', ?) "
+                   'ON CONFLICT(key) DO UPDATE SET value = excluded.value', (INDEX_VERSION,))
+
+    def add(self, post):
+        with self._write() as db:
+            index_post(db, post)
+
+    def remove(self, post_id):
+        with self._write() as db:
+            remove_post(db, post_id)
+
+    def search(self, query, board_id, offset, limit):
+        db = self._db()
+        db.execute('BEGIN')
+        try:
+            return search(db, query, board_id, offset, limit)
+        finally:
+            db.execute('COMMIT')
@@ -0,0 +1,522 @@
+"""SQLite 백엔드 - 모든 데이터를 data/bbs.sqlite3 한 파일에 둔다.
+
+JSON 백엔드는 세션 프로세스마다 파일 전체를 읽어야 원하는 몇 건을 찾을 수
+있지만, 여기서는 게시판(board)/받는 사람(to)/글쓴이(author)/id 색인으로
+필요한 행만 읽는다. WAL 모드라 쓰는 세션이 있어도 다른 세션의 읽기가
+막히지 않고, 쓰기는 BEGIN IMMEDIATE 트랜잭션으로 세션 프로세스 간에
+직렬화된다.
+
+게시판별 글 수는 board_counts 테이블에 따로 두고 posts에 걸린 트리거로
+같은 트랜잭션 안에서 증감한다 - 메인 메뉴가 게시판마다 COUNT(*)로 색인을
+훑지 않아도 되고, 트리거라 save_posts나 마이그레이션 도구로 넣은 글도
+빠짐없이 반영된다. 받는 사람별 쪽지 수/안 읽은 쪽지 수(mailbox_counts)도
+같은 방식이다 - 메인 메뉴의 쪽지 표시가 매번 쪽지를 세지 않는다. 회원 행이
+바뀔 때마다 kv의 users_version도 트리거로 하나씩 올린다 - 세션이 들고 있는
+회원 목록(core.profile.UserDirectory)이 이 값만 보고 다시 읽을지 정한다.
+
+게시글 본문은 post_bodies 테이블에 따로 둔다(posts.content 열은 예전 DB
+호환으로 남겨 두고 비워 둔다). 본문이 posts 행 안에 있으면 목록 한 페이지를
+읽을 때도 행마다 본문이 든 오버플로 페이지까지 따라가야 했다 - 첨부(attachment)
+열이 본문 뒤에 있어서다. 예전 DB는 처음 열 때 본문을 한 번 옮긴다(kv의
+post_bodies 표시).
+
+게시글 검색 색인(search_docs/search_terms, core/search.py)도 같은 DB에 두고
+글을 쓰고 고치고 지우는 트랜잭션 안에서 함께 고친다. 색인이 생기기 전에 만든
+DB나 낱말 규칙이 바뀌기 전(search.INDEX_VERSION)에 만든 색인은 처음 열 때
+한 번 다시 만든다(kv의 search_index).
+
+글/쪽지 id는 지운 id를 다시 쓰지 않는다. INTEGER PRIMARY KEY는 맨 끝 행을
+지우면 그 id를 다음 행에 다시 주는데, 그러면 목록/검색 색인/예전 화면에서 본
+id가 엉뚱한 글을 가리키게 된다(JSON 백엔드는 저널과 mail_seq.json으로 올리기만
+한다). 그래서 지금까지 넣은 가장 큰 id를 kv의 post_seq/mail_seq에 트리거로
+남겨 두고 그다음 id를 준다(_next_id).
+
+회원 정보는 필드가 자유로운 dict(이름/성별/생년월일/관리자 여부 등)라 id를
+키로 JSON 텍스트 한 덩어리로 저장한다.
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from core.atomic import FSYNC
+from core import search
+
+# 다른 세션이 쓰기 트랜잭션을 잡고 있을 때 기다려 줄 최대 시간(초)
+BUSY_TIMEOUT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    board TEXT NOT NULL,
+    author TEXT,
+    title TEXT,
+    content TEXT,
+    date TEXT,
+    attachment TEXT
+);
+CREATE INDEX IF NOT EXISTS posts_board ON posts(board, id);
+CREATE TABLE IF NOT EXISTS post_bodies (
+    id INTEGER PRIMARY KEY,
+    content TEXT
+);
+CREATE TRIGGER IF NOT EXISTS posts_body_delete AFTER DELETE ON posts BEGIN
+    DELETE FROM post_bodies WHERE id = OLD.id;
+END;
+CREATE INDEX IF NOT EXISTS posts_author ON posts(author);
+CREATE TABLE IF NOT EXISTS board_counts (
+    board TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS posts_count_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO board_counts (board, count) VALUES (NEW.board, 1)
+        ON CONFLICT(board) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS posts_count_delete AFTER DELETE ON posts BEGIN
+    UPDATE board_counts SET count = count - 1 WHERE board = OLD.board;
+END;
+CREATE TRIGGER IF NOT EXISTS posts_count_move AFTER UPDATE OF board ON posts
+WHEN OLD.board IS NOT NEW.board BEGIN
+    UPDATE board_counts SET count = count - 1 WHERE board = OLD.board;
+    INSERT INTO board_counts (board, count) VALUES (NEW.board, 1)
+        ON CONFLICT(board) DO UPDATE SET count = count + 1;
+END;
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    sender TEXT,
+    recipient TEXT NOT NULL,
+    content TEXT,
+    date TEXT,
+    read INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS messages_recipient ON messages(recipient, id);
+CREATE TABLE IF NOT EXISTS mailbox_counts (
+    recipient TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    unread INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS messages_count_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO mailbox_counts (recipient, total, unread) VALUES (NEW.recipient, 1, NEW.read = 0)
+        ON CONFLICT(recipient) DO UPDATE SET total = total + 1, unread = unread + excluded.unread;
+END;
+CREATE TRIGGER IF NOT EXISTS messages_count_delete AFTER DELETE ON messages BEGIN
+    UPDATE mailbox_counts SET total = total - 1, unread = unread - (OLD.read = 0)
+        WHERE recipient = OLD.recipient;
+END;
+CREATE TRIGGER IF NOT EXISTS messages_count_update AFTER UPDATE OF recipient, read ON messages BEGIN
+    UPDATE mailbox_counts SET total = total - 1, unread = unread - (OLD.read = 0)
+        WHERE recipient = OLD.recipient;
+    INSERT INTO mailbox_counts (recipient, total, unread) VALUES (NEW.recipient, 1, NEW.read = 0)
+        ON CONFLICT(recipient) DO UPDATE SET total = total + 1, unread = unread + excluded.unread;
+END;
+CREATE TABLE IF NOT EXISTS file_index (
+    id INTEGER PRIMARY KEY,
+    filename TEXT,
+    stored_name TEXT,
+    description TEXT,
+    uploader TEXT,
+    size INTEGER,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS file_index_uploader ON file_index(uploader);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS posts_seq_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO kv (key, value) VALUES ('post_seq', NEW.id)
+        ON CONFLICT(key) DO UPDATE SET value = MAX(CAST(value AS INTEGER), NEW.id);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_seq_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO kv (key, value) VALUES ('mail_seq', NEW.id)
+        ON CONFLICT(key) DO UPDATE SET value = MAX(CAST(value AS INTEGER), NEW.id);
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users BEGIN
+    INSERT INTO kv (key, value) VALUES ('users_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users BEGIN
+    INSERT INTO kv (key, value) VALUES ('users_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users BEGIN
+    INSERT INTO kv (key, value) VALUES ('users_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1;
+END;
+"""
+
+_POST_COLUMNS = 'id, board, author, title, date, attachment'
+_MESSAGE_COLUMNS = 'id, sender, recipient, content, date, read'
+_FILE_COLUMNS = 'id, filename, stored_name, description, uploader, size, date'
+
+
+def _default_stats():
+    return {'total_visits': 0, 'last_visit_date': '', 'today_visits': 0}
+
+
+def _post_row(row):
+    return {
+        'id': row[0], 'board': row[1], 'author': row[2], 'title': row[3],
+        'date': row[4], 'attachment': json.loads(row[5]) if row[5] else None,
+    }
+
+
+def _post_params(post):
+    attachment = post.get('attachment')
+    return (post.get('board'), post.get('author'), post.get('title'),
+            post.get('date'), json.dumps(attachment, ensure_ascii=False) if attachment else None)
+
+
+def _message_row(row):
+    return {'id': row[0], 'from': row[1], 'to': row[2], 'content': row[3],
+            'date': row[4], 'read': bool(row[5])}
+
+
+def _file_row(row):
+    return {'id': row[0], 'filename': row[1], 'stored_name': row[2], 'description': row[3],
+            'uploader': row[4], 'size': row[5], 'date': row[6]}
+
+
+def _file_params(entry):
+    return (entry.get('filename'), entry.get('stored_name'), entry.get('description'),
+            entry.get('uploader'), entry.get('size'), entry.get('date'))
+
+
+def _next_id(db, table, seq_key):
+    """table에 새로 넣을 id - 지금까지 넣은 가장 큰 id(kv의 seq_key) 다음.
+    seq 트리거가 생기기 전에 만든 DB는 아직 seq_key가 없으므로 남은 행의
+    가장 큰 id와도 비교한다."""
+    row = db.execute(f"SELECT MAX(COALESCE((SELECT CAST(value AS INTEGER) FROM kv WHERE key = ?), 0), "
+                     f"COALESCE((SELECT MAX(id) FROM {table}), 0)) + 1", (seq_key,)).fetchone()
+    return row[0]
+
+
+class SqliteStore:
+    def __init__(self, path):
+        self.path = path
+        # sqlite3 연결은 만든 스레드에서만 쓸 수 있어서 스레드별로 하나씩 연다.
+        self._local = threading.local()
+        self._db().executescript(SCHEMA + search.SCHEMA)
+        # board_counts 테이블이 생기기 전에 만든 DB면 트리거가 놓친 기존
+        # 글을 한 번 세어 채운다.
+        db = self._db()
+        if (db.execute('SELECT COUNT(*) FROM board_counts').fetchone()[0] == 0
+                and db.execute('SELECT 1 FROM posts LIMIT 1').fetchone()):
+            self.check_board_counts(repair=True)
+        # mailbox_counts도 마찬가지
+        if (db.execute('SELECT 1 FROM mailbox_counts LIMIT 1').fetchone() is None
+                and db.execute('SELECT 1 FROM messages LIMIT 1').fetchone()):
+            with self._write() as db:
+                db.execute('INSERT INTO mailbox_counts (recipient, total, unread) '
+                           'SELECT recipient, COUNT(*), SUM(read = 0) FROM messages GROUP BY recipient')
+        # 본문이 posts 행 안에 있던 DB면 post_bodies로 한 번 옮긴다
+        if db.execute("SELECT 1 FROM kv WHERE key = 'post_bodies'").fetchone() is None:
+            with self._write() as db:
+                db.execute('INSERT OR REPLACE INTO post_bodies (id, content) '
+                           'SELECT id, content FROM posts WHERE content IS NOT NULL')
+                db.execute('UPDATE posts SET content = NULL WHERE content IS NOT NULL')
+                db.execute("INSERT INTO kv (key, value) VALUES ('post_bodies', '1') "
+                           'ON CONFLICT(key) DO NOTHING')
+        if not self._search_index_built(db):
+            with self._write() as db:
+                # 다른 세션이 먼저 만들었을 수 있다
+                if not self._search_index_built(db):
+                    self._rebuild_search_index(db)
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # isolation_level=None: 파이썬 sqlite3 모듈의 암묵적 트랜잭션 대신
+            # 아래 _write()에서 BEGIN IMMEDIATE를 직접 건다.
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            # BBS_FSYNC=1이면 커밋마다 fsync(FULL), 아니면 WAL 체크포인트
+            # 때만(NORMAL) - JSON 백엔드의 fsync 정책과 맞춘다.
+            db.execute('PRAGMA synchronous=' + ('FULL' if FSYNC else 'NORMAL'))
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _write(self):
+        # IMMEDIATE로 시작해야 "읽고 나서 쓰기"(다음 id 계산 등) 도중에 다른
+        # 세션이 끼어들지 못한다 - DEFERRED면 첫 쓰기 시점에야 잠금을 잡는다.
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    # --- 회원 ------------------------------------------------------------
+
+    def load_users(self):
+        rows = self._db().execute('SELECT id, data FROM users ORDER BY rowid')
+        return {uid: json.loads(data) for uid, data in rows}
+
+    def users_version(self):
+        row = self._db().execute("SELECT value FROM kv WHERE key = 'users_version'").fetchone()
+        return row[0] if row else None
+
+    def save_users(self, users):
+        with self._write() as db:
+            db.execute('DELETE FROM users')
+            db.executemany('INSERT INTO users (id, data) VALUES (?, ?)',
+                           [(uid, json.dumps(info, ensure_ascii=False)) for uid, info in users.items()])
+
+    def put_user(self, user_id, info):
+        with self._write() as db:
+            db.execute('INSERT INTO users (id, data) VALUES (?, ?) '
+                       'ON CONFLICT(id) DO UPDATE SET data = excluded.data',
+                       (user_id, json.dumps(info, ensure_ascii=False)))
+
+    def delete_user(self, user_id):
+        with self._write() as db:
+            db.execute('DELETE FROM users WHERE id = ?', (user_id,))
+
+    # --- 게시글 ----------------------------------------------------------
+
+    def load_posts(self):
+        rows = self._db().execute(
+            'SELECT p.id, p.board, p.author, p.title, p.date, p.attachment, b.content '
+            'FROM posts p LEFT JOIN post_bodies b ON b.id = p.id ORDER BY p.id')
+        return [dict(_post_row(r), content=r[6] or '') for r in rows]
+
+    def save_posts(self, posts):
+        with self._write() as db:
+            db.execute('DELETE FROM posts')
+            db.executemany(f'INSERT INTO posts ({_POST_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)',
+                           [(p.get('id'),) + _post_params(p) for p in posts])
+            db.executemany('INSERT OR REPLACE INTO post_bodies (id, content) VALUES (?, ?)',
+                           [(p.get('id'), p.get('content')) for p in posts if 'content' in p])
+            self._rebuild_search_index(db)
+
+    def get_post(self, post_id):
+        row = self._db().execute(f'SELECT {_POST_COLUMNS} FROM posts WHERE id = ?',
+                                 (post_id,)).fetchone()
+        return _post_row(row) if row else None
+
+    def post_body(self, post_id):
+        return self._post_body(self._db(), post_id)
+
+    def _post_body(self, db, post_id):
+        row = db.execute('SELECT content FROM post_bodies WHERE id = ?', (post_id,)).fetchone()
+        return row[0] if row else None
+
+    def board_posts(self, board_id):
+        rows = self._db().execute(f'SELECT {_POST_COLUMNS} FROM posts WHERE board = ? ORDER BY id',
+                                  (board_id,))
+        return [_post_row(r) for r in rows]
+
+    def board_page(self, board_id, offset, limit):
+        # posts_board(board, id) 색인을 타고 해당 구간만 읽는다. 전체 글 수는
+        # 같은 시점의 값이 되도록 한 읽기 트랜잭션 안에서 카운터로 센다.
+        db = self._db()
+        db.execute('BEGIN')
+        try:
+            rows = db.execute(f'SELECT {_POST_COLUMNS} FROM posts WHERE board = ? '
+                              'ORDER BY id LIMIT ? OFFSET ?', (board_id, limit, offset)).fetchall()
+            total = self.board_count(board_id)
+        finally:
+            db.execute('COMMIT')
+        return [_post_row(r) for r in rows], total
+
+    def board_count(self, board_id):
+        row = self._db().execute('SELECT count FROM board_counts WHERE board = ?',
+                                 (board_id,)).fetchone()
+        return row[0] if row else 0
+
+    def board_counts(self):
+        return dict(self._db().execute('SELECT board, count FROM board_counts WHERE count != 0'))
+
+    def check_board_counts(self, repair=False):
+        with self._write() as db:
+            actual = dict(db.execute('SELECT board, COUNT(*) FROM posts GROUP BY board'))
+            stored = dict(db.execute('SELECT board, count FROM board_counts'))
+            mismatched = {}
+            for board_id in set(actual) | set(stored):
+                if stored.get(board_id, 0) != actual.get(board_id, 0):
+                    mismatched[board_id] = (stored.get(board_id), actual.get(board_id, 0))
+            if repair and mismatched:
+                db.execute('DELETE FROM board_counts')
+                db.executemany('INSERT INTO board_counts (board, count) VALUES (?, ?)',
+                               actual.items())
+            return mismatched
+
+    def add_post(self, post):
+        with self._write() as db:
+            next_id = _next_id(db, 'posts', 'post_seq')
+            db.execute(f'INSERT INTO posts ({_POST_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)',
+                       (next_id,) + _post_params(post))
+            db.execute('INSERT OR REPLACE INTO post_bodies (id, content) VALUES (?, ?)',
+                       (next_id, post.get('content')))
+            search.index_post(db, dict(post, id=next_id))
+        post['id'] = next_id
+        return next_id
+
+    def update_post(self, post):
+        with self._write() as db:
+            cur = db.execute('UPDATE posts SET board = ?, author = ?, title = ?, '
+                             'date = ?, attachment = ? WHERE id = ?',
+                             _post_params(post) + (post.get('id'),))
+            if cur.rowcount == 0:
+                return False
+            if 'content' in post:
+                db.execute('INSERT OR REPLACE INTO post_bodies (id, content) VALUES (?, ?)',
+                           (post.get('id'), post.get('content')))
+            else:
+                post = dict(post, content=self._post_body(db, post.get('id')))
+            search.index_post(db, post)
+            return True
+
+    def delete_post(self, post_id):
+        with self._write() as db:
+            if db.execute('DELETE FROM posts WHERE id = ?', (post_id,)).rowcount == 0:
+                return False
+            search.remove_post(db, post_id)
+            return True
+
+    def search_posts(self, query, board_id, offset, limit):
+        db = self._db()
+        db.execute('BEGIN')
+        try:
+            ids, total = search.search(db, query, board_id, offset, limit)
+            rows = db.execute(f'SELECT {_POST_COLUMNS} FROM posts WHERE id IN '
+                              f'({", ".join("?" * len(ids))})', ids).fetchall() if ids else []
+        finally:
+            db.execute('COMMIT')
+        by_id = {row[0]: _post_row(row) for row in rows}
+        return [by_id[i] for i in ids if i in by_id], total
+
+    def rebuild_search_index(self):
+        with self._write() as db:
+            return self._rebuild_search_index(db)
+
+    def _rebuild_search_index(self, db):
+        rows = db.execute('SELECT p.id, p.board, p.author, p.title, b.content '
+                          'FROM posts p LEFT JOIN post_bodies b ON b.id = p.id')
+        posts = [{'id': r[0], 'board': r[1], 'author': r[2], 'title': r[3], 'content': r[4]}
+                 for r in rows]
+        search.rebuild(db, posts)
+        db.execute("INSERT INTO kv (key, value) VALUES ('search_index', ?) "
+                   'ON CONFLICT(key) DO UPDATE SET value = excluded.value', (search.INDEX_VERSION,))
+        return len(posts)
+
+    def _search_index_built(self, db):
+        return db.execute("SELECT 1 FROM kv WHERE key = 'search_index' AND value = ?",
+                          (search.INDEX_VERSION,)).fetchone() is not None
+
+    def reserve_ids(self, post_id=0, message_id=0):
+        """글 id는 post_id까지, 쪽지 id는 message_id까지 이미 준 것으로 친다
+        (_next_id가 그다음부터 준다). 옮기기 도구용 - 원본에서 지운 맨 끝
+        글/쪽지의 id는 옮긴 행에 없어서 seq 트리거가 모른다."""
+        with self._write() as db:
+            for key, last_id in (('post_seq', post_id), ('mail_seq', message_id)):
+                db.execute('INSERT INTO kv (key, value) VALUES (?, ?) '
+                           'ON CONFLICT(key) DO UPDATE SET value = MAX(CAST(value AS INTEGER), excluded.value)',
+                           (key, last_id))
+
+    # --- 쪽지 ------------------------------------------------------------
+
+    def load_messages(self):
+        rows = self._db().execute(f'SELECT {_MESSAGE_COLUMNS} FROM messages ORDER BY id')
+        return [_message_row(r) for r in rows]
+
+    def save_messages(self, messages):
+        with self._write() as db:
+            db.execute('DELETE FROM messages')
+            db.executemany(f'INSERT INTO messages ({_MESSAGE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)',
+                           [(m['id'], m['from'], m['to'], m['content'], m['date'], int(m['read']))
+                            for m in messages])
+
+    def inbox(self, username):
+        rows = self._db().execute(f'SELECT {_MESSAGE_COLUMNS} FROM messages '
+                                  'WHERE recipient = ? ORDER BY id DESC', (username,))
+        return [_message_row(r) for r in rows]
+
+    def inbox_page(self, username, offset, limit):
+        # board_page()와 같은 방식 - messages_recipient(recipient, id) 색인으로
+        # 해당 구간만 읽고, 전체 수는 같은 읽기 트랜잭션에서 카운터로 센다.
+        db = self._db()
+        db.execute('BEGIN')
+        try:
+            rows = db.execute(f'SELECT {_MESSAGE_COLUMNS} FROM messages WHERE recipient = ? '
+                              'ORDER BY id DESC LIMIT ? OFFSET ?', (username, limit, offset)).fetchall()
+            row = db.execute('SELECT total FROM mailbox_counts WHERE recipient = ?',
+                             (username,)).fetchone()
+        finally:
+            db.execute('COMMIT')
+        return [_message_row(r) for r in rows], row[0] if row else 0
+
+    def unread_count(self, username):
+        row = self._db().execute('SELECT unread FROM mailbox_counts WHERE recipient = ?',
+                                 (username,)).fetchone()
+        return row[0] if row else 0
+
+    def add_message(self, message):
+        with self._write() as db:
+            next_id = _next_id(db, 'messages', 'mail_seq')
+            db.execute(f'INSERT INTO messages ({_MESSAGE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)',
+                       (next_id, message['from'], message['to'], message['content'],
+                        message['date'], int(message['read'])))
+        message['id'] = next_id
+        return message['id']
+
+    def mark_read(self, username, message_id):
+        with self._write() as db:
+            db.execute('UPDATE messages SET read = 1 WHERE id = ? AND recipient = ? AND read = 0',
+                       (message_id, username))
+
+    def delete_message(self, username, message_id):
+        with self._write() as db:
+            db.execute('DELETE FROM messages WHERE id = ? AND recipient = ?', (message_id, username))
+
+    # --- 자료실 색인 -----------------------------------------------------
+
+    def load_index(self):
+        rows = self._db().execute(f'SELECT {_FILE_COLUMNS} FROM file_index ORDER BY id')
+        return [_file_row(r) for r in rows]
+
+    def save_index(self, entries):
+        with self._write() as db:
+            db.execute('DELETE FROM file_index')
+            db.executemany(f'INSERT INTO file_index ({_FILE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                           [(e.get('id'),) + _file_params(e) for e in entries])
+
+    def add_file_entry(self, entry):
+        with self._write() as db:
+            cur = db.execute('INSERT INTO file_index (filename, stored_name, description, '
+                             'uploader, size, date) VALUES (?, ?, ?, ?, ?, ?)', _file_params(entry))
+        entry['id'] = cur.lastrowid
+        return entry['id']
+
+    def delete_file_entry(self, entry_id):
+        with self._write() as db:
+            db.execute('DELETE FROM file_index WHERE id = ?', (entry_id,))
+
+    # --- 접속 통계 -------------------------------------------------------
+
+    def load_stats(self):
+        row = self._db().execute("SELECT value FROM kv WHERE key = 'stats'").fetchone()
+        return json.loads(row[0]) if row else _default_stats()
+
+    def save_stats(self, stats):
+        with self._write() as db:
+            db.execute("INSERT INTO kv (key, value) VALUES ('stats', ?) "
+                       'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                       (json.dumps(stats, ensure_ascii=False),))
+
+    def update_stats(self, fn):
+        with self._write() as db:
+            row = db.execute("SELECT value FROM kv WHERE key = 'stats'").fetchone()
+            stats = json.loads(row[0]) if row else _default_stats()
+            result = fn(stats)
+            db.execute("INSERT INTO kv (key, value) VALUES ('stats', ?) "
+                       'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                       (json.dumps(stats, ensure_ascii=False),))
+            return result
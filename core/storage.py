@@ -0,0 +1,83 @@
+"""데이터 저장소 선택 - JSON 파일(기본) 또는 SQLite.
+
+회원/게시글/쪽지/자료실 색인/접속 통계를 어디에 저장할지는 BBS_STORAGE
+환경변수로 고른다(docker-compose.yml의 environment에서 토글, BBS_VERBOSE와
+같은 방식).
+
+  BBS_STORAGE=json    (기본) data/*.json 파일 + 게시글 저널(core/json_store.py)
+  BBS_STORAGE=sqlite  data/bbs.sqlite3 한 파일(core/sqlite_store.py).
+                      BBS_SQLITE_PATH로 경로를 바꿀 수 있다.
+
+기존 JSON 데이터를 SQLite로 옮길 때는 tools/migrate_json_to_sqlite.py를
+한 번 돌린다.
+
+두 백엔드는 같은 메서드를 제공한다 - core.profile/core.board/core.mail/
+core.files/core.stats의 load_*/save_* 함수는 전부 get_store()를 거친다.
+  회원   : load_users, users_version, save_users, put_user, delete_user
+  게시글 : load_posts, save_posts, get_post, post_body, board_posts, board_page,
+           board_count, board_counts, check_board_counts, add_post, update_post, delete_post
+  검색   : search_posts, rebuild_search_index
+  쪽지   : load_messages, save_messages, inbox, inbox_page, unread_count,
+           add_message, mark_read, delete_message
+  자료실 : load_index, save_index, add_file_entry, delete_file_entry
+  통계   : load_stats, save_stats, update_stats
+
+한 건을 고치는 연산(put_user, add_message, update_stats 등)은 두 백엔드
+모두 "최신 내용 읽기 -> 고치기 -> 쓰기"를 세션 프로세스 간에 원자적으로
+처리한다(JSON은 core.atomic의 파일 잠금, SQLite는 BEGIN IMMEDIATE). 전체를
+통째로 넘기는 save_*는 예전 동작 호환용이라 그 사이 다른 세션의 변경을
+덮어쓸 수 있으니 새 코드에서는 쓰지 않는다.
+
+게시글은 글 머리(id/게시판/글쓴이/제목/날짜/첨부)와 본문을 따로 저장한다.
+get_post/board_posts/board_page는 글 머리만 돌려주고(목록 화면이 본문을 읽지
+않게), 본문은 post_body(id)로 글을 읽을 때 가져온다. update_post는 넘긴 글에
+'content'가 있을 때만 본문을 바꾼다. load_posts/save_posts는 예전처럼 본문까지
+포함한다(옮기기 도구용).
+
+게시판별 글 수(board_count/board_counts)는 두 백엔드 모두 글을 쓰고 지울
+때 함께 갱신하는 카운터에서 읽는다. 카운터가 실제 글과 어긋났는지는
+check_board_counts()로 확인하고 repair=True로 다시 센다
+(tools/check_board_counts.py). 받는 사람별 쪽지 수/안 읽은 쪽지 수도 마찬가지로
+쪽지를 넣고 읽고 지울 때 함께 갱신한다 - 쪽지 표시와 쪽지함 한 페이지가 BBS
+전체 쪽지 수와 상관없이 그 사람의 쪽지함만 본다.
+
+search_posts(검색어, 게시판 id 또는 None, offset, limit)는 검색어의 낱말이
+전부 들어 있는 글의 글 머리를 최신순으로 한 페이지와 찾은 개수로 돌려준다.
+찾는 것은 최신 core.search.MAX_RESULTS건까지다.
+색인(core/search.py)은 두 백엔드 모두 글을 쓰고 고치고 지울 때 함께 고친다.
+
+users_version()은 회원 목록이 바뀌면 달라지는 값이다(JSON은 users.json의
+inode/mtime/크기, SQLite는 트리거가 올리는 카운터). 세션은 회원 목록을
+core.profile.UserDirectory에 들고 있다가 이 값이 바뀔 때만 다시 읽는다.
+"""
+import os
+import threading
+
+STORAGE_BACKEND = os.environ.get('BBS_STORAGE', 'json')
+SQLITE_PATH = os.environ.get('BBS_SQLITE_PATH', os.path.join('data', 'bbs.sqlite3'))
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    # 프로세스(세션)당 하나만 만든다 - JSON 백엔드의 게시글 색인이나 SQLite
+    # 연결처럼 한 번 만들어 두고 재사용해야 이득인 상태를 들고 있다.
+    # in-process 모드(server/telnet.py)에서는 여러 세션 스레드가 동시에 처음
+    # 부를 수 있어서 만드는 부분만 잠근다.
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+    return _store
+
+
+def _create_store():
+    if STORAGE_BACKEND == 'sqlite':
+        from core.sqlite_store import SqliteStore
+        return SqliteStore(SQLITE_PATH)
+    if STORAGE_BACKEND == 'json':
+        from core.json_store import JsonStore
+        return JsonStore()
+    raise ValueError(f'알 수 없는 BBS_STORAGE 값: {STORAGE_BACKEND!r} (json 또는 sqlite)')
@@ -1,6 +1,8 @@
 import serial
+import errno
 import pty
 import os
+import re
 import subprocess
 import threading
 import time
@@ -11,6 +13,8 @@ from logutil import log, log_io, log_verbose
 
 # 설정
 MODEM_PORT = '/dev/ttyS0'           # 실제 모뎀 장치 (USR5686G, HT802 경유 VoIP 회선)
+# 받을 모뎀 장치 목록(BBS_MODEM_PORTS, 쉼표 구분). 없으면 MODEM_PORT 하나.
+MODEM_PORTS = [p.strip() for p in os.environ.get('BBS_MODEM_PORTS', MODEM_PORT).split(',') if p.strip()]
 # -u: bbs.py 쪽 stdout도 완전 비버퍼링으로 강제 (PTY라 보통 라인버퍼이긴 하지만 명시)
 BBS_COMMAND = ['python3', '-u', 'bbs.py', '--channel=modem']  # BBS 실행 명령어
 BAUDRATE = 115200                   # 시리얼 통신 속도 (AT&B1로 DTE측 고정 속도와 일치)
@@ -45,339 +49,544 @@ MODEM_INIT_COMMANDS = [
     b'ATS0=0\r',    # 자동 응답 끄기 (RING 감지 후 수동 ATA로 응답)
     b'AT#CID=1\r',  # 발신자번호(CID) 표시 켜기 - RING 사이에 NMBR=/NAME= 줄이 옴.
                     # ATZ 이후에 매번 다시 켜줘야 함 (NVRAM에 저장 안 되고 ATZ로 리셋됨).
+    b'AT&C1\r',     # DCD가 실제 캐리어를 따라가게 (통화 중 끊김을 DCD로 봄)
+    b'AT&D2\r',     # DTR을 내리면 전화 끊고 명령 모드로 (LineSupervisor.hangup)
 ]
 
+# "CONNECT 14400", "CONNECT 14400/ARQ" 같은 응답에서 회선 속도(bps)를 뽑는다.
+# bbs.py에 --line-bps=로 넘겨서 출력 속도 조절(bbsio/pacing.py)에 쓴다.
+_CONNECT_SPEED_RE = re.compile(r'CONNECT\s+(\d+)')
+
+# 1이면 NO CARRIER 결과 코드뿐 아니라 모뎀의 DCD 선으로도 캐리어 끊김을 본다
+# (CarrierWatch 참고). 모뎀이 AT&C1(DCD가 실제 캐리어를 따라감) 상태여야 한다 -
+# MODEM_INIT_COMMANDS에 들어 있다.
+USE_DCD = os.environ.get('BBS_MODEM_DCD', '1') == '1'
+
+# 통화 끊기(LineSupervisor.hangup) 관련 시간(초).
+DTR_DROP_HOLD = 0.1       # DTR을 내리고 최소한 유지할 시간 (USR S25 기본 0.05초보다 넉넉히)
+DTR_HANGUP_TIMEOUT = 3    # DTR을 내린 뒤 DCD가 꺼지기를 기다리는 최대 시간
+ESCAPE_GUARD_TIME = 1.0   # +++ 앞뒤로 조용해야 하는 시간 (Hayes S12 기본 50 = 1초)
+COMMAND_TIMEOUT = 3       # AT 명령의 OK 응답을 기다리는 최대 시간
+
 CID_WAIT_SECONDS = 3  # 첫 RING 이후 CID 정보(NMBR=/NAME=)가 올 때까지 기다리는 시간
 
 
-def reopen_modem(ser):
-    # 물리 UART에서 select-ready-but-empty-read 오류가 나면 그 fd는 더 이상
-    # 신뢰할 수 없다고 보고 포트를 닫았다가 다시 연다. 재모뎀설정(AT 시퀀스)
-    # 은 다시 하지 않음 - RING/CONNECT 대기 도중 재시도이므로 DTR/RTS만
-    # 다시 assert해서 다음 RING을 받을 준비만 갖춘다.
+def assert_control_lines(ser):
+    # DTR/RTS를 켠다(serve()의 설명 참고). 모뎀 흉내용 PTY(tools/fake_modem.py)에는 모뎀 제어선이 없어서 ioctl이
+    # ENOTTY로 실패하는데, 그건 무시한다.
     try:
-        ser.close()
-    except Exception:
-        pass
-    time.sleep(0.5)
-    new_ser = serial.Serial(MODEM_PORT, BAUDRATE, timeout=0.01, rtscts=True)
-    new_ser.dtr = True
-    new_ser.rts = True
-    log(f'[{MODEM_PORT}] 포트 재시작 완료')
-    return new_ser
-
-def modem_handler():
-    ser = None
-    try:
-        # 1. 모뎀 초기화
-        ser = serial.Serial(MODEM_PORT, BAUDRATE, timeout=0.01, rtscts=True)
-        # DTR/RTS를 명시적으로 assert. pyserial 기본 상태만으로는 이 환경에서
-        # 모뎀이 CONNECT를 띄우고도 데이터를 전송하지 않는 문제가 있었음.
         ser.dtr = True
         ser.rts = True
-        log(f'[{MODEM_PORT}] 모뎀 초기화 완료')
-
-        # 2. 모뎀 설정 (AT 명령어)
-        # ATZ는 리셋이라 응답이 느리게 오므로 명령별로 더 넉넉히 대기
-        for cmd in MODEM_INIT_COMMANDS:
-            ser.write(cmd)
-            wait = 1.0 if cmd == b'ATZ\r' else 0.3
-            time.sleep(wait)
-            resp = ser.read(256).decode('utf-8', errors='ignore').strip()
-            log_verbose(f'[{MODEM_PORT}] {cmd.decode().strip()} -> {resp or "(응답 없음)"}')
-        log(f'[{MODEM_PORT}] 모뎀 설정 완료')
+    except OSError as e:
+        if e.errno != errno.ENOTTY:
+            raise
 
-        while True:
-            # 3. RING 신호 감지
-            # 실제 물리 UART 라인이라 회선 잡음/브레이크 신호 등으로 인해
-            # select()는 read-ready라고 하는데 실제로는 0바이트가 오는
-            # SerialException이 통화 중(relay_modem_to_pty)뿐 아니라 이
-            # RING 대기 루프에서도 이론상 발생할 수 있음. 여기서 안 잡으면
-            # 아래 바깥쪽 except가 modem_handler() 자체를 끝내버려서
-            # (재시작 루프 없이) 데몬이 통째로 죽는다 - 컨테이너가 재시작될
-            # 때까지 다음 RING을 영영 못 받는 심각한 장애로 이어짐.
-            # 포트를 닫았다 다시 열어서 복구를 시도하고 계속 진행한다.
-            try:
-                line = ser.readline().decode('utf-8', errors='ignore').strip()
-            except serial.SerialException as e:
-                log(f'RING 대기 중 시리얼 오류 (포트 재시작 시도): {e}')
-                ser = reopen_modem(ser)
-                continue
-            if 'RING' in line:
-                log(f'[{MODEM_PORT}] RING')
-
-                # 3.5 발신자번호(CID) 대기. NMBR=/NAME= 줄은 보통 첫 번째와
-                # 두 번째 RING 사이에 옴 - 곧바로 ATA로 받아버리면 그 정보를
-                # 영영 못 봄. 짧게 몇 초만 더 읽어서 CID 줄이 오면 로그로 남기고,
-                # 그 사이 RING이 또 오면 무시(이미 응답 준비 중이므로).
-                cid_deadline = time.time() + CID_WAIT_SECONDS
-                while time.time() < cid_deadline:
-                    ser.timeout = max(0.01, cid_deadline - time.time())
-                    try:
-                        cid_line = ser.readline().decode('utf-8', errors='ignore').strip()
-                    except serial.SerialException:
-                        break
-                    finally:
-                        ser.timeout = 0.01
-                    if cid_line.startswith('NMBR') or cid_line.startswith('NAME'):
-                        log(f'[{MODEM_PORT}] {cid_line}')
-
-                # 4. 모뎀 응답 (ATA)
-                ser.write(b'ATA\r')   # 전화 받기
-
-                # 5. CONNECT 메시지 확인
-                connect_received = False
-                start_time = time.time()
-                serial_broke_mid_wait = False
-                while time.time() - start_time < CONNECT_TIMEOUT:
-                    try:
-                        line = ser.readline().decode('utf-8', errors='ignore').strip()
-                    except serial.SerialException as e:
-                        log(f'CONNECT 대기 중 시리얼 오류 (포트 재시작 시도): {e}')
-                        ser = reopen_modem(ser)
-                        serial_broke_mid_wait = True
-                        break
-                    if 'CONNECT' in line:
-                        log(f'[{MODEM_PORT}] {line}')
-                        connect_received = True
-                        break
-                    elif line:
-                        # CONNECT가 아닌 응답(협상 재시도/에러 코드 등)도 남겨야
-                        # CONNECT 실패 원인을 나중에 로그로 추적할 수 있다.
-                        # 예전엔 여기서 아무것도 안 남겨서 "CONNECT 실패"만
-                        # 보이고 그 사이 모뎀이 뭘 시도했는지 알 방법이 없었음.
-                        log_verbose(f'[{MODEM_PORT}] CONNECT 대기 중 응답: {line}')
-                    time.sleep(0.1)
-
-                if serial_broke_mid_wait:
-                    continue  # 다음 RING 대기
-
-                if not connect_received:
-                    log(f'[{MODEM_PORT}] CONNECT 실패')
-                    ser.write(b'ATH\r')  # 연결 끊기
-                    continue  # 다음 RING 대기
-
-                # 6. PTY 생성 및 BBS 실행
-                master_fd, slave_fd = pty.openpty()
-                # openpty() 직후 slave는 기본 cooked 모드(ICANON/ECHO/ISIG,
-                # OPOST/ONLCR 등)로 남아있음. 실측 결과 이 기본 모드에서도
-                # EUC-KR 바이트 자체는 손상 없이 그대로 전달됨(줄바꿈만
-                # \n -> \r\n으로 바뀌는 정상적인 동작) - 그래도 원격 회선
-                # 특유의 타이밍/개행 처리에 어떤 오작동 여지도 남기지 않도록
-                # slave를 완전 raw/8비트-투명 모드로 고정해 둔다. bbs.py
-                # 쪽 getchar()가 첫 입력 시점에 자기 stdin(=이 slave)을 raw로
-                # 바꾸긴 하지만, 그 전에 출력되는 환영 화면/인코딩 선택 화면
-                # 구간은 이 설정이 없으면 계속 cooked 모드로 나간다.
-                tty.setraw(slave_fd)
-                log(f'[{MODEM_PORT}] PTY 생성 완료 (raw 모드 설정)')
-
-                # stderr는 절대로 slave_fd(모뎀으로 나가는 통로)에 물리면 안 됨.
-                # 예전에는 stderr=slave_fd였는데, bbs.py에서 처리 안 된
-                # 예외가 나면 트레이스백이 고스란히 모뎀 쪽으로 나가면서(사용자
-                # 화면엔 의미 없는 텍스트/무응답) docker logs에는 아무 흔적도
-                # 안 남았음 - "이유 없이 멈췄다"처럼 보인 원인 중 하나.
-                # 별도 파이프로 빼서 컨테이너 로그에 찍히게 한다.
-                proc = subprocess.Popen(
-                    BBS_COMMAND,
-                    stdin=slave_fd,
-                    stdout=slave_fd,
-                    stderr=subprocess.PIPE,
-                    cwd=os.getcwd(),
-                    close_fds=True
-                )
-                os.close(slave_fd)  # 자식 프로세스에서만 사용
-
-                threading.Thread(
-                    target=log_bbs_stderr, args=(proc,), daemon=True
-                ).start()
-
-                # 7. 데이터 중계(양방향 각각 별도 스레드)
-                relay_thread = threading.Thread(
-                    target=data_relay,
-                    args=(ser, master_fd, proc)
-                )
-                relay_thread.start()
-                # 회선이 한 개뿐이라 통화는 항상 하나만 진행됨. 통화 중에는
-                # 위 RING/CONNECT 대기 코드(및 그 안의 reopen_modem())가
-                # 같은 ser 객체를 동시에 건드리면 안 되므로, 릴레이 스레드가
-                # 끝날 때까지 여기서 블로킹한다. (이걸 안 하면 메인 루프가
-                # 통화 중에도 계속 RING을 폴링하다가 relay_modem_to_pty()가
-                # 쓰고 있는 ser를 reopen_modem()이 close()해버리는 레이스가
-                # 발생함 - self.fd가 None이 된 채로 다른 스레드가 read()를
-                # 계속 호출해서 TypeError로 이어졌던 원인.)
-                relay_thread.join()
-
-            time.sleep(0.1)
-
-    except serial.SerialException as e:
-        log(f'시리얼 포트 오류: {e}')
-    except Exception as e:
-        log(f'기타 오류: {e}')
-    finally:
-        if ser:
-            ser.close()
-            log('모뎀 연결 종료')
 
-def log_bbs_stderr(proc):
-    # bbs.py의 stderr(트레이스백 등)를 컨테이너 로그로 흘려보냄.
-    try:
-        for line in iter(proc.stderr.readline, b''):
+class CarrierWatch:
+    """통화 중 캐리어가 끊겼는지 본다(모뎀 -> PTY 중계에서 받은 바이트마다).
+
+    예전엔 받은 바이트를 전부 버퍼에 이어 붙이고 줄 단위로 잘라 decode().upper()
+    해서 "NO CARRIER"를 찾았다. ZMODEM 업로드처럼 바이너리가 쏟아질 때는 청크마다
+    복사/디코딩을 반복했고, 줄바꿈 바이트가 한동안 없으면 버퍼가 계속 자라면서
+    청크마다 버퍼 전체를 다시 훑었다(누적 O(n^2)).
+
+    여기서는 디코딩 없이 바이트 그대로 bytes.find()로 찾는다. 패턴이 청크 경계에
+    걸칠 수 있으므로 직전 청크의 끝 len(NO_CARRIER)-1바이트만 남겨 두고, 그
+    꼬리 + 새 청크 앞부분만 한 번 더 본다 - 청크당 일은 청크 길이에 비례하고
+    남겨 두는 상태는 몇 바이트뿐이다. 모뎀 결과 코드는 대문자로 오므로(ATV1)
+    대소문자 변환은 하지 않는다.
+
+    BBS_MODEM_DCD=1이면 모뎀의 DCD(캐리어 검출) 선도 본다 - 결과 코드가 유실되거나
+    모뎀이 결과 코드를 안 보내도(ATQ1) 끊긴 걸 알 수 있다. 데이터가 없을 때
+    DCD_POLL_INTERVAL마다 한 번씩만 읽는다. 제어선이 없는 장치(PTY)면 조용히
+    결과 코드만 보는 쪽으로 돌아간다.
+    """
+
+    NO_CARRIER = b'NO CARRIER'
+    DCD_POLL_INTERVAL = 0.1
+
+    def __init__(self, ser=None, use_dcd=None):
+        self._ser = ser
+        self._use_dcd = USE_DCD if use_dcd is None else use_dcd
+        self._keep = len(self.NO_CARRIER) - 1
+        self._tail = b''
+        self._next_dcd_check = 0.0
+
+    def feed(self, data):
+        """받은 바이트를 넘긴다. 캐리어가 끊겼으면 이유(로그용 문자열), 아니면 None."""
+        pattern = self.NO_CARRIER
+        keep = self._keep
+        if self._tail and pattern in self._tail + data[:keep]:
+            return 'NO CARRIER'
+        if data.find(pattern) >= 0:
+            return 'NO CARRIER'
+        if len(data) >= keep:
+            self._tail = data[-keep:]
+        else:
+            self._tail = (self._tail + data)[-keep:]
+        return self.check_dcd()
+
+    def check_dcd(self):
+        if not self._use_dcd or self._ser is None:
+            return None
+        now = time.monotonic()
+        if now < self._next_dcd_check:
+            return None
+        self._next_dcd_check = now + self.DCD_POLL_INTERVAL
+        try:
+            carrier = self._ser.cd
+        except OSError as e:
+            if e.errno != errno.ENOTTY:
+                raise
+            self._use_dcd = False
+            return None
+        return None if carrier else 'DCD 꺼짐 (캐리어 없음)'
+
+
+class LineSupervisor:
+    """모뎀 상태선(DCD/RI/DTR)으로 회선을 본다.
+
+    예전엔 RING도 캐리어 끊김도 모뎀이 보내는 글자(RING, NO CARRIER)로만 알았고,
+    통화를 끊을 때는 1초 쉬고 +++, 2초 쉬고 ATH, 다시 1초를 고정으로 쉬었다 -
+    통화가 끝나고 회선이 다음 전화를 받을 수 있을 때까지 매번 4초 넘게 걸렸다.
+
+    제어선이 있는 진짜 시리얼 포트면:
+      RING    - RI 선이 켜지는 순간(ring_edge)
+      끊김    - DCD 선이 꺼짐(AT&C1, CarrierWatch)
+      끊기    - DTR을 잠깐 내린다(AT&D2 - 모뎀이 전화를 끊고 명령 모드로 감).
+                DCD가 꺼지는 걸 확인하면 바로 DTR을 다시 올리고 끝.
+    TIOCMIWAIT는 타임아웃이 없고 드라이버마다 지원이 달라서, TIOCMGET(pyserial
+    cd/ri)을 POLL_INTERVAL마다 읽는다.
+
+    모뎀 흉내용 PTY처럼 제어선이 없으면(ENOTTY) 예전처럼 글자로 처리하되 고정
+    대기 대신 응답(OK)이 오는 즉시 넘어간다. 캐리어가 이미 끊긴 뒤(NO CARRIER)면
+    모뎀이 이미 명령 모드라서 +++ 없이 ATH만 보낸다.
+    """
+
+    POLL_INTERVAL = 0.02
+
+    def __init__(self, ser, port):
+        self.ser = ser
+        self.port = port
+        self._ri = False
+        try:
+            self._ri = ser.ri
+            self.has_status_lines = True
+        except OSError as e:
+            if e.errno != errno.ENOTTY:
+                raise
+            self.has_status_lines = False
+
+    def ring_edge(self):
+        """RI 선이 꺼져 있다가 켜졌으면 True(제어선이 없으면 항상 False)."""
+        if not self.has_status_lines:
+            return False
+        ri = self.ser.ri
+        edge = ri and not self._ri
+        self._ri = ri
+        return edge
+
+    def wait_for(self, predicate, timeout):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+        return True
+
+    def command(self, cmd, timeout=COMMAND_TIMEOUT):
+        """AT 명령을 보내고 결과 코드(OK/ERROR/NO CARRIER)가 올 때까지만
+        기다린다. 받은 응답 문자열을 반환(시간 초과면 그때까지 받은 것)."""
+        self.ser.write(cmd)
+        self.ser.flush()
+        # 줄 단위로 읽어서 결과 코드 줄에서 멈춘다 - 그 뒤에 바로 이어 오는
+        # RING은 읽지 않고 RING 대기 루프에 남겨 둔다.
+        lines = []
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            line = self.ser.readline().decode('utf-8', errors='ignore').strip()
             if not line:
+                continue
+            lines.append(line)
+            if line in ('OK', 'ERROR', 'NO CARRIER'):
                 break
-            log('[bbs stderr] ' + line.decode('utf-8', errors='ignore').rstrip())
-    except Exception as e:
-        log(f'[bbs stderr 읽기 오류] {e}')
-    finally:
+        return ' / '.join(lines)
+
+    def hangup(self, carrier_lost=False):
+        if self.has_status_lines:
+            t0 = time.monotonic()
+            self.ser.dtr = False
+            time.sleep(DTR_DROP_HOLD)
+            dropped = self.wait_for(lambda: not self.ser.cd, DTR_HANGUP_TIMEOUT)
+            self.ser.dtr = True
+            if dropped:
+                log_verbose(f'[{self.port}] DTR로 통화 끊음 ({(time.monotonic() - t0) * 1000:.0f}ms)')
+                return
+            log(f'[{self.port}] DTR을 내려도 DCD가 안 꺼짐 - +++/ATH로 재시도')
+            carrier_lost = False
+        if not carrier_lost:
+            # 데이터 모드 -> 명령 모드. +++ 앞뒤로 ESCAPE_GUARD_TIME만큼 조용해야
+            # 모뎀이 데이터가 아닌 이스케이프로 알아본다(뒤쪽 대기는 OK가 올
+            # 때까지 기다리는 것으로 대신한다).
+            time.sleep(ESCAPE_GUARD_TIME)
+            self.command(b'+++', timeout=ESCAPE_GUARD_TIME + COMMAND_TIMEOUT)
+        resp = self.command(b'ATH\r')
+        log_verbose(f'[{self.port}] ATH -> {resp or "(응답 없음)"}')
+
+
+class ModemLine:
+    """모뎀 한 대(회선 하나). 예전엔 모듈 전체가 MODEM_PORT 하나만 다뤘는데,
+    그 흐름(초기화 -> RING 대기 -> ATA -> CONNECT -> PTY + bbs.py -> 중계 ->
+    끊기) 그대로를 장치마다 객체 하나로 묶었다. 회선마다 스레드 하나가
+    run()을 돌리고, 로그는 장치 경로를 태그로 달아서 한 로거로 같이 찍는다."""
+
+    def __init__(self, port):
+        self.port = port
+
+    def run(self):
+        # 마지막 안전망: serve()가 예상 못한 이유로 리턴/예외 종료해도
+        # 이 회선은 포트를 다시 초기화해서 서비스를 이어간다 - 다른 회선은
+        # 영향을 받지 않는다. (Docker restart 정책에 기대면 컨테이너 전체가
+        # 내려갔다 올라오는 동안 모든 회선의 RING을 놓치므로, 회선 단위로
+        # 먼저 복구를 시도하는 편이 낫다.)
+        while True:
+            try:
+                self.serve()
+            except Exception as e:
+                log(f'[{self.port}] serve() 최상위 예외, 재시작: {e}')
+            log(f'[{self.port}] serve() 종료됨 - 5초 후 재시작')
+            time.sleep(5)
+
+    def reopen_modem(self, ser):
+        # 물리 UART에서 select-ready-but-empty-read 오류가 나면 그 fd는 더 이상
+        # 신뢰할 수 없다고 보고 포트를 닫았다가 다시 연다. 재모뎀설정(AT 시퀀스)
+        # 은 다시 하지 않음 - RING/CONNECT 대기 도중 재시도이므로 DTR/RTS만
+        # 다시 assert해서 다음 RING을 받을 준비만 갖춘다.
         try:
-            proc.stderr.close()
+            ser.close()
         except Exception:
             pass
+        time.sleep(0.5)
+        new_ser = serial.Serial(self.port, BAUDRATE, timeout=0.01, rtscts=True)
+        assert_control_lines(new_ser)
+        log(f'[{self.port}] 포트 재시작 완료')
+        return new_ser
 
-def data_relay(ser, master_fd, proc):
-    log(f"[{MODEM_PORT}] 데이터 중계 시작")
-    disconnect_event = threading.Event()
+    def serve(self):
+        ser = None
+        try:
+            # 1. 모뎀 초기화
+            ser = serial.Serial(self.port, BAUDRATE, timeout=0.01, rtscts=True)
+            # DTR/RTS를 명시적으로 assert. pyserial 기본 상태만으로는 이 환경에서
+            # 모뎀이 CONNECT를 띄우고도 데이터를 전송하지 않는 문제가 있었음.
+            assert_control_lines(ser)
+            supervisor = LineSupervisor(ser, self.port)
+            log(f'[{self.port}] 모뎀 초기화 완료'
+                f'{"" if supervisor.has_status_lines else " (모뎀 제어선 없음 - 결과 코드로만 처리)"}')
 
-    # 모뎀 → PTY 방향
-    def relay_modem_to_pty():
-        buffer = b''
-        last_data_time = time.time()
-        while proc.poll() is None and not disconnect_event.is_set():
+            # 2. 모뎀 설정 (AT 명령어)
+            # ATZ는 리셋이라 응답이 느리게 오므로 명령별로 더 넉넉히 대기
+            for cmd in MODEM_INIT_COMMANDS:
+                ser.write(cmd)
+                wait = 1.0 if cmd == b'ATZ\r' else 0.3
+                time.sleep(wait)
+                resp = ser.read(256).decode('utf-8', errors='ignore').strip()
+                log_verbose(f'[{self.port}] {cmd.decode().strip()} -> {resp or "(응답 없음)"}')
+            log(f'[{self.port}] 모뎀 설정 완료')
+
+            while True:
+                # 3. RING 신호 감지
+                # 실제 물리 UART 라인이라 회선 잡음/브레이크 신호 등으로 인해
+                # select()는 read-ready라고 하는데 실제로는 0바이트가 오는
+                # SerialException이 통화 중(relay_modem_to_pty)뿐 아니라 이
+                # RING 대기 루프에서도 이론상 발생할 수 있음. 여기서 안 잡으면
+                # 아래 바깥쪽 except가 modem_handler() 자체를 끝내버려서
+                # (재시작 루프 없이) 데몬이 통째로 죽는다 - 컨테이너가 재시작될
+                # 때까지 다음 RING을 영영 못 받는 심각한 장애로 이어짐.
+                # 포트를 닫았다 다시 열어서 복구를 시도하고 계속 진행한다.
+                try:
+                    line = ser.readline().decode('utf-8', errors='ignore').strip()
+                except serial.SerialException as e:
+                    log(f'[{self.port}] RING 대기 중 시리얼 오류 (포트 재시작 시도): {e}')
+                    ser = self.reopen_modem(ser)
+                    supervisor = LineSupervisor(ser, self.port)
+                    continue
+                # RING 결과 코드 또는 RI 선. 결과 코드가 끊겨 들어오거나 꺼져
+                # 있어도(ATQ1) RI는 벨이 울리는 순간 켜진다.
+                if 'RING' in line or supervisor.ring_edge():
+                    log(f'[{self.port}] RING')
+
+                    # 3.5 발신자번호(CID) 대기. NMBR=/NAME= 줄은 보통 첫 번째와
+                    # 두 번째 RING 사이에 옴 - 곧바로 ATA로 받아버리면 그 정보를
+                    # 영영 못 봄. 짧게 몇 초만 더 읽어서 CID 줄이 오면 로그로 남기고,
+                    # 그 사이 RING이 또 오면 무시(이미 응답 준비 중이므로).
+                    cid_deadline = time.time() + CID_WAIT_SECONDS
+                    while time.time() < cid_deadline:
+                        ser.timeout = max(0.01, cid_deadline - time.time())
+                        try:
+                            cid_line = ser.readline().decode('utf-8', errors='ignore').strip()
+                        except serial.SerialException:
+                            break
+                        finally:
+                            ser.timeout = 0.01
+                        if cid_line.startswith('NMBR') or cid_line.startswith('NAME'):
+                            log(f'[{self.port}] {cid_line}')
+
+                    # 4. 모뎀 응답 (ATA)
+                    ser.write(b'ATA\r')   # 전화 받기
+
+                    # 5. CONNECT 메시지 확인
+                    connect_received = False
+                    line_bps = None
+                    start_time = time.time()
+                    serial_broke_mid_wait = False
+                    while time.time() - start_time < CONNECT_TIMEOUT:
+                        try:
+                            line = ser.readline().decode('utf-8', errors='ignore').strip()
+                        except serial.SerialException as e:
+                            log(f'[{self.port}] CONNECT 대기 중 시리얼 오류 (포트 재시작 시도): {e}')
+                            ser = self.reopen_modem(ser)
+                            supervisor = LineSupervisor(ser, self.port)
+                            serial_broke_mid_wait = True
+                            break
+                        if 'CONNECT' in line:
+                            log(f'[{self.port}] {line}')
+                            connect_received = True
+                            speed = _CONNECT_SPEED_RE.search(line)
+                            if speed:
+                                line_bps = int(speed.group(1))
+                            break
+                        elif line:
+                            # CONNECT가 아닌 응답(협상 재시도/에러 코드 등)도 남겨야
+                            # CONNECT 실패 원인을 나중에 로그로 추적할 수 있다.
+                            # 예전엔 여기서 아무것도 안 남겨서 "CONNECT 실패"만
+                            # 보이고 그 사이 모뎀이 뭘 시도했는지 알 방법이 없었음.
+                            log_verbose(f'[{self.port}] CONNECT 대기 중 응답: {line}')
+                        time.sleep(0.1)
+
+                    if serial_broke_mid_wait:
+                        continue  # 다음 RING 대기
+
+                    if not connect_received:
+                        log(f'[{self.port}] CONNECT 실패')
+                        ser.write(b'ATH\r')  # 연결 끊기
+                        continue  # 다음 RING 대기
+
+                    # 6. PTY 생성 및 BBS 실행
+                    master_fd, slave_fd = pty.openpty()
+                    # openpty() 직후 slave는 기본 cooked 모드(ICANON/ECHO/ISIG,
+                    # OPOST/ONLCR 등)로 남아있음. 실측 결과 이 기본 모드에서도
+                    # EUC-KR 바이트 자체는 손상 없이 그대로 전달됨(줄바꿈만
+                    # \n -> \r\n으로 바뀌는 정상적인 동작) - 그래도 원격 회선
+                    # 특유의 타이밍/개행 처리에 어떤 오작동 여지도 남기지 않도록
+                    # slave를 완전 raw/8비트-투명 모드로 고정해 둔다. bbs.py
+                    # 쪽 getchar()가 첫 입력 시점에 자기 stdin(=이 slave)을 raw로
+                    # 바꾸긴 하지만, 그 전에 출력되는 환영 화면/인코딩 선택 화면
+                    # 구간은 이 설정이 없으면 계속 cooked 모드로 나간다.
+                    tty.setraw(slave_fd)
+                    log(f'[{self.port}] PTY 생성 완료 (raw 모드 설정)')
+
+                    # stderr는 절대로 slave_fd(모뎀으로 나가는 통로)에 물리면 안 됨.
+                    # 예전에는 stderr=slave_fd였는데, bbs.py에서 처리 안 된
+                    # 예외가 나면 트레이스백이 고스란히 모뎀 쪽으로 나가면서(사용자
+                    # 화면엔 의미 없는 텍스트/무응답) docker logs에는 아무 흔적도
+                    # 안 남았음 - "이유 없이 멈췄다"처럼 보인 원인 중 하나.
+                    # 별도 파이프로 빼서 컨테이너 로그에 찍히게 한다.
+                    command = BBS_COMMAND + ([f'--line-bps={line_bps}'] if line_bps else [])
+                    proc = subprocess.Popen(
+                        command,
+                        stdin=slave_fd,
+                        stdout=slave_fd,
+                        stderr=subprocess.PIPE,
+                        cwd=os.getcwd(),
+                        close_fds=True
+                    )
+                    os.close(slave_fd)  # 자식 프로세스에서만 사용
+
+                    threading.Thread(
+                        target=self.log_bbs_stderr, args=(proc,), daemon=True
+                    ).start()
+
+                    # 7. 데이터 중계(양방향 각각 별도 스레드)
+                    # 회선 하나에서 통화는 항상 하나만 진행됨. 통화 중에는
+                    # 위 RING/CONNECT 대기 코드(및 그 안의 reopen_modem())가
+                    # 같은 ser 객체를 동시에 건드리면 안 되므로, 중계가 끝날
+                    # 때까지 이 회선의 스레드는 여기서 블로킹한다. (이걸 안 하면
+                    # 통화 중에도 계속 RING을 폴링하다가 relay_modem_to_pty()가
+                    # 쓰고 있는 ser를 reopen_modem()이 close()해버리는 레이스가
+                    # 발생함 - self.fd가 None이 된 채로 다른 스레드가 read()를
+                    # 계속 호출해서 TypeError로 이어졌던 원인.) 다른 회선은 각자
+                    # 스레드에서 따로 RING을 기다리므로 영향이 없다.
+                    self.data_relay(ser, supervisor, master_fd, proc)
+
+                time.sleep(0.1)
+
+        except serial.SerialException as e:
+            log(f'[{self.port}] 시리얼 포트 오류: {e}')
+        except Exception as e:
+            log(f'[{self.port}] 기타 오류: {e}')
+        finally:
+            if ser:
+                ser.close()
+                log(f'[{self.port}] 모뎀 연결 종료')
+
+    def log_bbs_stderr(self, proc):
+        # bbs.py의 stderr(트레이스백 등)를 컨테이너 로그로 흘려보냄.
+        try:
+            for line in iter(proc.stderr.readline, b''):
+                if not line:
+                    break
+                log(f'[bbs stderr {self.port}] ' + line.decode('utf-8', errors='ignore').rstrip())
+        except Exception as e:
+            log(f'[{self.port}] bbs stderr 읽기 오류: {e}')
+        finally:
             try:
-                data = ser.read(1024)  # timeout이 설정되어 있으므로 무한 대기는 아님
-                if data:
-                    now = time.time()
-                    gap_ms = (now - last_data_time) * 1000
-                    log_io(MODEM_PORT, '수신', data, gap_ms)
-                    last_data_time = now
-                    # os.write()는 요청한 바이트 수보다 적게 쓰고 반환할 수
-                    # 있다(파이프/PTY 버퍼가 꽉 찬 경우 등) - 반환값을 확인 안
-                    # 하면 나머지가 조용히 유실된다(telnet.py의 동일 버그 수정
-                    # 참고). 다 쓸 때까지 반복한다.
-                    view = memoryview(data)
-                    while view:
-                        n = os.write(master_fd, view)
-                        view = view[n:]
-                    # 한 줄 버퍼에 누적해서 NO CARRIER 체크
-                    buffer += data
-                    # 줄 끝까지 읽어서 처리
-                    while b'\n' in buffer or b'\r' in buffer:
-                        if b'\n' in buffer:
-                            idx = buffer.index(b'\n')
-                        else:
-                            idx = buffer.index(b'\r')
-                        line = buffer[:idx+1].decode('utf-8', errors='ignore').strip().upper()
-                        # print(f"[MODEM LINE] {line}") # 디버깅용 로그
-                        if "NO CARRIER" in line:
-                            log(f"[{MODEM_PORT}] NO CARRIER")
-                            disconnect_event.set()
-                            try:
-                                os.close(master_fd)
-                            except Exception:
-                                pass
-                            try:
-                                proc.terminate()
-                            except Exception:
-                                pass
-                            return   # 즉시 종료
-                        buffer = buffer[idx + 1:]
+                proc.stderr.close()
             except Exception:
-                # 예전엔 여기서 그냥 break만 하고 끝났음. 그러면 이 스레드는
-                # 조용히 죽는데, master_fd/proc는 안 건드리니 반대쪽
-                # relay_pty_to_modem 스레드는 os.read(master_fd)에서 계속
-                # 블로킹된 채 남아있고(자식이 getchar()에서 막혀 아무것도 안
-                # 쓰면 영원히 안 풀림), data_relay()는 t2.join()에서 못 빠져
-                #나와 "데이터 중계 종료"도 못 찍고 좀비 세션으로 남았음.
-                # (다음 RING이 와도 같은 ser 객체를 이 죽은 스레드가 여전히
-                # write()하려 들 수 있어 CONNECT 인식 실패로 이어졌을 가능성)
-                # -> 예외 로그를 남기고, NO CARRIER 케이스와 동일하게 확실히
-                # 정리(disconnect_event set + master_fd 닫기 + proc 종료)한다.
-                log("모뎀→PTY 중계 오류:")
-                traceback.print_exc()
-                disconnect_event.set()
-                try:
-                    os.close(master_fd)
-                except Exception:
-                    pass
+                pass
+
+    def data_relay(self, ser, supervisor, master_fd, proc):
+        log(f"[{self.port}] 데이터 중계 시작")
+        disconnect_event = threading.Event()
+        carrier_lost = threading.Event()
+
+        # 모뎀 → PTY 방향
+        def relay_modem_to_pty():
+            watch = CarrierWatch(ser)
+            last_data_time = time.time()
+            while proc.poll() is None and not disconnect_event.is_set():
                 try:
-                    proc.terminate()
+                    data = ser.read(1024)  # timeout이 설정되어 있으므로 무한 대기는 아님
+                    if data:
+                        now = time.time()
+                        gap_ms = (now - last_data_time) * 1000
+                        log_io(self.port, '수신', data, gap_ms)
+                        last_data_time = now
+                        # os.write()는 요청한 바이트 수보다 적게 쓰고 반환할 수
+                        # 있다(파이프/PTY 버퍼가 꽉 찬 경우 등) - 반환값을 확인 안
+                        # 하면 나머지가 조용히 유실된다(telnet.py의 동일 버그 수정
+                        # 참고). 다 쓸 때까지 반복한다.
+                        view = memoryview(data)
+                        while view:
+                            n = os.write(master_fd, view)
+                            view = view[n:]
+                    lost = watch.feed(data) if data else watch.check_dcd()
+                    if lost:
+                        log(f"[{self.port}] {lost}")
+                        carrier_lost.set()
+                        disconnect_event.set()
+                        try:
+                            os.close(master_fd)
+                        except Exception:
+                            pass
+                        try:
+                            proc.terminate()
+                        except Exception:
+                            pass
+                        return   # 즉시 종료
                 except Exception:
-                    pass
-                return
+                    # 예전엔 여기서 그냥 break만 하고 끝났음. 그러면 이 스레드는
+                    # 조용히 죽는데, master_fd/proc는 안 건드리니 반대쪽
+                    # relay_pty_to_modem 스레드는 os.read(master_fd)에서 계속
+                    # 블로킹된 채 남아있고(자식이 getchar()에서 막혀 아무것도 안
+                    # 쓰면 영원히 안 풀림), data_relay()는 t2.join()에서 못 빠져
+                    #나와 "데이터 중계 종료"도 못 찍고 좀비 세션으로 남았음.
+                    # (다음 RING이 와도 같은 ser 객체를 이 죽은 스레드가 여전히
+                    # write()하려 들 수 있어 CONNECT 인식 실패로 이어졌을 가능성)
+                    # -> 예외 로그를 남기고, NO CARRIER 케이스와 동일하게 확실히
+                    # 정리(disconnect_event set + master_fd 닫기 + proc 종료)한다.
+                    log(f"[{self.port}] 모뎀→PTY 중계 오류:")
+                    traceback.print_exc()
+                    disconnect_event.set()
+                    try:
+                        os.close(master_fd)
+                    except Exception:
+                        pass
+                    try:
+                        proc.terminate()
+                    except Exception:
+                        pass
+                    return
 
-    # PTY → 모뎀 방향
-    def relay_pty_to_modem():
-        last_data_time = time.time()
-        while proc.poll() is None and not disconnect_event.is_set():
-            try:
-                data = os.read(master_fd, 1024)
-                if data:
-                    now = time.time()
-                    gap_ms = (now - last_data_time) * 1000
-                    log_io(MODEM_PORT, '송신', data, gap_ms)
-                    last_data_time = now
-                    ser.write(data)
-            except OSError:
-                # PTY 종료 시 OSError 발생 (정상 종료 경로)
-                break
-            except Exception:
-                log("PTY→모뎀 중계 오류:")
-                traceback.print_exc()
-                disconnect_event.set()
+        # PTY → 모뎀 방향
+        def relay_pty_to_modem():
+            last_data_time = time.time()
+            while proc.poll() is None and not disconnect_event.is_set():
                 try:
-                    proc.terminate()
+                    data = os.read(master_fd, 1024)
+                    if data:
+                        now = time.time()
+                        gap_ms = (now - last_data_time) * 1000
+                        log_io(self.port, '송신', data, gap_ms)
+                        last_data_time = now
+                        ser.write(data)
+                except OSError:
+                    # PTY 종료 시 OSError 발생 (정상 종료 경로)
+                    break
                 except Exception:
-                    pass
-                break
+                    log(f"[{self.port}] PTY→모뎀 중계 오류:")
+                    traceback.print_exc()
+                    disconnect_event.set()
+                    try:
+                        proc.terminate()
+                    except Exception:
+                        pass
+                    break
 
-    t1 = threading.Thread(target=relay_modem_to_pty)
-    t2 = threading.Thread(target=relay_pty_to_modem)
-    t1.start()
-    t2.start()
-    t1.join()
-    t2.join()
+        t1 = threading.Thread(target=relay_modem_to_pty)
+        t2 = threading.Thread(target=relay_pty_to_modem)
+        t1.start()
+        t2.start()
+        t1.join()
+        t2.join()
 
-    log(f"[{MODEM_PORT}] 데이터 중계 종료")
-    try:
-        os.close(master_fd)
-    except Exception:
-        pass
-    try:
-        proc.terminate()
-    except Exception:
-        pass
-    time.sleep(0.5)
-    hangup_modem(ser)
-
-def hangup_modem(ser):
-    # RING/CONNECT 대기 루프 쪽 reopen_modem()이 이미 포트를 닫고 새
-    # ser 객체로 교체했을 수 있음 (예: 통화 도중 시리얼 오류) - 그 경우
-    # 이 함수에 넘어온 ser는 의도적으로 닫힌 것이므로 에러가 아니라 그냥
-    # 조용히 넘어간다.
-    if ser is None or not ser.is_open:
-        log('통화 끊기 생략: 포트가 이미 닫혀 있음')
-        return
-    try:
-        # 모뎀에 명령 모드 진입 시그널 보내기
-        time.sleep(1)
-        ser.write(b'+++')
-        ser.flush()
-        time.sleep(2)
-        # 끊기 명령 전송
-        ser.write(b'ATH\r')
-        ser.flush()
-        time.sleep(1)
-    except Exception as e:
-        log(f'통화 끊기 에러: {e}')
+        log(f"[{self.port}] 데이터 중계 종료")
+        try:
+            os.close(master_fd)
+        except Exception:
+            pass
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+        # 예전엔 여기서 0.5초를 고정으로 쉬었다. 자식이 끝나는 걸 기다리되
+        # 끝나는 즉시 넘어간다.
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        self.hangup_modem(ser, supervisor, carrier_lost.is_set())
 
-if __name__ == "__main__":
-    # 마지막 안전망: modem_handler()가 예상 못한 이유로 리턴/예외 종료해도
-    # 프로세스 자체는 죽지 않고 포트를 다시 초기화해서 서비스를 이어간다.
-    # (Docker restart 정책에 기대면 컨테이너 전체가 내려갔다 올라오는 동안
-    # RING을 놓치므로, 프로세스 레벨에서 먼저 복구를 시도하는 편이 낫다.)
-    while True:
+    def hangup_modem(self, ser, supervisor, carrier_lost=False):
+        # RING/CONNECT 대기 루프 쪽 reopen_modem()이 이미 포트를 닫고 새
+        # ser 객체로 교체했을 수 있음 (예: 통화 도중 시리얼 오류) - 그 경우
+        # 이 함수에 넘어온 ser는 의도적으로 닫힌 것이므로 에러가 아니라 그냥
+        # 조용히 넘어간다.
+        if ser is None or not ser.is_open:
+            log(f'[{self.port}] 통화 끊기 생략: 포트가 이미 닫혀 있음')
+            return
+        t0 = time.monotonic()
         try:
-            modem_handler()
+            supervisor.hangup(carrier_lost)
         except Exception as e:
-            log(f'modem_handler() 최상위 예외, 재시작: {e}')
-        log('modem_handler() 종료됨 - 5초 후 재시작')
-        time.sleep(5)
+            log(f'[{self.port}] 통화 끊기 에러: {e}')
+        log(f'[{self.port}] 통화 끊음, 다음 RING 대기 ({(time.monotonic() - t0) * 1000:.0f}ms)')
+
+
+def dialup_server(ports=None):
+    # 회선마다 스레드 하나. 통화 중인 회선은 그 스레드가 중계에 묶여 있고,
+    # 나머지 회선은 각자 RING을 기다린다.
+    ports = ports or MODEM_PORTS
+    log(f'모뎀 회선 {len(ports)}개: {", ".join(ports)}')
+    threads = []
+    for port in ports:
+        line = ModemLine(port)
+        t = threading.Thread(target=line.run, name=f'modem-{port}', daemon=True)
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+
+
+if __name__ == "__main__":
+    dialup_server()
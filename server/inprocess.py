@@ -0,0 +1,117 @@
+import os
+import sys
+import socket
+import threading
+
+# 텔넷 서버 프로세스 안에서 바로 돌리는 세션(BBS_SESSION_MODE=inprocess).
+#
+# 기본 방식은 접속마다 PTY를 만들고 그 위에 bbs.py 프로세스(또는 sessionpool의
+# 워커)를 붙이는 것이라, 접속 하나에 파이썬 인터프리터 하나(수십 MB)가 든다.
+# 여기서는 PTY도 자식 프로세스도 없이 socketpair() 한 쌍을 만들어 한쪽은
+# telnet.py의 중계(PTY 마스터 자리)에, 다른 쪽은 세션 스레드의 입출력 fd로
+# 쓴다. 세션 코드(rawio/transport/zmodem_proc)는 전부 bbsio.session의 현재
+# 세션 fd로 입출력하므로 스레드마다 Session을 하나씩 붙여 주면 그대로 돈다.
+#
+# 메뉴 코드는 rawinput()/getchar() 같은 블로킹 호출로 짜여 있어서 세션을
+# asyncio 코루틴으로 바로 돌릴 수는 없다 - 세션 하나가 스레드 하나를 쓰고,
+# 소켓 중계는 여전히 이벤트 루프가 맡는다. 그래도 프로세스 하나, import 한 번,
+# 저장소(게시글 색인/SQLite 연결 캐시) 하나를 모든 세션이 같이 쓴다.
+#
+# 제약: PTY가 아니라서 tcflush 등 termios 호출은 쓰지 못하고(Session이 소켓에
+# 맞게 대신 처리), 세션의 stderr 출력은 접속별로 분리되지 않고 텔넷 서버
+# 로그에 바로 섞인다. 세션 하나가 예외로 죽어도 서버는 영향을 받지 않지만,
+# 프로세스를 통째로 망가뜨리는 버그(메모리 누수, 전역 상태 오염)는 격리되지
+# 않는다.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_bbs = None
+_import_lock = threading.Lock()
+
+
+def preload():
+    """bbs 모듈(과 core/bbsio 전체)을 미리 import한다. 서버 시작 때 한 번
+    불러두면 첫 접속이 import 시간을 기다리지 않는다."""
+    global _bbs
+    with _import_lock:
+        if _bbs is None:
+            if ROOT not in sys.path:
+                sys.path.insert(0, ROOT)
+            import bbs
+            _bbs = bbs
+    return _bbs
+
+
+class InProcessSession:
+    """스레드에서 돌고 있는 세션 하나. telnet.py가 Popen/PooledSession을
+    다루던 것처럼 poll()/terminate()를 제공한다. stderr 파이프는 없다(None)."""
+
+    stderr = None
+
+    def __init__(self, sock, channel):
+        self.sock = sock
+        self.channel = channel
+        self.returncode = None
+        self.session = None
+        self.window_size = None
+        self._lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._run, daemon=True,
+                         name=f'bbs-session-{sock.fileno()}').start()
+
+    def poll(self):
+        return self.returncode
+
+    def set_window_size(self, cols, rows):
+        """텔넷 NAWS로 받은 창 크기. 세션 스레드가 아직 Session을 만들기 전이면
+        만들 때 넘겨준다."""
+        with self._lock:
+            self.window_size = (cols, rows)
+            if self.session is not None:
+                self.session.window_size = self.window_size
+
+    def terminate(self):
+        # 중계 쪽이 자기 끝을 닫으면 세션은 다음 읽기에서 EOF를 받고 끝난다.
+        # 여기서는 세션 쪽 소켓도 shutdown해서, 쓰다가 막혀 있던 세션까지
+        # 바로 EPIPE로 깨운다(fd는 세션 스레드가 끝나면서 닫는다).
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        code = 1
+        try:
+            bbs = preload()
+            from bbsio.session import Session, activate
+            fd = self.sock.fileno()
+            session = Session(fd, fd, channel=self.channel)
+            with self._lock:
+                session.window_size = self.window_size
+                self.session = session
+            activate(session)
+            try:
+                code = bbs.run(self.channel)
+            finally:
+                activate(None)
+        finally:
+            with self._lock:
+                self._closed = True
+                self.sock.close()
+            self.returncode = code
+
+
+def spawn_session(channel):
+    """세션 스레드를 시작하고 (중계 쪽 fd, InProcessSession)을 반환한다.
+    중계 쪽 fd는 PTY 마스터처럼 os.read()/os.write()로 쓰면 된다."""
+    relay_sock, session_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        session = InProcessSession(session_sock, channel)
+    except Exception:
+        relay_sock.close()
+        session_sock.close()
+        raise
+    return relay_sock.detach(), session
@@ -25,4 +25,5 @@ def log_io(tag, direction, data, gap_ms=None):
     if not VERBOSE:
         return
     prefix = f"{gap_ms:.0f}ms 공백 후 " if gap_ms is not None and gap_ms > 300 else ""
-    log(f"[{tag}] {prefix}{len(data)}바이트 {direction}: {data[:16]!r}")
+    # data는 bytes 말고 memoryview(텔넷 수신 버퍼)일 수도 있다.
+    log(f"[{tag}] {prefix}{len(data)}바이트 {direction}: {bytes(data[:16])!r}")
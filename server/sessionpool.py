@@ -0,0 +1,312 @@
+import os
+import sys
+import signal
+import socket
+import subprocess
+import threading
+import traceback
+
+# 미리 띄워둔(warm) 세션 워커 풀.
+#
+# 예전엔 텔넷 접속마다 subprocess.Popen(['python3', '-u', 'bbs.py', ...])로
+# 새 인터프리터를 띄웠는데, 파이썬 기동 + wcwidth/core.board/core.login 등
+# import가 끝나야 첫 화면(인코딩 선택)이 나가서 접속 직후 한참 빈 화면이었다.
+# 여기서는 그 import까지 끝내 둔 워커 프로세스를 몇 개 대기시켜 두고, 접속이
+# 오면 PTY 슬레이브 fd를 유닉스 소켓(SCM_RIGHTS)으로 넘겨서 워커가 그 자리에서
+# 바로 bbs.run()을 돌리게 한다.
+#
+# 워커 하나는 한 번에 세션 하나만 돌리고, 끝나면 다음 세션을 받으러 대기열로
+# 돌아간다. 세션을 같은 프로세스에서 연달아 돌리면 모듈 전역에 남는 상태나
+# 메모리 누수가 쌓일 수 있어서 WORKER_MAX_SESSIONS번 쓰면 은퇴시키고 새로
+# 띄운다. 대기 중인 워커가 하나도 없으면 telnet.py가 예전처럼 bbs.py를 직접
+# 띄운다(풀은 순수 가속 장치 - 없어도 동작은 같다).
+#
+# 풀 <-> 워커 제어 소켓 메시지:
+#   풀 -> 워커: 채널 이름(b'telnet') + fd 두 개(PTY 슬레이브, stderr 파이프 쓰기쪽)
+#   워커 -> 풀: b'R\n'(준비 완료), b'D<종료코드>\n'(세션 끝)
+#   풀이 제어 소켓을 닫으면 워커는 종료한다.
+#
+# 접속이 끊기면 telnet.py는 PTY 마스터를 닫고 terminate()를 부르는데, 마스터를
+# 읽느라 블로킹된 중계 스레드가 있는 동안은 닫아도 마스터가 실제로 해제되지
+# 않아서 워커 쪽 세션이 EIO를 못 받을 수 있다. 그래서 terminate()는 진짜 회선이
+# 끊겼을 때처럼 워커에 SIGHUP을 보내고, 워커는 세션 도중이면 이를
+# ConnectionClosed로 바꿔 세션을 정상 종료시킨다.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# BBS_POOL_SIZE: 미리 띄워둘 대기 워커 수(0이면 풀을 안 쓰고 매번 bbs.py를 띄움).
+# BBS_WORKER_MAX_SESSIONS: 워커 하나가 은퇴하기 전까지 처리할 세션 수.
+POOL_SIZE = int(os.environ.get('BBS_POOL_SIZE', '4'))
+WORKER_MAX_SESSIONS = int(os.environ.get('BBS_WORKER_MAX_SESSIONS', '50'))
+
+WORKER_COMMAND = ['python3', '-u', os.path.abspath(__file__), '--worker']
+
+# terminate()로 SIGHUP을 보낸 뒤 이 시간 안에 세션이 안 끝나면(rz/sz 대기
+# 중 등) 워커째 SIGTERM으로 정리한다.
+TERMINATE_GRACE_SEC = 3
+
+
+class PooledSession:
+    """워커 안에서 돌고 있는 세션 하나. telnet.py가 subprocess.Popen 객체를
+    다루던 방식(poll()/terminate()/stderr) 그대로 쓸 수 있게 맞춰둔 것."""
+
+    def __init__(self, worker, stderr_fd):
+        self.worker = worker
+        self.stderr = os.fdopen(stderr_fd, 'rb')
+        self.returncode = None
+        self._done = threading.Event()
+        self._terminating = False
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.returncode
+
+    def terminate(self):
+        if self._done.is_set() or self._terminating:
+            return
+        self._terminating = True
+        self.worker.hangup()
+        threading.Thread(target=self._terminate_after_grace, daemon=True).start()
+
+    def _terminate_after_grace(self):
+        if not self._done.wait(TERMINATE_GRACE_SEC):
+            self.worker.kill()
+
+    def _finish(self, code):
+        if self.returncode is None:
+            self.returncode = code
+        self._done.set()
+
+
+class _Worker:
+    def __init__(self, pool):
+        self.pool = pool
+        self.sessions = 0
+        self.session = None
+        self.started = False
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.proc = subprocess.Popen(
+                WORKER_COMMAND + [str(child_sock.fileno())],
+                stdin=subprocess.DEVNULL,
+                cwd=pool.cwd,
+                pass_fds=(child_sock.fileno(),),
+            )
+        finally:
+            child_sock.close()
+        self.ctl = parent_sock
+        threading.Thread(target=self._monitor, daemon=True).start()
+
+    def start_session(self, slave_fd, channel):
+        err_r, err_w = os.pipe()
+        session = PooledSession(self, err_r)
+        self.session = session
+        self.sessions += 1
+        try:
+            socket.send_fds(self.ctl, [channel.encode()], [slave_fd, err_w])
+        finally:
+            os.close(err_w)
+        return session
+
+    def retire(self):
+        # 제어 소켓을 닫으면 워커는 다음 recv에서 EOF를 받고 스스로 끝난다.
+        try:
+            self.ctl.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def hangup(self):
+        try:
+            self.proc.send_signal(signal.SIGHUP)
+        except Exception:
+            pass
+
+    def kill(self):
+        try:
+            self.proc.terminate()
+        except Exception:
+            pass
+
+    def _monitor(self):
+        try:
+            for line in self.ctl.makefile('rb'):
+                if line.startswith(b'R'):
+                    self.pool._worker_started(self)
+                elif line.startswith(b'D'):
+                    session, self.session = self.session, None
+                    if session is not None:
+                        session._finish(int(line[1:] or 0))
+                    self.pool._worker_ready(self)
+        except Exception:
+            traceback.print_exc()
+        # 제어 소켓이 닫힘 = 워커가 끝났다(은퇴, 크래시, SIGTERM).
+        self.ctl.close()
+        code = self.proc.wait()
+        if self.session is not None:
+            self.session._finish(code)
+            self.session = None
+        self.pool._worker_gone(self)
+
+
+class SessionPool:
+    def __init__(self, size=POOL_SIZE, max_sessions=WORKER_MAX_SESSIONS, cwd=None):
+        self.size = size
+        self.max_sessions = max_sessions
+        self.cwd = cwd or os.getcwd()
+        self._lock = threading.Lock()
+        self._idle = []
+        self._starting = 0
+        self._workers = set()
+
+    def start(self):
+        self._replenish()
+
+    def spawn_session(self, slave_fd, channel):
+        """대기 중인 워커에 세션을 넘기고 PooledSession을 반환한다. 대기
+        워커가 없으면 None - 호출부는 예전처럼 bbs.py를 직접 띄운다."""
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        self._replenish()
+        if worker is None:
+            return None
+        try:
+            return worker.start_session(slave_fd, channel)
+        except OSError:
+            # 대기 중에 죽은 워커 - 이 접속은 호출부의 폴백 경로로 보낸다.
+            worker.session = None
+            worker.kill()
+            return None
+
+    def _replenish(self):
+        while True:
+            with self._lock:
+                if len(self._idle) + self._starting >= self.size:
+                    return
+                self._starting += 1
+            try:
+                worker = _Worker(self)
+            except Exception:
+                with self._lock:
+                    self._starting -= 1
+                traceback.print_exc()
+                return
+            with self._lock:
+                self._workers.add(worker)
+
+    def _worker_started(self, worker):
+        with self._lock:
+            worker.started = True
+            self._starting -= 1
+        self._worker_ready(worker)
+
+    def _worker_ready(self, worker):
+        with self._lock:
+            if worker.sessions >= self.max_sessions or len(self._idle) >= self.size:
+                retire = True
+            else:
+                retire = False
+                self._idle.append(worker)
+        if retire:
+            worker.retire()
+            self._replenish()
+
+    def _worker_gone(self, worker):
+        with self._lock:
+            if worker in self._idle:
+                self._idle.remove(worker)
+            elif not worker.started:
+                self._starting -= 1
+            self._workers.discard(worker)
+        if not worker.started:
+            # 준비 완료 신호도 못 보내고 죽은 워커(import 오류 등) - 바로 다시
+            # 띄우면 같은 이유로 끝없이 죽고 뜨기를 반복하므로 채우지 않는다.
+            # 그동안의 접속은 telnet.py의 폴백 경로(bbs.py 직접 실행)로 간다.
+            print(f'[sessionpool] 워커가 준비 전에 종료됨(코드 {worker.proc.returncode})',
+                  file=sys.stderr)
+            return
+        self._replenish()
+
+
+# --- 워커 프로세스 쪽 -------------------------------------------------------
+
+_in_session = False
+
+
+def _hangup(signum, frame):
+    # 세션과 세션 사이(대기 중)에 늦게 도착한 SIGHUP은 무시한다.
+    if _in_session:
+        from bbsio.rawio import ConnectionClosed
+        raise ConnectionClosed('회선 끊김(SIGHUP)')
+
+
+def _reset_session_state():
+    # 세션마다 새 프로세스였을 때는 신경 쓸 필요 없던 세션 상태 - 앞 세션이
+    # 고른 인코딩이나 읽다 만 수신 버퍼가 다음 세션으로 넘어가면 안 되므로
+    # fd 0/1을 쓰는 새 Session으로 갈아 끼운다.
+    from bbsio.session import Session, activate
+    activate(Session(0, 1))
+
+
+def _run_session(bbs, tty_fd, err_fd, channel):
+    # bbs.py 코드는 전부 stdin/stdout(fd 0/1)으로 입출력하므로, 세션 동안만
+    # fd 0/1을 PTY 슬레이브로, fd 2를 telnet.py가 로그로 읽는 파이프로 바꿔
+    # 끼운다. 끝나면 원래 fd로 되돌려서 PTY/파이프의 참조를 모두 놓는다 -
+    # 그래야 telnet.py 쪽이 EOF/EIO로 세션 종료를 알아챈다.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(fd) for fd in (0, 1, 2)]
+    os.dup2(tty_fd, 0)
+    os.dup2(tty_fd, 1)
+    os.dup2(err_fd, 2)
+    os.close(tty_fd)
+    os.close(err_fd)
+    _reset_session_state()
+    global _in_session
+    try:
+        _in_session = True
+        return bbs.run(channel)
+    except Exception:
+        # bbs.run()의 예외 처리부 안에서 SIGHUP이 온 경우 등
+        return 1
+    finally:
+        _in_session = False
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        for fd, copy in zip((0, 1, 2), saved):
+            os.dup2(copy, fd)
+            os.close(copy)
+
+
+def worker_main(ctl_fd):
+    sys.path.insert(0, ROOT)
+    # 이 import가 접속마다 반복되던 기동 비용의 대부분이다 - 미리 해둔다.
+    import bbs
+    signal.signal(signal.SIGHUP, _hangup)
+    ctl = socket.socket(fileno=ctl_fd)
+    ctl.sendall(b'R\n')
+    while True:
+        try:
+            msg, fds, _flags, _addr = socket.recv_fds(ctl, 64, 2)
+        except OSError:
+            return
+        if not msg:
+            for fd in fds:
+                os.close(fd)
+            return
+        if len(fds) != 2:
+            for fd in fds:
+                os.close(fd)
+            continue
+        code = _run_session(bbs, fds[0], fds[1], msg.decode())
+        ctl.sendall(f'D{code}\n'.encode())
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--worker':
+        worker_main(int(sys.argv[2]))
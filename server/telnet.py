@@ -1,4 +1,8 @@
+import asyncio
+import fcntl
 import socket
+import struct
+import termios
 import threading
 import pty
 import os
@@ -7,12 +11,40 @@ import time
 import traceback
 import tty
 from logutil import log, log_io
+from sessionpool import SessionPool, POOL_SIZE, WORKER_MAX_SESSIONS
+import inprocess
 
 # 설정
 LISTEN_HOST = '0.0.0.0'
 LISTEN_PORT = 2323          # 23은 굳이 안 씀 - 이 컨테이너 안에서 우리 말고 아무도 안 쓰지만 혼동 방지
 BBS_COMMAND = ['python3', '-u', 'bbs.py', '--channel=telnet']
-MAX_CONNECTIONS = 20        # 동시 접속 상한 (스레드/프로세스 무한 생성 방지)
+# 세션을 어디서 돌릴지.
+#   subprocess (기본) 접속마다 PTY + bbs.py 프로세스(대기 워커가 있으면 워커)
+#   inprocess         PTY/자식 프로세스 없이 이 서버 프로세스 안의 스레드에서
+#                     돌린다(inprocess.py 참고). 접속당 메모리가 훨씬 적다.
+SESSION_MODE = os.environ.get('BBS_SESSION_MODE', 'subprocess')
+# 동시 접속 상한 (세션 프로세스 무한 생성 방지). 예전엔 접속마다 중계 스레드가
+# 2~3개씩 붙어서 20으로 묶어뒀는데, 이제 중계는 asyncio 이벤트 루프 하나가 전부
+# 맡으므로(아래 TelnetSession) 접속이 늘어도 텔넷 서버 쪽 스레드/메모리는
+# 거의 그대로다 - tools/telnet_load.py로 확인.
+MAX_CONNECTIONS = 200
+LISTEN_BACKLOG = 128
+
+# 중계 한 번에 PTY에서 읽는 크기, 소켓에서 받아 둘 재사용 버퍼 크기, 그리고
+# 한쪽이 못 따라올 때 상대편 읽기를 멈추는 버퍼 상한(소켓 송신 버퍼/PTY 쓰기
+# 대기분). 상한은 예전 스레드 방식에서 블로킹 sendall()/os.write()가 하던
+# 역압(backpressure)을 대신한다.
+#
+# 예전엔 양방향 다 1024(이후 4096)바이트씩 읽어서 bytes 객체를 새로 만들었다 -
+# 파일 전송처럼 데이터가 몰릴 때 조각마다 파이썬 쪽 호출/할당이 반복된다. 이제
+# PTY는 한 번에 크게 읽고, 소켓은 asyncio.BufferedProtocol로 재사용
+# 버퍼(bytearray)에 바로 받아(recv_into) 새 객체 없이 PTY에 쓴다.
+# os.splice()로 커널 안에서 바로 넘기는 방법은 쓰지 않는다 - 텔넷은 IAC
+# 커맨드/IAC IAC 이스케이프 때문에 바이트를 하나도 빠짐없이 봐야 하고, PTY
+# 쪽(tty)은 splice 지원도 커널 버전마다 다르다.
+RELAY_CHUNK = 64 * 1024
+RELAY_RECV_BUFFER = 64 * 1024
+RELAY_HIGH_WATER = 64 * 1024
 
 # 접속 빈도 제한 - 봇/스캐너가 짧은 시간에 계속 재접속하는 걸 막는다.
 # 메모리에만 들고 있으면 충분 (영속화 필요 없음, 그냥 스캐너 완화용).
@@ -21,18 +53,21 @@ RATE_LIMIT_MAX_ATTEMPTS = 5
 RATE_LIMIT_COOLDOWN_SEC = 300
 
 IAC = 0xFF
-WILL = 0xFB
-WONT = 0xFC
-DO = 0xFD
 DONT = 0xFE
+DO = 0xFD
+WONT = 0xFC
+WILL = 0xFB
+SB = 0xFA
+SE = 0xF0
 TELOPT_ECHO = 0x01
 TELOPT_SGA = 0x03
 TELOPT_BINARY = 0x00
+TELOPT_NAWS = 0x1F
 
 # 서버가 에코를 담당하고(우리 rawinput()이 직접 echo함), 클라이언트는
 # 로컬 에코/라인버퍼링 없이 키 하나하나를 바로 보내도록 하는 협상.
-# 완전한 telnet 옵션 상태머신은 필요 없음 - 접속 시 한 번만 보내고,
-# 그 이후 들어오는 IAC 시퀀스는 그냥 무시(스킵)한다.
+# 옵션별 상태머신까지는 필요 없음 - 접속 시 한 번만 보내고, 그 이후 들어오는
+# 협상 커맨드는 TelnetParser가 걸러내며 필요한 응답만 돌려준다.
 #
 # BINARY(옵션 0)을 양방향(WILL/DO) 다 제안하는 게 핵심이다 - 이게 없으면
 # 접속은 기본 NVT ASCII(7비트) 모드로 남는데, 이 경우 일부 클라이언트가
@@ -49,9 +84,17 @@ NEGOTIATION = bytes([
     IAC, DO, TELOPT_SGA,
     IAC, WILL, TELOPT_BINARY,
     IAC, DO, TELOPT_BINARY,
+    # 창 크기 알려 달라(NAWS, RFC 1073). 클라이언트가 WILL NAWS로 답하고
+    # IAC SB NAWS 가로 세로 IAC SE를 보내면(창 크기를 바꿀 때마다 다시 옴)
+    # 세션에 넘겨서 게시판 목록/글 읽기 한 페이지에 그만큼 더 보여준다.
+    IAC, DO, TELOPT_NAWS,
 ])
 
-_connection_count_lock = threading.Lock()
+# 미리 import까지 끝내 둔 bbs 워커 풀(sessionpool.py 참고). BBS_POOL_SIZE=0이면
+# None으로 남고 접속마다 예전처럼 BBS_COMMAND를 새로 띄운다.
+_pool = None
+
+# 이벤트 루프 스레드에서만 건드리므로 잠금이 필요 없다.
 _connection_count = 0
 
 _rate_lock = threading.Lock()
@@ -74,23 +117,6 @@ def is_rate_limited(ip):
     return False
 
 
-# 접속 직후 텔넷 협상이 오가는 시간대에만 IAC 커맨드를 해석한다(아래
-# strip_telnet_iac 사용처 및 주의사항 참고) - 그 뒤로는 순수 데이터로
-# 취급해 그대로 통과시킨다.
-# 예전엔 "접속 후 10초"라는 고정 시간창으로 판단했는데, 실제로는 로그인 +
-# 메뉴 탐색 + 파일 선택까지가 10초 안에 끝나는 경우(익숙한 사용자, 반복
-# 테스트 등)가 흔해서 그 안에 ZMODEM 바이너리 전송이 시작되면 여전히
-# 헤더 바이트를 텔넷 커맨드로 오인하는 위험이 있었다(아래 strip_telnet_iac
-# 주석의 "완전히 안전하지 않다" 항목 참고 - 실제로 재현된 버그).
-# 진짜 협상 커맨드는 우리가 접속 시 보낸 NEGOTIATION에 대한 응답으로만
-# 오고, 그 응답은 클라이언트가 접속 직후 첫 패킷(들)에 몰아서 보낸다 -
-# 그래서 시간 대신 "첫 데이터 청크가 도착한 뒤 잠깐(NEGOTIATION_SETTLE_SEC)
-# 만 더 기다렸다가 닫는" 이벤트 기반으로 바꿔서, 패킷이 쪼개져 오는 드문
-# 경우도 커버하면서 위험 구간을 최대한 좁힌다. 데이터가 아예 늦게 오는
-# 경우를 위한 상한선(IAC_NEGOTIATION_CEILING_SEC)만 안전망으로 남겨둔다.
-NEGOTIATION_SETTLE_SEC = 0.5
-IAC_NEGOTIATION_CEILING_SEC = 3
-
 _IAC_COMMANDS = (WILL, WONT, DO, DONT)
 
 # 클라이언트가 보낸 협상 커맨드에 대한 응답 매핑. RFC 854상 유효한 짝만 써야 한다 -
@@ -111,221 +137,181 @@ _IAC_DECLINE = {WILL: DONT, WONT: DONT, DO: WONT, DONT: WONT}
 # '*' 마스킹 대신 평문이 그대로 로컬 에코되어 보이는 버그의 원인이었다.
 # 이미 우리가 협상을 시작한 옵션에 대한 응답에는 답장하지 않는다(RFC 854가
 # 금지하는 "응답에 대한 재응답" 루프를 피하기 위함이기도 하다).
-# BINARY도 같은 이유로 여기 포함 - 우리가 NEGOTIATION에서 WILL/DO BINARY를
-# 먼저 제안했으므로 그에 대한 응답을 거부로 되받으면 안 된다.
-_IAC_NO_REPLY_OPTIONS = (TELOPT_ECHO, TELOPT_SGA, TELOPT_BINARY)
-
-
-def strip_telnet_iac(data):
-    # 소켓으로 들어오는 바이트 중 telnet IAC 명령 시퀀스(IAC+WILL/WONT/DO/DONT+옵션,
-    # 총 3바이트)를 걸러내서 bbs.py한테 진짜 입력인 것처럼 넘어가지 않게 한다.
-    # IAC IAC(0xFF 0xFF)는 데이터 안의 리터럴 0xFF 한 바이트를 뜻하는 이스케이프라
-    # 별도로 처리한다. 완전한 telnet 상태머신은 아니지만 이 용도엔 충분함.
-    #
-    # 주의: IAC 뒤에 오는 바이트가 실제로 WILL/WONT/DO/DONT일 때만 커맨드로 보고
-    # 3바이트를 스킵해야 한다. 그렇지 않으면 XModem 등 바이너리 전송 중에 등장하는
-    # 리터럴 0xFF 데이터 바이트(체크섬, CRC, 블록 번호 등)를 커맨드로 오인해서
-    # 뒤따르는 진짜 데이터 2바이트까지 함께 먹어버려 전송이 깨진다.
-    #
-    # 커맨드를 그냥 버리기만 하면 클라이언트는 자기가 보낸 협상 커맨드에 대한
-    # 응답을 영영 못 받아서(일부 클라이언트가 협상이 안 끝났다고 보고) 60초마다
-    # 재접속을 시도하다가 결국 서버 rate limiter에 걸리는 문제가 있었다.
-    # 그래서 커맨드를 스킵하는 대신, RFC 854에 맞는 짝(_IAC_DECLINE)으로 거부
-    # 응답을 만들어 별도로 반환한다 - 완전한 협상 상태머신은 아니지만 매 요청을
-    # 그 자리에서 종료시켜서 클라이언트가 "응답받았다"고 인식하기엔 충분함.
-    #
-    # 주의: 바로 위의 "0xFF 뒤에 WILL/WONT/DO/DONT가 와야 커맨드로 본다" 가드로도
-    # 완전히 안전하지 않다 - ZMODEM 헤더의 위치/CRC 필드처럼 값 범위 제한이 없는
-    # 바이너리 필드는 이스케이프 대상이 아니라서(_ESCAPE_NEEDED에 0xFB~0xFE가
-    # 없음) 우연히 0xFF 바로 뒤에 0xFB~0xFE 값이 오는 경우가 실제로 발생하고,
-    # 그러면 진짜 파일 데이터 3바이트를 커맨드로 오인해 삼켜버려 헤더 CRC가
-    # 깨지고 전송이 영원히 멈춘다(실제 배포에서 관찰된 ZMODEM 업로드 무한 대기
-    # 원인 - _read_header가 이 손상된 헤더를 CRC 불일치로 계속 거부하면서
-    # ZFILE을 못 받고 송신측 재전송 타임아웃까지 ZRINIT만 반복 전송하게 됨).
-    # 이 함수만으로는 "진짜 협상 커맨드"와 "우연히 같은 패턴의 바이너리 데이터"를
-    # 스트림만 보고 구별할 수 없으므로, 호출부(data_relay)에서 접속 초반
-    # 협상 시간대에만 이 함수를 타게 하고 그 뒤 파일 전송이 벌어질 시점에는
-    # 아예 호출하지 않는 방식(IAC_NEGOTIATION_WINDOW_SEC)으로 막는다.
-    out = bytearray()
-    responses = bytearray()
-    i = 0
-    n = len(data)
-    while i < n:
-        b = data[i]
-        if b == IAC:
-            if i + 1 < n and data[i + 1] == IAC:
-                out.append(IAC)
-                i += 2
-                continue
-            if i + 2 < n and data[i + 1] in _IAC_COMMANDS:
-                # WILL/WONT/DO/DONT + 옵션 1바이트 = 총 3바이트 커맨드로 간주하고
-                # bbs.py로 넘어가는 스트림에서는 스킵하되, 클라이언트에게
-                # RFC 854에 맞는 짝(_IAC_DECLINE)으로 거부 응답을 돌려준다.
-                # 단, ECHO/SGA는 우리가 먼저 제안한 옵션이라 그에 대한 응답에는
-                # 답장하지 않는다(_IAC_NO_REPLY_OPTIONS 설명 참고).
-                option = data[i + 2]
-                if option not in _IAC_NO_REPLY_OPTIONS:
-                    responses.extend([IAC, _IAC_DECLINE[data[i + 1]], option])
-                i += 3
+# BINARY, NAWS도 같은 이유로 여기 포함 - 우리가 NEGOTIATION에서 먼저
+# 제안했으므로 그에 대한 응답을 거부로 되받으면 안 된다.
+_IAC_NO_REPLY_OPTIONS = (TELOPT_ECHO, TELOPT_SGA, TELOPT_BINARY, TELOPT_NAWS)
+
+
+class TelnetParser:
+    """클라이언트 -> 서버 방향 텔넷 스트림 파서. feed()에 받은 조각을 차례로
+    넘기면 (bbs로 넘길 데이터, 클라이언트에 돌려줄 협상 응답)을 돌려준다.
+
+    예전 strip_telnet_iac()는 조각을 한 바이트씩 파이썬 루프로 훑었고, 커맨드
+    3바이트가 한 조각 안에 다 있어야만 알아봤다. 그 비용과 "IAC 뒤에 WILL 등이
+    오면 커맨드" 식의 어림짐작 때문에, 접속 직후 협상 시간대(최대 3초)가
+    지나면 아예 해석을 끄고 그대로 통과시켰다 - ZMODEM 데이터의 0xFF를
+    커맨드로 오인해 삼키던 버그를 피하려는 우회였는데, 그 뒤로는 IAC IAC도
+    풀지 않아서 8비트 데이터의 0xFF가 두 번씩 들어갔다.
+
+    이제 RFC 854 상태머신을 세션 끝까지 켜 둔다.
+      IAC IAC             - 데이터 0xFF 한 바이트 (BINARY 모드 전송의 0xFF)
+      IAC WILL/WONT/DO/DONT 옵션 - 협상. _IAC_DECLINE 규칙대로 응답
+      IAC SB 옵션 ... IAC SE - 서브협상. on_subnegotiation(옵션, 내용) 호출
+      IAC + 그 밖의 커맨드(NOP/GA/AYT 등) - 버림
+    어느 지점에서 조각이 잘려도 상태가 이어지므로 다음 조각에서 마저 해석한다.
+    IAC가 없는 구간은 bytes.find()로 찾아 통째로 넘기고, 조각에 IAC가 하나도
+    없으면 복사 없이 그대로(memoryview) 돌려준다 - 평소 키 입력과 파일 전송
+    대부분이 이 경로다.
+    """
+
+    _DATA, _IAC, _OPTION, _SB, _SB_IAC = range(5)
+    # 서브협상 내용 상한 - 끝(IAC SE)이 안 오는 깨진 스트림에 메모리를 먹히지 않게
+    SB_LIMIT = 256
+
+    def __init__(self, on_subnegotiation=None):
+        self.on_subnegotiation = on_subnegotiation
+        self._state = self._DATA
+        self._command = None
+        self._sb = bytearray()
+
+    def feed(self, buf, end=None):
+        """buf[:end]를 해석한다. buf는 find()가 되는 bytes/bytearray."""
+        if end is None:
+            end = len(buf)
+        if self._state == self._DATA and buf.find(b'\xff', 0, end) < 0:
+            return memoryview(buf)[:end], b''
+        i = 0
+        out = []
+        replies = bytearray()
+        view = memoryview(buf)
+        while i < end:
+            state = self._state
+            if state == self._DATA:
+                j = buf.find(b'\xff', i, end)
+                if j < 0:
+                    out.append(view[i:end])
+                    break
+                if j > i:
+                    out.append(view[i:j])
+                self._state = self._IAC
+                i = j + 1
                 continue
-            if i + 1 >= n:
-                # 스트림 끝에 IAC 하나만 걸린 드문 경우 - 다음 recv()에서 이어질
-                # 커맨드 시퀀스일 수도 있으나 여기선 완전한 상태머신이 아니므로
-                # 리터럴 데이터로 취급해 그냥 통과시킨다.
-                out.append(b)
-                i += 1
-                continue
-            # IAC 다음 바이트가 WILL/WONT/DO/DONT가 아니면 telnet 커맨드가
-            # 아니라 리터럴 데이터 바이트로 취급하고 한 바이트만 소비한다.
-            out.append(b)
+            b = buf[i]
             i += 1
-            continue
-        out.append(b)
-        i += 1
-    return bytes(out), bytes(responses)
-
-
-def log_bbs_stderr(proc, tag):
-    try:
-        for line in iter(proc.stderr.readline, b''):
-            if not line:
-                break
-            log(f'[bbs stderr {tag}] ' + line.decode('utf-8', errors='ignore').rstrip())
-    except Exception as e:
-        log(f'[bbs stderr 읽기 오류 {tag}] {e}')
-    finally:
+            if state == self._IAC:
+                if b == IAC:
+                    out.append(b'\xff')
+                    self._state = self._DATA
+                elif b in _IAC_COMMANDS:
+                    self._command = b
+                    self._state = self._OPTION
+                elif b == SB:
+                    self._sb.clear()
+                    self._state = self._SB
+                elif b >= SE:
+                    # NOP, GA, AYT 같은 두 바이트 커맨드 - 쓰지 않으므로 버린다
+                    self._state = self._DATA
+                else:
+                    # 커맨드가 아닌 값. 0xFF를 이스케이프하지 않는 클라이언트가
+                    # 보낸 데이터로 보고 두 바이트 다 그대로 넘긴다.
+                    out.append(bytes([IAC, b]))
+                    self._state = self._DATA
+            elif state == self._OPTION:
+                # RFC 854에 맞는 짝(_IAC_DECLINE)으로 거부 응답. 단, 우리가
+                # 먼저 제안한 옵션에 대한 응답에는 답장하지 않는다
+                # (_IAC_NO_REPLY_OPTIONS 설명 참고).
+                if b not in _IAC_NO_REPLY_OPTIONS:
+                    replies += bytes([IAC, _IAC_DECLINE[self._command], b])
+                self._state = self._DATA
+            elif state == self._SB:
+                if b == IAC:
+                    self._state = self._SB_IAC
+                elif len(self._sb) < self.SB_LIMIT:
+                    self._sb.append(b)
+            else:  # _SB_IAC
+                if b == SE:
+                    self._state = self._DATA
+                    if self._sb and self.on_subnegotiation is not None:
+                        self.on_subnegotiation(self._sb[0], bytes(self._sb[1:]))
+                elif b == IAC:
+                    if len(self._sb) < self.SB_LIMIT:
+                        self._sb.append(IAC)
+                    self._state = self._SB
+                else:
+                    # IAC SE 없이 다른 커맨드가 옴 - 서브협상을 버리고 그
+                    # 바이트부터 다시 IAC 커맨드로 해석한다.
+                    self._state = self._IAC
+                    i -= 1
+        return b''.join(out), bytes(replies)
+
+
+def escape_iac(data):
+    """서버 -> 클라이언트 방향. BINARY 모드에서도 데이터의 0xFF는 IAC IAC로
+    보내야 클라이언트가 커맨드로 오인하지 않는다(RFC 856). 0xFF가 없으면
+    (한글 텍스트 화면은 EUC-KR/조합형/UTF-8 어느 쪽이든 0xFF가 안 나온다)
+    그대로 돌려준다."""
+    if data.find(b'\xff') < 0:
+        return data
+    return data.replace(b'\xff', b'\xff\xff')
+
+
+class TelnetSession(asyncio.BufferedProtocol):
+    """텔넷 접속 하나. 예전 data_relay()가 접속마다 띄우던 소켓->PTY,
+    PTY->소켓, stderr 로그 스레드 세 개를 이벤트 루프 콜백으로 바꾼 것이다 -
+    소켓은 asyncio 트랜스포트가, PTY 마스터와 bbs stderr 파이프는
+    add_reader()가 감시한다. 소켓 수신은 접속마다 하나인 rx_buffer에 받는다
+    (get_buffer/buffer_updated)."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.transport = None
+        self.tag = '?'
+        self.ip = '?'
+        self.proc = None
+        self.master_fd = None
+        self.stderr_file = None
+        self.stderr_buf = b''
+        self.to_pty = bytearray()       # PTY가 꽉 차서 아직 못 쓴 입력
+        self.rx_buffer = bytearray(RELAY_RECV_BUFFER)
+        self.reading_pty = False
+        self.counted = False
+        self.closed = False
+        now = time.time()
+        self.last_recv_time = now
+        self.last_send_time = now
+        self.parser = TelnetParser(self._subnegotiation)
+
+    # --- 접속/종료 -------------------------------------------------------
+
+    def connection_made(self, transport):
+        global _connection_count
+        self.transport = transport
+        peer = transport.get_extra_info('peername')
+        self.ip = peer[0]
+        self.tag = f'{peer[0]}:{peer[1]}'
+
+        if is_rate_limited(self.ip):
+            log(f'접속 빈도 제한으로 거절: {self.ip}')
+            self.closed = True
+            transport.abort()
+            return
+        if _connection_count >= MAX_CONNECTIONS:
+            log(f'최대 동시 접속({MAX_CONNECTIONS}) 초과로 거절: {self.ip}')
+            self.closed = True
+            transport.abort()
+            return
+        _connection_count += 1
+        self.counted = True
+
+        log(f'텔넷 접속: {self.tag}')
         try:
-            proc.stderr.close()
+            self._start_session()
         except Exception:
-            pass
-
-
-def data_relay(conn, master_fd, proc, tag, ip):
-    log(f"[{tag}] 데이터 중계 시작")
-    disconnect_event = threading.Event()
-    last_recv_time = [time.time()]
-    last_send_time = [time.time()]
-    iac_negotiation_deadline = [time.time() + IAC_NEGOTIATION_CEILING_SEC]
-    first_chunk_seen = [False]
+            log(f"[{self.tag}] 연결 처리 중 예외:")
+            traceback.print_exc()
+            self._shutdown()
 
-    # 소켓 -> PTY 방향 (텔넷 클라이언트가 보낸 키 입력)
-    def relay_socket_to_pty():
-        while proc.poll() is None and not disconnect_event.is_set():
-            try:
-                data = conn.recv(1024)
-                if not data:
-                    # 클라이언트가 정상적으로 연결을 닫음
-                    disconnect_event.set()
-                    try:
-                        os.close(master_fd)
-                    except Exception:
-                        pass
-                    try:
-                        proc.terminate()
-                    except Exception:
-                        pass
-                    return
-                if time.time() < iac_negotiation_deadline[0]:
-                    filtered, iac_responses = strip_telnet_iac(data)
-                    if not first_chunk_seen[0]:
-                        first_chunk_seen[0] = True
-                        iac_negotiation_deadline[0] = min(
-                            iac_negotiation_deadline[0],
-                            time.time() + NEGOTIATION_SETTLE_SEC
-                        )
-                else:
-                    # 협상 시간대가 지났다 - ZMODEM/XMODEM 같은 바이너리 전송이
-                    # 시작됐을 수 있으므로 더 이상 IAC 커맨드로 해석하지 않고
-                    # 그대로 통과시킨다(위 strip_telnet_iac의 주의사항 참고).
-                    filtered, iac_responses = data, b''
-                if iac_responses:
-                    # 클라이언트가 보낸 IAC 협상 커맨드에 대한 ACK(IAC DO <옵션>).
-                    # 이걸 안 보내면 클라이언트가 협상 미완료로 보고 60초마다
-                    # 재접속을 시도하다 rate limiter에 걸리는 문제가 있었다.
-                    conn.sendall(iac_responses)
-                if filtered:
-                    now = time.time()
-                    gap_ms = (now - last_recv_time[0]) * 1000
-                    log_io(ip, '수신', filtered, gap_ms)
-                    last_recv_time[0] = now
-                    # os.write()는 요청한 바이트 수보다 적게 쓰고 반환할 수
-                    # 있다(파이프/PTY 버퍼가 꽉 찬 경우 등) - 반환값을 안 보고
-                    # 한 번만 호출하면 나머지가 조용히 유실된다. ZMODEM처럼
-                    # 큰 바이너리가 빠르게 연속으로 들어올 때만 걸리고 평소
-                    # 키 입력(몇 바이트)에서는 절대 안 걸려서 오래 못 잡았던
-                    # 버그 - 다 쓸 때까지 반복한다.
-                    view = memoryview(filtered)
-                    while view:
-                        n = os.write(master_fd, view)
-                        view = view[n:]
-            except OSError:
-                break
-            except Exception:
-                log(f"[{tag}] 소켓->PTY 중계 오류:")
-                traceback.print_exc()
-                disconnect_event.set()
-                try:
-                    os.close(master_fd)
-                except Exception:
-                    pass
-                try:
-                    proc.terminate()
-                except Exception:
-                    pass
-                return
-
-    # PTY -> 소켓 방향 (BBS 출력)
-    def relay_pty_to_socket():
-        while proc.poll() is None and not disconnect_event.is_set():
-            try:
-                data = os.read(master_fd, 1024)
-                if data:
-                    now = time.time()
-                    gap_ms = (now - last_send_time[0]) * 1000
-                    log_io(ip, '송신', data, gap_ms)
-                    last_send_time[0] = now
-                    conn.sendall(data)
-            except OSError:
-                # PTY 종료 시 OSError 발생 (정상 종료 경로) - dialup.py와 동일한 패턴
-                break
-            except Exception:
-                log(f"[{tag}] PTY->소켓 중계 오류:")
-                traceback.print_exc()
-                disconnect_event.set()
-                try:
-                    proc.terminate()
-                except Exception:
-                    pass
-                break
-
-    t1 = threading.Thread(target=relay_socket_to_pty)
-    t2 = threading.Thread(target=relay_pty_to_socket)
-    t1.start()
-    t2.start()
-    t1.join()
-    t2.join()
-
-    log(f"[{tag}] 데이터 중계 종료")
-    try:
-        os.close(master_fd)
-    except Exception:
-        pass
-    try:
-        proc.terminate()
-    except Exception:
-        pass
-    try:
-        conn.close()
-    except Exception:
-        pass
-
-
-def handle_connection(conn, addr):
-    global _connection_count
-    tag = f'{addr[0]}:{addr[1]}'
-    proc = None
-    master_fd = None
-    try:
+    def _start_session(self):
         # Nagle 알고리즘 끄기 - 이게 켜져 있으면(기본값) 작은 패킷을 모아
         # 보내려고 커널이 최대 수십 ms씩 지연시키는데, ZMODEM처럼 작은
         # ACK(ZRPOS 등)와 큰 데이터 버스트가 빠르게 번갈아 오가는 프로토콜에서
@@ -333,86 +319,264 @@ def handle_connection(conn, addr):
         # 전형적인 원인이다(Nagle vs delayed ACK 상호작용 - 실패 지점이
         # 매번 다르게 재현되던 것과 패턴이 일치함). 느긋한 키 입력 위주인
         # 평소 트래픽에서는 절대 안 걸려서 오래 못 잡았다.
-        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        conn.sendall(NEGOTIATION)
-
+        sock = self.transport.get_extra_info('socket')
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.transport.set_write_buffer_limits(high=RELAY_HIGH_WATER)
+        self.transport.write(NEGOTIATION)
+
+        if SESSION_MODE == 'inprocess':
+            # 세션 스레드와 이어진 소켓 한쪽 끝이 PTY 마스터 자리를 대신한다 -
+            # os.read()/os.write() 그대로 쓰고, 세션이 끝나면 EOF가 온다.
+            self.master_fd, self.proc = inprocess.spawn_session('telnet')
+        else:
+            self._spawn_pty_session()
+
+        os.set_blocking(self.master_fd, False)
+        self._resume_pty_reading()
+        self.stderr_file = self.proc.stderr
+        if self.stderr_file is not None:
+            os.set_blocking(self.stderr_file.fileno(), False)
+            self.loop.add_reader(self.stderr_file.fileno(), self._stderr_readable)
+        log(f"[{self.tag}] 데이터 중계 시작")
+
+    def _spawn_pty_session(self):
         # PTY 생성. dialup.py와 동일하게 raw 모드는 여기서 딱 한 번만 건다 -
         # bbs.py의 getchar() 안에서 매 글자마다 반복해서 걸면 TCSAFLUSH가
         # 아직 안 읽은 입력을 버려버리는 버그가 있었던 걸 이미 확인함(rawio.py 참고).
         master_fd, slave_fd = pty.openpty()
-        tty.setraw(slave_fd)
-
-        proc = subprocess.Popen(
-            BBS_COMMAND,
-            stdin=slave_fd,
-            stdout=slave_fd,
-            stderr=subprocess.PIPE,
-            cwd=os.getcwd(),
-            close_fds=True
-        )
-        os.close(slave_fd)
-
-        threading.Thread(
-            target=log_bbs_stderr, args=(proc, tag), daemon=True
-        ).start()
-
-        data_relay(conn, master_fd, proc, tag, addr[0])
-    except Exception:
-        log(f"[{tag}] 연결 처리 중 예외:")
-        traceback.print_exc()
-        try:
-            if master_fd is not None:
-                os.close(master_fd)
-        except Exception:
-            pass
-        try:
-            if proc is not None:
-                proc.terminate()
-        except Exception:
-            pass
+        self.master_fd = master_fd
         try:
-            conn.close()
-        except Exception:
-            pass
-    finally:
-        with _connection_count_lock:
+            tty.setraw(slave_fd)
+            # 대기 중인 워커가 있으면 PTY를 넘겨 바로 세션을 시작한다. 반환되는
+            # PooledSession은 Popen처럼 poll()/terminate()/stderr를 제공하므로
+            # 아래 중계 코드는 어느 쪽인지 신경 쓰지 않는다.
+            if _pool is not None:
+                self.proc = _pool.spawn_session(slave_fd, 'telnet')
+            if self.proc is None:
+                self.proc = subprocess.Popen(
+                    BBS_COMMAND,
+                    stdin=slave_fd,
+                    stdout=slave_fd,
+                    stderr=subprocess.PIPE,
+                    cwd=os.getcwd(),
+                    close_fds=True
+                )
+        finally:
+            os.close(slave_fd)
+
+    def connection_lost(self, exc):
+        # 클라이언트가 연결을 닫음(정상 종료든 끊김이든)
+        self._shutdown()
+
+    def _shutdown(self):
+        global _connection_count
+        if self.closed:
+            return
+        self.closed = True
+        if self.master_fd is not None:
+            # 스레드 방식과 달리 마스터를 읽다 블로킹된 곳이 없으므로 여기서
+            # 닫으면 바로 해제되고, bbs 쪽은 EIO로 끊김을 알아챈다.
+            self.loop.remove_reader(self.master_fd)
+            self.loop.remove_writer(self.master_fd)
+            try:
+                os.close(self.master_fd)
+            except OSError:
+                pass
+            self.master_fd = None
+        if self.proc is not None:
+            try:
+                self.proc.terminate()
+            except Exception:
+                pass
+            self._reap()
+        if not self.transport.is_closing():
+            self.transport.close()
+        if self.counted:
             _connection_count -= 1
+        log(f"[{self.tag}] 데이터 중계 종료")
 
+    def _reap(self):
+        # Popen 자식이 끝날 때까지 가끔 poll()해서 좀비로 남지 않게 거둔다.
+        if self.proc.poll() is None:
+            self.loop.call_later(1, self._reap)
 
-def telnet_server():
-    global _connection_count
-    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    srv.bind((LISTEN_HOST, LISTEN_PORT))
-    srv.listen(50)
-    log(f'텔넷 서버 시작: {LISTEN_HOST}:{LISTEN_PORT}')
+    # --- 소켓 -> PTY (텔넷 클라이언트가 보낸 키 입력) ----------------------
 
-    while True:
-        conn, addr = srv.accept()
-        ip = addr[0]
+    def get_buffer(self, sizehint):
+        return self.rx_buffer
 
-        if is_rate_limited(ip):
-            log(f'접속 빈도 제한으로 거절: {ip}')
+    def buffer_updated(self, nbytes):
+        # rx_buffer는 다음 수신 때 덮어쓰이므로, 여기서 다 쓰지 못한 건
+        # 복사해서 남겨야 한다(_write_pty의 to_pty).
+        if self.closed:
+            return
+        try:
+            self._relay_socket_to_pty(nbytes)
+        except Exception:
+            log(f"[{self.tag}] 소켓->PTY 중계 오류:")
+            traceback.print_exc()
+            self._shutdown()
+
+    def _relay_socket_to_pty(self, nbytes):
+        filtered, iac_responses = self.parser.feed(self.rx_buffer, nbytes)
+        if iac_responses:
+            # 클라이언트가 보낸 IAC 협상 커맨드에 대한 응답. 이걸 안 보내면
+            # 클라이언트가 협상 미완료로 보고 60초마다 재접속을 시도하다
+            # rate limiter에 걸리는 문제가 있었다.
+            self.transport.write(iac_responses)
+        if filtered:
+            now = time.time()
+            gap_ms = (now - self.last_recv_time) * 1000
+            log_io(self.ip, '수신', filtered, gap_ms)
+            self.last_recv_time = now
+            self._write_pty(filtered)
+
+    def _subnegotiation(self, option, payload):
+        if option == TELOPT_NAWS and len(payload) >= 4:
+            cols, rows = struct.unpack('>HH', payload[:4])
+            self._set_window_size(cols, rows)
+
+    def _set_window_size(self, cols, rows):
+        # PTY면 TIOCSWINSZ로 PTY 자체에 창 크기를 기록한다 - 세션 쪽은
+        # bbsio.session.Session.screen_size()가 화면을 그릴 때마다
+        # TIOCGWINSZ로 읽는다. bbs.py는 이 PTY를 제어 터미널로 갖지 않아서
+        # 커널이 SIGWINCH를 보내 주지 않지만, 매번 읽으므로 필요 없다.
+        # in-process 세션은 PTY가 없으니 세션 객체에 바로 넣는다.
+        log(f"[{self.tag}] 창 크기 {cols}x{rows}")
+        if self.master_fd is None:
+            return
+        if SESSION_MODE == 'inprocess':
+            self.proc.set_window_size(cols, rows)
+            return
+        try:
+            fcntl.ioctl(self.master_fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, cols, 0, 0))
+        except OSError as e:
+            log(f"[{self.tag}] 창 크기 설정 실패: {e}")
+
+    def _write_pty(self, data):
+        # os.write()는 요청한 바이트 수보다 적게 쓰고 반환할 수 있다(PTY
+        # 버퍼가 꽉 찬 경우 등) - 반환값을 안 보면 나머지가 조용히 유실된다
+        # (ZMODEM처럼 큰 바이너리가 빠르게 들어올 때만 걸려서 오래 못 잡았던
+        # 버그). 못 쓴 나머지는 모아뒀다가 PTY가 쓰기 가능해지면 이어 쓰고,
+        # 너무 쌓이면 소켓 읽기를 멈춰 클라이언트 쪽 TCP 창으로 속도를 맞춘다.
+        if not self.to_pty:
             try:
-                conn.close()
+                n = os.write(self.master_fd, data)
+            except BlockingIOError:
+                n = 0
+            except OSError:
+                self._shutdown()
+                return
+            if n == len(data):
+                return
+            data = data[n:]
+            self.loop.add_writer(self.master_fd, self._pty_writable)
+        self.to_pty += data
+        if len(self.to_pty) > RELAY_HIGH_WATER:
+            self.transport.pause_reading()
+
+    def _pty_writable(self):
+        try:
+            n = os.write(self.master_fd, self.to_pty)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._shutdown()
+            return
+        del self.to_pty[:n]
+        if not self.to_pty:
+            self.loop.remove_writer(self.master_fd)
+            self.transport.resume_reading()
+
+    # --- PTY -> 소켓 (BBS 출력) ------------------------------------------
+
+    def _pty_readable(self):
+        try:
+            data = os.read(self.master_fd, RELAY_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError:
+            # 세션 쪽이 PTY 슬레이브를 모두 닫으면 리눅스에서는 EIO가 난다 -
+            # bbs.py가 끝난 정상 종료 경로(dialup.py와 동일한 패턴).
+            data = b''
+        if not data:
+            self._shutdown()
+            return
+        now = time.time()
+        gap_ms = (now - self.last_send_time) * 1000
+        log_io(self.ip, '송신', data, gap_ms)
+        self.last_send_time = now
+        self.transport.write(escape_iac(data))
+
+    def pause_writing(self):
+        # 클라이언트가 느려서 소켓 송신 버퍼가 RELAY_HIGH_WATER를 넘음 - PTY
+        # 읽기를 멈추면 bbs.py의 출력이 PTY 버퍼에서 자연스럽게 막힌다.
+        if self.reading_pty:
+            self.loop.remove_reader(self.master_fd)
+            self.reading_pty = False
+
+    def resume_writing(self):
+        if not self.closed:
+            self._resume_pty_reading()
+
+    def _resume_pty_reading(self):
+        if not self.reading_pty:
+            self.loop.add_reader(self.master_fd, self._pty_readable)
+            self.reading_pty = True
+
+    # --- bbs stderr -> 로그 ----------------------------------------------
+
+    def _stderr_readable(self):
+        fd = self.stderr_file.fileno()
+        try:
+            chunk = os.read(fd, RELAY_CHUNK)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+        if chunk:
+            self.stderr_buf += chunk
+            *lines, self.stderr_buf = self.stderr_buf.split(b'\n')
+        else:
+            lines, self.stderr_buf = [self.stderr_buf] if self.stderr_buf else [], b''
+        for line in lines:
+            log(f'[bbs stderr {self.tag}] ' + line.decode('utf-8', errors='ignore').rstrip())
+        if not chunk:
+            # 세션 쪽이 stderr를 닫음(종료) - 접속 종료와 별개로 끝까지 읽고 정리한다.
+            self.loop.remove_reader(fd)
+            try:
+                self.stderr_file.close()
             except Exception:
                 pass
-            continue
-
-        with _connection_count_lock:
-            if _connection_count >= MAX_CONNECTIONS:
-                log(f'최대 동시 접속({MAX_CONNECTIONS}) 초과로 거절: {ip}')
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-                continue
-            _connection_count += 1
 
-        log(f'텔넷 접속: {ip}:{addr[1]}')
-        threading.Thread(
-            target=handle_connection, args=(conn, addr), daemon=True
-        ).start()
+
+async def _serve():
+    global _pool
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        lambda: TelnetSession(loop),
+        LISTEN_HOST, LISTEN_PORT,
+        reuse_address=True, backlog=LISTEN_BACKLOG,
+    )
+    log(f'텔넷 서버 시작: {LISTEN_HOST}:{LISTEN_PORT}')
+
+    if SESSION_MODE == 'inprocess':
+        # 워커 풀 대신 이 프로세스에서 bbs를 미리 import해 둔다.
+        inprocess.preload()
+        log('세션 모드: inprocess (세션을 서버 프로세스 안의 스레드로 실행)')
+    # 최상위 루프가 재시작돼도 워커 풀은 처음 한 번만 만든다.
+    elif _pool is None and POOL_SIZE > 0:
+        _pool = SessionPool(POOL_SIZE, WORKER_MAX_SESSIONS, cwd=os.getcwd())
+        _pool.start()
+        log(f'세션 워커 풀 시작: 대기 {POOL_SIZE}개, 워커당 최대 {WORKER_MAX_SESSIONS}세션')
+
+    async with server:
+        await server.serve_forever()
+
+
+def telnet_server():
+    # 모든 접속의 소켓/PTY 중계를 이 스레드의 이벤트 루프 하나가 처리한다.
+    asyncio.run(_serve())
 
 
 if __name__ == "__main__":
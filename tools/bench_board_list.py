@@ -0,0 +1,148 @@
+"""글 머리/본문 분리 전후의 게시판 목록 지연 비교.
+
+임시 디렉토리에 글 --posts건(기본 50000, 게시판 5개에 고루, 본문은 한글
+--body-chars자)을 예전 형식(본문이 글 안에 있는 posts.json / posts 테이블)으로
+만들고, 본문 옮기기(migrate) 전후로 잰다.
+  cold  - 세션이 새로 떠서 게시판 목록 첫 페이지를 그리기까지(PostLog를 새로
+          만들어 board_page 한 번 - 세션마다 프로세스가 따로 뜨는 것과 같다)
+  warm  - 이미 색인이 있는 세션이 페이지를 넘길 때(board_page 한 번)
+  body  - 글 하나 읽기(본문 가져오기)
+SQLite는 색인이 메모리에 없으므로 cold/warm 구분 없이 board_page 한 번을
+예전 쿼리(본문 열까지 읽음)와 지금 쿼리로 잰다.
+
+    python3 tools/bench_board_list.py [--backend json|sqlite] [--posts 50000]
+                                      [--body-chars 300] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BOARDS = ['notice', 'hello', 'bbs', 'plaza', 'market']
+PER_PAGE = 15
+
+
+def _legacy_posts(n, body_chars):
+    rnd = random.Random(1)
+    syllables = [chr(c) for c in range(0xAC00, 0xAC00 + 400)]
+    line = ''.join(rnd.choice(syllables) for _ in range(body_chars))
+    return [{'id': i, 'board': BOARDS[i % len(BOARDS)], 'author': f'user{i % 300}',
+             'title': f'{i}번째 글 제목', 'content': line[i % 50:] + line[:i % 50],
+             'date': '2024-01-01 12:00:00', 'attachment': None}
+            for i in range(1, n + 1)]
+
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _report(label, seconds):
+    print(f'  {label:28s} {seconds * 1e3:9.2f}ms')
+
+
+def bench_json(posts, args):
+    from core.postlog import PostLog
+    paths = ('data/posts.json', 'data/posts.log', 'data/posts', 'data/board_counts.json')
+    with open(paths[0], 'w', encoding='utf-8') as f:
+        json.dump(posts, f, ensure_ascii=False, indent=2)
+    offset = len(posts) // len(BOARDS) // 2
+
+    def cold():
+        PostLog(*paths).board_page('bbs', offset, PER_PAGE)
+    warm_log = PostLog(*paths)
+    warm_log.board_page('bbs', 0, 1)
+
+    def warm():
+        warm_log.board_page('bbs', offset, PER_PAGE)
+
+    def body():
+        # 예전엔 목록에서 넘어온 글에 본문이 이미 있었고, 지금은 본문 파일을 읽는다
+        post_id = warm_log.board_page('bbs', offset, 1)[0][0]['id']
+        post = warm_log.get(post_id)
+        return post['content'] if 'content' in post else warm_log.body(post_id)
+
+    print(f'[legacy] posts.json {os.path.getsize(paths[0]) / 1e6:.1f}MB (본문 포함)')
+    _report('cold 첫 페이지', _best(cold, args.repeat))
+    _report('warm 페이지', _best(warm, args.repeat * 100))
+    _report('글 읽기', _best(body, args.repeat * 100))
+
+    t0 = time.perf_counter()
+    PostLog(*paths).migrate()
+    print(f'[split]  본문 옮기기 {time.perf_counter() - t0:.2f}초, '
+          f'posts.json {os.path.getsize(paths[0]) / 1e6:.1f}MB (글 머리만)')
+    warm_log = PostLog(*paths)
+    warm_log.board_page('bbs', 0, 1)
+    _report('cold 첫 페이지', _best(cold, args.repeat))
+    _report('warm 페이지', _best(warm, args.repeat * 100))
+    _report('글 읽기', _best(body, args.repeat * 100))
+
+
+def bench_sqlite(posts, args):
+    from core.sqlite_store import SqliteStore
+    path = os.path.join('data', 'bench.sqlite3')
+    SqliteStore(path)
+    db = sqlite3.connect(path, isolation_level=None)
+    # 예전 형식 - 본문이 posts 행 안에 있고 아직 옮기지 않은 DB
+    db.execute('BEGIN')
+    db.executemany('INSERT INTO posts (id, board, author, title, content, date, attachment) '
+                   'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                   [(p['id'], p['board'], p['author'], p['title'], p['content'], p['date'], None)
+                    for p in posts])
+    db.execute("DELETE FROM kv WHERE key = 'post_bodies'")
+    db.execute('COMMIT')
+    offset = len(posts) // len(BOARDS) // 2
+
+    def legacy_page():
+        # 예전 SqliteStore.board_page()와 같은 모양(읽기 트랜잭션 + 카운터)
+        db.execute('BEGIN')
+        db.execute('SELECT id, board, author, title, content, date, attachment FROM posts '
+                   'WHERE board = ? ORDER BY id LIMIT ? OFFSET ?', ('bbs', PER_PAGE, offset)).fetchall()
+        db.execute('SELECT count FROM board_counts WHERE board = ?', ('bbs',)).fetchone()
+        db.execute('COMMIT')
+
+    print(f'[legacy] DB {os.path.getsize(path) / 1e6:.1f}MB')
+    _report('board_page', _best(legacy_page, args.repeat * 20))
+
+    t0 = time.perf_counter()
+    store = SqliteStore(path)
+    print(f'[split]  본문 옮기기 {time.perf_counter() - t0:.2f}초')
+    _report('board_page', _best(lambda: store.board_page('bbs', offset, PER_PAGE), args.repeat * 20))
+    page, _ = store.board_page('bbs', offset, 1)
+    _report('글 읽기', _best(lambda: store.post_body(page[0]['id']), args.repeat * 100))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='글 머리/본문 분리 전후 게시판 목록 지연 비교')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--body-chars', type=int, default=300, help='글 하나의 본문 글자 수')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ['BBS_FSYNC'] = '0'
+    os.chdir(tempfile.mkdtemp(prefix='bbs_bench_'))
+    os.makedirs('data', exist_ok=True)
+    posts = _legacy_posts(args.posts, args.body_chars)
+    print(f'글 {args.posts}건, 본문 {args.body_chars}자, 한 페이지 {PER_PAGE}줄')
+    if args.backend == 'json':
+        bench_json(posts, args)
+    else:
+        bench_sqlite(posts, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""게시판 한 페이지(20줄)를 그리는 데 드는 폭 계산 비용 비교.
+
+board_menu()가 글 목록 한 페이지를 그리는 것처럼, 한글 제목(일부는 박스 폭을
+넘쳐서 잘림)이 섞인 글 20줄을 tui.box_line()으로, 게시판 목록 20줄을
+board.format_board_entry() + box_line()으로 그린다. 출력은 /dev/null로 가는
+세션에 쓴다. 폭 계산 방식만 바꿔 가며 초당 몇 페이지를 그리는지 잰다.
+  legacy - 예전 pad()/format_board_entry()(wcswidth를 여러 번, 자를 때는
+           글자마다 wcswidth + 정규식 매치, 이름은 한 글자씩 늘려 가며 다시 잼)
+  cold   - bbsio.width, 페이지마다 폭/자르기 캐시를 비움(처음 보는 글들)
+  warm   - bbsio.width, 캐시 유지(같은 페이지를 다시 그림 - 목록 새로고침)
+세 방식이 그린 화면이 같은지도 확인한다.
+
+    python3 tools/bench_board_render.py [--pages 2000] [--width 80]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from wcwidth import wcswidth  # noqa: E402
+
+from bbsio import session as session_mod, tui, width as width_mod  # noqa: E402
+from bbsio.tui import C_HILITE, C_TEXT, C_DIM, RESET  # noqa: E402
+from core import board  # noqa: E402
+
+LINES = 20
+WORDS = ['안녕하세요', '자유게시판', '공지', '모뎀', '통신', '하이텔', '천리안', '질문', '답변',
+         'BBS', 'ZMODEM', '14400bps', '오늘', '정모', '후기', '사진', '드립니다', '[re]']
+
+
+def legacy_pad(text, width, align='left'):
+    """예전 tui.pad()(비교용)."""
+    ansi = width_mod.ANSI_RE
+    w = wcswidth(ansi.sub('', text))
+    if w < 0:
+        w = len(ansi.sub('', text))
+    if w >= width:
+        result = ""
+        visible = 0
+        i = 0
+        while i < len(text):
+            m = ansi.match(text, i)
+            if m:
+                result += m.group(0)
+                i = m.end()
+                continue
+            c = text[i]
+            cw = wcswidth(c)
+            if cw < 0:
+                cw = 1
+            if visible + cw > width:
+                break
+            result += c
+            visible += cw
+            i += 1
+        return result
+    fill = width - w
+    if align == 'right':
+        return ' ' * fill + text
+    elif align == 'center':
+        left = fill // 2
+        return ' ' * left + text + ' ' * (fill - left)
+    return text + ' ' * fill
+
+
+def legacy_format_board_entry(index, name, board_id, post_count, width):
+    """예전 board.format_board_entry()(비교용)."""
+    name_pad = 22
+    trimmed_name = ""
+    for c in name:
+        if wcswidth(trimmed_name + c) >= name_pad:
+            break
+        trimmed_name += c
+    name_space = " " * (name_pad - wcswidth(trimmed_name))
+    return (f"{C_HILITE}{index:>2}.{RESET} {C_TEXT}{trimmed_name}{RESET}{name_space} "
+            f"{C_DIM}[{board_id:<10}]{RESET} ({post_count:>3}건)")
+
+
+def _page(seed):
+    rnd = random.Random(seed)
+    posts = [{'title': ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 14))),
+              'author': rnd.choice(['sysop', '김철수', 'guest']), 'date': '24/01/01 12:00'}
+             for _ in range(LINES)]
+    boards = [(' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 5))), f'b{n}', n * 7)
+              for n in range(LINES)]
+    return posts, boards
+
+
+def _render(posts, boards, width, fmt):
+    for i, post in enumerate(posts):
+        line = (f"{C_HILITE}{i + 1:>3}{RESET} {C_TEXT}{post['title']}{RESET} "
+                f"{C_DIM}/ {post['author']} / {post['date']}{RESET}")
+        tui.box_line(line, width)
+    for i, (name, board_id, count) in enumerate(boards):
+        tui.box_line(fmt(i + 1, name, board_id, count, width), width)
+
+
+def _run(mode, pages, width, page):
+    session = session_mod.Session(os.open(os.devnull, os.O_WRONLY), os.open(os.devnull, os.O_WRONLY))
+    session.buffered = True
+    session_mod.activate(session)
+    original = tui.pad
+    fmt = board.format_board_entry
+    if mode == 'legacy':
+        tui.pad = legacy_pad
+        fmt = legacy_format_board_entry
+    try:
+        width_mod.clear_cache()
+        t0 = time.perf_counter()
+        for _ in range(pages):
+            if mode == 'cold':
+                width_mod.clear_cache()
+            _render(*page, width, fmt)
+            screen = bytes(session.out_buf)
+            session.out_buf.clear()
+        elapsed = time.perf_counter() - t0
+    finally:
+        tui.pad = original
+        session_mod.activate(None)
+        os.close(session.in_fd)
+        os.close(session.out_fd)
+    return elapsed, screen
+
+
+def main():
+    parser = argparse.ArgumentParser(description='게시판 페이지 렌더링 폭 계산 비용 비교')
+    parser.add_argument('--pages', type=int, default=2000, help='그릴 페이지 수')
+    parser.add_argument('--width', type=int, default=80, help='화면 폭')
+    args = parser.parse_args()
+
+    page = _page(1)
+    screens = {}
+    for mode in ('legacy', 'cold', 'warm'):
+        elapsed, screens[mode] = _run(mode, args.pages, args.width, page)
+        print(f'[{mode:6s}] {args.pages}페이지 {elapsed:.3f}초 - 초당 {args.pages / elapsed:.0f}페이지, '
+              f'페이지당 {elapsed / args.pages * 1e6:.0f}us')
+    same = screens['legacy'] == screens['cold'] == screens['warm']
+    print('화면 일치' if same else '화면이 서로 다름!')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
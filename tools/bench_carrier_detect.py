@@ -0,0 +1,155 @@
+"""모뎀 -> PTY 중계의 NO CARRIER 감지 비용 비교.
+
+PTY 한 쌍을 만들어 슬레이브를 pyserial로 115200bps 포트처럼 열고(dialup.py와
+같은 설정, timeout=0.01 / read(1024)), 마스터 쪽에서 업로드 데이터를 흘려 넣는다.
+중계 스레드는 dialup.py의 relay_modem_to_pty()처럼 읽은 청크를 다른 fd
+(/dev/null)에 쓰고 캐리어 끊김을 검사하는데, 검사 방식만 바꿔 가며 잰다.
+  legacy - 예전 방식(버퍼에 이어 붙이고 줄마다 decode().upper()로 찾기)
+  stream - dialup.CarrierWatch(꼬리 몇 바이트 + bytes.find)
+데이터를 다 보낸 뒤 "\\r\\nNO CARRIER\\r\\n"을 보내 둘 다 끊김을 알아채는지,
+그때까지 중계 스레드가 쓴 CPU 시간이 얼마인지 비교한다.
+
+데이터 종류:
+  binary - 무작위 바이트(줄바꿈 바이트가 평균 128바이트마다 섞임)
+  noeol  - 줄바꿈(\\r, \\n) 없는 무작위 바이트. 예전 방식은 줄이 안 끝나서
+           버퍼가 계속 자라고 청크마다 버퍼 전체를 다시 훑는다.
+속도:
+  --paced  115200bps(초당 11520바이트)로 실제 회선처럼 흘려 보낸다. 중계
+           스레드의 CPU 점유율을 본다.
+  (기본)   PTY가 받는 대로 최대한 빨리 보낸다. 처리량(MB/s)을 본다.
+
+    python3 tools/bench_carrier_detect.py [--size 1048576] [--paced]
+"""
+import argparse
+import os
+import pty
+import sys
+import threading
+import time
+import tty
+
+import serial
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+
+LINE_BPS = 115200
+NO_CARRIER = b'\r\nNO CARRIER\r\n'
+
+
+class LegacyWatch:
+    """예전 relay_modem_to_pty()의 검사 부분을 그대로 옮긴 것(비교용)."""
+
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, data):
+        self.buffer += data
+        while b'\n' in self.buffer or b'\r' in self.buffer:
+            if b'\n' in self.buffer:
+                idx = self.buffer.index(b'\n')
+            else:
+                idx = self.buffer.index(b'\r')
+            line = self.buffer[:idx + 1].decode('utf-8', errors='ignore').strip().upper()
+            if 'NO CARRIER' in line:
+                return 'NO CARRIER'
+            self.buffer = self.buffer[idx + 1:]
+        return None
+
+
+def _payload(kind, size):
+    data = bytearray(os.urandom(size))
+    if kind == 'noeol':
+        data = data.replace(b'\r', b'\x00').replace(b'\n', b'\x00')
+    else:
+        # 업로드 중에 "NO CARRIER"가 우연히 나오는 일은 없다고 보고 지운다
+        data = data.replace(b'NO CARRIER', b'no carrier')
+    return bytes(data)
+
+
+def _feeder(master, payload, paced, chunk=1024):
+    bytes_per_sec = LINE_BPS / 10
+    t0 = time.monotonic()
+    sent = 0
+    view = memoryview(payload)
+    while sent < len(view):
+        n = os.write(master, view[sent:sent + chunk])
+        sent += n
+        if paced:
+            ahead = t0 + sent / bytes_per_sec - time.monotonic()
+            if ahead > 0:
+                time.sleep(ahead)
+    os.write(master, NO_CARRIER)
+
+
+def _run(make_watch, payload, paced):
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    tty.setraw(master)
+    port = os.ttyname(slave)
+    ser = serial.Serial(port, LINE_BPS, timeout=0.01)
+    sink = os.open(os.devnull, os.O_WRONLY)
+    watch = make_watch(ser)
+    result = {}
+
+    def relay():
+        cpu0 = time.thread_time()
+        received = 0
+        while True:
+            data = ser.read(1024)
+            if not data:
+                continue
+            received += len(data)
+            os.write(sink, data)
+            lost = watch.feed(data)
+            if lost:
+                result['cpu'] = time.thread_time() - cpu0
+                result['received'] = received
+                result['detected_at'] = time.monotonic()
+                return
+
+    t = threading.Thread(target=relay, daemon=True)
+    t0 = time.monotonic()
+    t.start()
+    _feeder(master, payload, paced)
+    t.join(max(60, len(payload) / (LINE_BPS / 10) * 2))
+    ser.close()
+    os.close(sink)
+    os.close(master)
+    if 'detected_at' not in result:
+        return None
+    result['elapsed'] = result['detected_at'] - t0
+    return result
+
+
+def main():
+    import dialup
+    parser = argparse.ArgumentParser(description='NO CARRIER 감지 방식별 중계 비용 비교')
+    parser.add_argument('--size', type=int, default=1 << 20, help='보낼 데이터 크기(바이트)')
+    parser.add_argument('--paced', action='store_true', help='115200bps 속도로 흘려 보냄')
+    args = parser.parse_args()
+
+    watchers = [
+        ('legacy', lambda ser: LegacyWatch()),
+        ('stream', lambda ser: dialup.CarrierWatch(ser, use_dcd=False)),
+    ]
+    ok = True
+    mode = '115200bps 속도' if args.paced else '최대 속도'
+    for kind in ('binary', 'noeol'):
+        payload = _payload(kind, args.size)
+        print(f'[{kind}] {len(payload)}바이트, {mode}')
+        for name, make_watch in watchers:
+            r = _run(make_watch, payload, args.paced)
+            if r is None:
+                print(f'  {name:6s}  NO CARRIER 감지 실패')
+                ok = False
+                continue
+            mb = r['received'] / 1e6
+            print(f'  {name:6s}  중계 CPU {r["cpu"]:.3f}초 ({r["cpu"] / r["elapsed"] * 100:.1f}%), '
+                  f'경과 {r["elapsed"]:.2f}초, 처리량 {mb / r["elapsed"]:.2f}MB/s, '
+                  f'MB당 CPU {r["cpu"] / mb * 1000:.1f}ms')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
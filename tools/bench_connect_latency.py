@@ -0,0 +1,134 @@
+"""텔넷 접속부터 첫 화면(인코딩 선택 프롬프트)까지 걸리는 시간을 잰다.
+
+세션 워커 풀(server/sessionpool.py)을 끈 경우(접속마다 bbs.py를 새로 띄우는
+예전 방식)와 켠 경우를 차례로 띄워 같은 횟수만큼 접속해 보고 비교한다.
+실제 운영 데이터를 건드리지 않도록 임시 디렉토리를 작업 디렉토리로 쓴다.
+
+    python3 tools/bench_connect_latency.py [--connects 20] [--pool-size 4]
+
+각 모드마다 telnet.py의 telnet_server()를 별도 프로세스에서 빈 포트로 띄우고
+(접속 빈도 제한은 끈다), 접속 -> 첫 출력 바이트, 접속 -> "선택 (1~3" 프롬프트
+까지의 시간을 잰다. 텔넷 채널은 프롬프트 전에 쉬지 않으므로(bbsio/pacing.py)
+프롬프트 시간은 세션 기동 + 첫 화면 출력 시간 그대로다.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+
+PROMPT = '선택 (1~3'.encode('euc-kr')
+IAC = 0xFF
+
+
+def _serve(port, pool_size, workdir):
+    os.chdir(workdir)
+    import telnet
+    telnet.LISTEN_HOST = '127.0.0.1'
+    telnet.LISTEN_PORT = port
+    telnet.RATE_LIMIT_MAX_ATTEMPTS = 10 ** 9
+    telnet.MAX_CONNECTIONS = 10 ** 6
+    telnet.BBS_COMMAND = ['python3', '-u', os.path.join(ROOT, 'bbs.py'), '--channel=telnet']
+    telnet.POOL_SIZE = pool_size
+    telnet.telnet_server()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _strip_negotiation(data):
+    # 서버가 접속 직후 보내는 IAC 3바이트 협상 시퀀스만 걷어낸다.
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        if data[i] == IAC and i + 2 < len(data):
+            i += 3
+            continue
+        out.append(data[i])
+        i += 1
+    return bytes(out)
+
+
+def _connect_once(port, timeout=30):
+    t0 = time.perf_counter()
+    first = None
+    received = b''
+    with socket.create_connection(('127.0.0.1', port), timeout=timeout) as conn:
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                raise RuntimeError('프롬프트 전에 연결이 끊김')
+            received += chunk
+            text = _strip_negotiation(received)
+            if first is None and text:
+                first = time.perf_counter() - t0
+            if PROMPT in text:
+                return first, time.perf_counter() - t0
+
+
+def _wait_listening(port, deadline=20):
+    end = time.time() + deadline
+    while time.time() < end:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('텔넷 서버가 뜨지 않음')
+
+
+def _bench(label, pool_size, connects, gap, workdir):
+    port = _free_port()
+    ctx = multiprocessing.get_context('fork')
+    server = ctx.Process(target=_serve, args=(port, pool_size, workdir), daemon=True)
+    server.start()
+    try:
+        _wait_listening(port)
+        # 대기 확인용 접속과 워커 기동(import)이 끝날 시간을 준다.
+        time.sleep(3 if pool_size else 1)
+        firsts, prompts = [], []
+        for _ in range(connects):
+            first, prompt = _connect_once(port)
+            firsts.append(first)
+            prompts.append(prompt)
+            # 풀이 방금 꺼내 쓴 워커를 다시 채울 시간 - 실제 접속 간격 흉내
+            time.sleep(gap)
+    finally:
+        server.terminate()
+        server.join()
+
+    def fmt(values):
+        values = sorted(values)
+        p90 = values[min(len(values) - 1, int(len(values) * 0.9))]
+        return (f'중앙값 {statistics.median(values) * 1000:7.1f}ms  '
+                f'p90 {p90 * 1000:7.1f}ms  최대 {values[-1] * 1000:7.1f}ms')
+
+    print(f'[{label}]')
+    print(f'  첫 출력   {fmt(firsts)}')
+    print(f'  프롬프트  {fmt(prompts)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='텔넷 접속 -> 첫 화면 지연 측정')
+    parser.add_argument('--connects', type=int, default=20, help='모드당 접속 횟수')
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--gap', type=float, default=0.5, help='접속 사이 간격(초)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bbs_latency_')
+    _bench('풀 없음 (접속마다 bbs.py 실행)', 0, args.connects, args.gap, workdir)
+    _bench(f'워커 풀 (대기 {args.pool_size}개)', args.pool_size, args.connects, args.gap, workdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
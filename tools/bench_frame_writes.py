@@ -0,0 +1,113 @@
+"""화면 하나를 그릴 때 write() 시스템 콜이 몇 번 나가는지 잰다.
+
+세션을 in-process 방식(server/inprocess.py와 같은 socketpair + Session)으로
+띄우고, 정해진 키 입력(인코딩 선택 -> 로그인 -> 메인 메뉴 -> 자유게시판 ->
+뒤로 -> 종료)을 흘려 넣은 뒤 Session의 출력 통계(화면 수, write 횟수,
+바이트)를 화면 버퍼를 끈 경우(예전처럼 rawprint마다 write)와 켠 경우
+(BBS_FRAME_BUFFER=1, 입력 대기 직전에 한 번에 write)로 비교한다. 실제 운영
+데이터를 건드리지 않도록 임시 디렉토리를 작업 디렉토리로 쓴다.
+
+    python3 tools/bench_frame_writes.py [--posts 30]
+"""
+import argparse
+import hashlib
+import os
+import select
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+USER = 'bench'
+PASSWORD = 'bench'
+
+# (보낼 입력, 설명). 각 입력은 직전 화면 출력이 잠잠해진 뒤에 보낸다 -
+# 프롬프트가 뜨기 전에 보낸 입력은 rawinput()의 flush_input()이 버린다.
+SCRIPT = [
+    ('1\r', '인코딩 선택(완성형)'),
+    (USER + '\r', '이용자 ID'),
+    (PASSWORD + '\r', '비밀번호'),
+    ('\r', '로그인 성공 안내'),
+    ('3\r', '메인 메뉴 -> 자유게시판'),
+    ('p\r', '게시판 -> 뒤로'),
+    ('x\r', '메인 메뉴 -> 종료'),
+    ('y\r', '종료 확인'),
+]
+QUIET_SEC = 0.5
+
+
+def _seed(posts):
+    from core.init import initialize
+    from core.storage import get_store
+    initialize()
+    store = get_store()
+    store.put_user(USER, {'password': hashlib.sha256(PASSWORD.encode()).hexdigest(),
+                          'is_admin': False, 'name': USER})
+    for n in range(posts):
+        store.add_post({'board': 'bbs', 'author': USER, 'title': f'벤치마크 글 {n + 1}',
+                        'content': 'x', 'date': '2024-01-01', 'attachment': None})
+
+
+def _drain_until_quiet(sock, received):
+    while True:
+        ready, _, _ = select.select([sock], [], [], QUIET_SEC)
+        if not ready:
+            return True
+        chunk = sock.recv(65536)
+        if not chunk:
+            return False
+        received.append(chunk)
+
+
+def _run_once(buffered):
+    import bbs
+    from bbsio.session import Session, activate
+    client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    session = Session(server.fileno(), server.fileno(), channel='telnet')
+    session.buffered = buffered
+
+    def target():
+        activate(session)
+        bbs.run('telnet')
+        server.close()
+
+    thread = threading.Thread(target=target, daemon=True)
+    t0 = time.perf_counter()
+    thread.start()
+    received = []
+    for keys, _label in SCRIPT:
+        if not _drain_until_quiet(client, received):
+            break
+        client.sendall(keys.encode('euc-kr'))
+    _drain_until_quiet(client, received)
+    client.close()
+    thread.join(10)
+    elapsed = time.perf_counter() - t0
+    return session, sum(len(c) for c in received), len(received), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='화면당 write() 횟수 비교')
+    parser.add_argument('--posts', type=int, default=30, help='자유게시판에 미리 넣어 둘 글 수')
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='bbs_frames_'))
+    _seed(args.posts)
+    for buffered in (False, True):
+        session, received_bytes, chunks, elapsed = _run_once(buffered)
+        frames = max(session.frames, 1)
+        print(f'[화면 버퍼 {"켬" if buffered else "끔"}]')
+        print(f'  화면 {session.frames}개, write {session.writes}회, {session.bytes_out}바이트 '
+              f'({elapsed:.1f}초)')
+        print(f'  화면당 write 평균 {session.writes / frames:.1f}회 / 최대 {session.max_frame_writes}회, '
+              f'평균 {session.bytes_out // frames}바이트')
+        print(f'  클라이언트 쪽 recv() {chunks}회, {received_bytes}바이트')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
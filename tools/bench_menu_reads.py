@@ -0,0 +1,114 @@
+"""메뉴 루프 한 바퀴마다 데이터 파일을 다시 파싱하는 비용 비교(JSON 백엔드).
+
+임시 디렉토리의 data/에 회원 --users명, 자료 --files건, 쪽지 --messages통을
+넣고, 메뉴 루프를 --iterations번(기본 1000) 도는 것처럼 한 바퀴마다
+게시판 목록(load_boards), 게시판별 글 수, 안 읽은 쪽지 수, 자료실 색인,
+접속 통계, 회원 목록을 읽는다. --change-every바퀴마다 다른 세션이 쪽지를
+보내고 자료를 등록한다.
+  legacy - 예전처럼 매번 파일을 열어 json.load(core.atomic.read_json)
+  cache  - core.cache.read_json(stat이 같으면 스냅샷의 쓰기 시 복사 뷰)
+마지막 바퀴에 읽은 내용이 그때 파일 내용과 같은지(다른 세션의 변경을 놓치지
+않았는지), 캐시가 파일을 몇 번 다시 파싱했는지도 본다.
+
+    python3 tools/bench_menu_reads.py [--iterations 1000] [--users 2000]
+                                      [--files 2000] [--messages 200]
+                                      [--change-every 100]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _loop(store, args, me):
+    from core import board
+    seen = []
+    for n in range(args.iterations):
+        if n and n % args.change_every == 0:
+            store.add_message({'from': 'other', 'to': me, 'content': str(n), 'date': '', 'read': False})
+            store.add_file_entry({'filename': f'new{n}.zip', 'stored_name': f'n{n}', 'description': '',
+                                  'uploader': 'other', 'size': n, 'date': ''})
+        boards = board.load_boards()
+        counts = store.board_counts()
+        unread = store.unread_count(me)
+        entries = store.load_index()
+        stats = store.load_stats()
+        users = store.load_users()
+        seen.append((len(boards), sorted(counts.items()), unread, len(entries),
+                     entries[-1]['filename'], stats['total_visits'], users[me]['name']))
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description='메뉴 루프의 데이터 파일 재파싱 비용 비교')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=200, help='내 쪽지함의 쪽지 수')
+    parser.add_argument('--change-every', type=int, default=100)
+    args = parser.parse_args()
+
+    os.environ['BBS_STORAGE'] = 'json'
+    os.environ['BBS_FSYNC'] = '0'
+    os.chdir(tempfile.mkdtemp(prefix='bbs_bench_'))
+    from core.init import initialize
+    initialize()
+    from core import atomic, cache, board, json_store, storage
+    store = storage.get_store()
+    me = 'user00001'
+    store.save_users({f'user{i:05d}': {'password': '', 'name': f'회원{i}', 'is_admin': False}
+                      for i in range(args.users)})
+    store.save_index([{'id': i + 1, 'filename': f'file{i}.zip', 'stored_name': f's{i}', 'description': '설명',
+                       'uploader': 'sysop', 'size': i, 'date': ''} for i in range(args.files)])
+    for i in range(args.messages):
+        store.add_message({'from': 'sysop', 'to': me, 'content': '안녕하세요' * 10, 'date': '', 'read': i % 2 == 0})
+    store.add_post({'board': 'bbs', 'author': 'sysop', 'title': 't', 'content': 'c', 'date': '', 'attachment': None})
+
+    parses = {'n': 0}
+
+    def legacy_read_json(path, default_factory):
+        if os.path.exists(path):
+            parses['n'] += 1
+        return atomic.read_json(path, default_factory)
+
+    results = {}
+    for mode in ('legacy', 'cache'):
+        # board/json_store는 read_json을 이름으로 가져오고, mailbox/postlog는
+        # cache.read_json을 부른다 - legacy는 넷 다 예전 read_json으로 바꾼다.
+        patched = {board: 'read_json', json_store: 'read_json', cache: 'read_json'}
+        saved = {m: getattr(m, name) for m, name in patched.items()}
+        if mode == 'legacy':
+            for m, name in patched.items():
+                setattr(m, name, legacy_read_json)
+        cache.file_cache().clear()
+        parses['n'] = 0
+        misses = cache.file_cache().misses
+        t0 = time.perf_counter()
+        try:
+            results[mode] = _loop(store, args, me)
+        finally:
+            for m, fn in saved.items():
+                setattr(m, patched[m], fn)
+        elapsed = time.perf_counter() - t0
+        count = parses['n'] if mode == 'legacy' else cache.file_cache().misses - misses
+        print(f'[{mode:6s}] {args.iterations}바퀴 {elapsed:.3f}초 (바퀴당 {elapsed / args.iterations * 1e3:.2f}ms), '
+              f'파일 파싱 {count}번')
+    # 두 번째 실행은 첫 번째가 바꾼 데이터 위에서 돌았으므로 결과를 서로 비교하지
+    # 않고, 마지막 바퀴에 읽은 내용이 지금 파일 내용과 같은지(다른 세션의 변경을
+    # 놓치지 않았는지) 확인한다.
+    cache.file_cache().clear()
+    fresh = (len(atomic.read_json(os.path.join('data', 'boards.json'), list)),
+             atomic.read_json(json_store.INDEX_FILE, list)[-1]['filename'],
+             atomic.read_json(json_store.USER_FILE, dict)[me]['name'])
+    last = results['cache'][-1]
+    same = (last[0], last[4], last[6]) == fresh and last[2] == store.unread_count(me)
+    print('마지막 바퀴 내용이 파일과 일치' if same else '캐시가 옛 내용을 돌려줌!')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""여러 줄 글 붙여 넣기(multiline_input)의 입력 처리 속도를 잰다.
+
+세션을 in-process 방식(server/inprocess.py와 같은 socketpair + Session)으로
+띄워 rawio.multiline_input()을 부르고, 클라이언트 쪽에서 한글 섞인 글 한 편을
+통째로(붙여 넣기처럼) 보낸 뒤 마지막 "." 줄까지 처리되는 시간을 잰다. 에코는
+따로 받아 둔다. 입력 읽는 방식만 바꿔 가며 비교한다.
+  legacy - 예전 getchar()(바이트마다 select()+os.read(fd, 1), 부를 때마다
+           출력을 내보냄 - 에코도 글자마다 write 한 번)
+  cache  - 지금 getchar()(Session.fill로 커널에 와 있는 만큼 한 번에, 남은
+           입력이 있는 동안은 에코를 모아 둠)
+둘 다 돌려받은 글이 보낸 글과 같은지, 에코에서 스타일 지정(lineedit.PLAIN)을 빼면
+화면에 찍히는 내용이 서로 같은지 확인하고, 입력 쪽 시스템 콜(select+read)
+횟수와 에코 write 횟수/바이트를 같이 보여준다.
+
+    python3 tools/bench_paste_input.py [--lines 2000] [--rounds 3]
+"""
+import argparse
+import os
+import select
+import socket
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bbsio import lineedit, rawio, session as session_mod  # noqa: E402
+
+ENCODING = 'euc-kr'
+LINE = '붙여 넣기 테스트 줄입니다 - paste throughput 0123456789'
+
+
+class LegacyReader:
+    """예전 getchar()를 그대로 옮긴 것(비교용). 시스템 콜 수를 센다."""
+
+    def __init__(self):
+        self.syscalls = 0
+
+    def _read_byte(self, fd):
+        ready, _, _ = select.select([fd], [], [], rawio.IDLE_TIMEOUT_SECONDS)
+        self.syscalls += 1
+        if not ready:
+            raise rawio.SessionIdleTimeout('입력 없음')
+        byte = os.read(fd, 1)
+        self.syscalls += 1
+        if not byte:
+            raise rawio.ConnectionClosed('입력 스트림 종료(EOF)')
+        return byte
+
+    def getchar(self):
+        rawio.flush_output()
+        session = session_mod.current()
+        first = self._read_byte(session.in_fd)
+        length = rawio._expected_char_len(first, session.encoding)
+        raw = first
+        while len(raw) < length:
+            raw += self._read_byte(session.in_fd)
+        try:
+            return raw.decode(session.encoding)
+        except UnicodeDecodeError:
+            return '�'
+
+
+def _drain(sock, received):
+    # 세션 쪽이 끝나고 소켓을 닫을 때(EOF)까지 에코를 다 받는다
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return
+        received += chunk
+
+
+def _run(mode, text):
+    client, server = socket.socketpair()
+    result = {}
+    started = threading.Event()
+    legacy = LegacyReader()
+    original = rawio.getchar
+
+    def session_thread():
+        s = session_mod.Session(server.fileno(), server.fileno(), 'telnet', ENCODING)
+        session_mod.activate(s)
+        if mode == 'legacy':
+            rawio.getchar = legacy.getchar
+        try:
+            started.set()
+            result['text'] = rawio.multiline_input('', ENCODING)
+            result['done'] = time.perf_counter()
+            result['syscalls'] = legacy.syscalls if mode == 'legacy' else s.reads * 2
+            result['writes'] = s.writes
+        finally:
+            rawio.getchar = original
+            rawio.flush_output()
+
+    echoed = bytearray()
+    drainer = threading.Thread(target=_drain, args=(client, echoed), daemon=True)
+    drainer.start()
+    t = threading.Thread(target=session_thread, daemon=True)
+    t.start()
+    started.wait()
+    # 프롬프트 직전의 flush_input()이 먼저 끝나도록 잠깐 기다린다 - 그 전에
+    # 보낸 입력은 버려진다.
+    time.sleep(0.2)
+    payload = (text.replace('\n', '\r') + '\r.\r').encode(ENCODING)
+    t0 = time.perf_counter()
+    client.sendall(payload)
+    t.join()
+    server.shutdown(socket.SHUT_WR)
+    drainer.join()
+    client.close()
+    server.close()
+    screen = bytes(echoed).replace(lineedit.PLAIN.encode(), b'')
+    return (result['text'] == text, len(payload), result['done'] - t0,
+            result['syscalls'], result['writes'], len(echoed), screen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='multiline_input 붙여 넣기 속도 측정')
+    parser.add_argument('--lines', type=int, default=2000, help='붙여 넣을 글의 줄 수')
+    parser.add_argument('--rounds', type=int, default=3, help='반복 횟수')
+    args = parser.parse_args()
+
+    text = '\n'.join(f'{n:5d} {LINE}' for n in range(args.lines))
+    ok = True
+    screens = {}
+    for mode in ('legacy', 'cache'):
+        for rnd in range(args.rounds):
+            same, nbytes, elapsed, syscalls, writes, echo_bytes, screen = _run(mode, text)
+            ok = ok and same
+            screens.setdefault(mode, screen)
+            print(f'[{mode:6s} {rnd + 1}회차] {nbytes}바이트 {elapsed:.3f}초 - '
+                  f'{nbytes / elapsed / 1e3:.0f}KB/s, 입력 시스템 콜 {syscalls}회, '
+                  f'에코 write {writes}회/{echo_bytes}바이트'
+                  f'{"" if same else " (내용 불일치!)"}')
+    if screens['legacy'] != screens['cache']:
+        print('에코 화면 내용이 서로 다름!')
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
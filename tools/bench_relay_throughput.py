@@ -0,0 +1,158 @@
+"""텔넷 중계(server/telnet.py)의 데이터 처리량을 잰다.
+
+파일 전송처럼 큰 데이터가 중계를 양방향으로 지나가는 경우만 따로 보려고,
+세션 명령(BBS_COMMAND)을 bbs.py 대신 cat으로 바꾼 텔넷 서버를 임시 작업
+디렉토리에서 별도 프로세스로 띄운다. 클라이언트가 --size바이트를 보내면
+소켓 -> PTY -> cat -> PTY -> 소켓으로 그대로 돌아오고, 다 돌아올 때까지의
+시간(MB/s)과 그동안 텔넷 서버 프로세스가 쓴 CPU 시간(/proc/<pid>/stat)을
+보여준다. cat 프로세스의 CPU는 세지 않는다(중계 쪽 비용만 본다).
+
+데이터에는 0xFF(텔넷 IAC)를 넣지 않는다 - 중계가 IAC를 해석/이스케이프하면
+보낸 것과 받은 바이트 수가 달라진다.
+
+    python3 tools/bench_relay_throughput.py [--size 33554432] [--rounds 3]
+                                            [--session-mode subprocess|inprocess]
+
+--session-mode inprocess는 cat 대신 서버 프로세스 안의 스레드가 소켓에서
+읽은 걸 그대로 되돌려 쓴다(중계 + 세션 스레드를 합친 비용).
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+
+# 접속 직후 서버가 보내는 텔넷 협상(NEGOTIATION)과 cat의 첫 에코가 다 올
+# 때까지 기다리는 시간
+SETTLE_SEC = 0.5
+
+
+def _echo_session(sock, channel):
+    # inprocess 세션 대신 받은 걸 그대로 돌려주는 스레드
+    fd = sock.fileno()
+    try:
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def _serve(port, session_mode, workdir):
+    os.chdir(workdir)
+    import telnet
+    import inprocess
+    telnet.LISTEN_HOST = '127.0.0.1'
+    telnet.LISTEN_PORT = port
+    telnet.RATE_LIMIT_MAX_ATTEMPTS = 10 ** 9
+    telnet.BBS_COMMAND = ['cat']
+    telnet.POOL_SIZE = 0
+    telnet.SESSION_MODE = session_mode
+    if session_mode == 'inprocess':
+        inprocess.preload = lambda: None
+
+        class EchoSession(inprocess.InProcessSession):
+            def _run(self):
+                _echo_session(self.sock, self.channel)
+                self.returncode = 0
+        inprocess.InProcessSession = EchoSession
+    telnet.telnet_server()
+
+
+def _cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _connect(port):
+    deadline = time.time() + 10
+    while True:
+        try:
+            return socket.create_connection(('127.0.0.1', port))
+        except ConnectionRefusedError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def _transfer(port, payload, server_pid):
+    sock = _connect(port)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # 한 바이트를 보내 세션이 떴는지 보고, 그때까지 온 협상/에코 바이트는
+    # 버린다.
+    sock.sendall(b'\r')
+    time.sleep(SETTLE_SEC)
+    sock.setblocking(False)
+    try:
+        while sock.recv(65536):
+            pass
+    except BlockingIOError:
+        pass
+    sock.setblocking(True)
+
+    sender = threading.Thread(target=sock.sendall, args=(payload,))
+    buf = bytearray(65536)
+    received = 0
+    cpu0 = _cpu_seconds(server_pid)
+    t0 = time.perf_counter()
+    sender.start()
+    while received < len(payload):
+        n = sock.recv_into(buf)
+        if not n:
+            break
+        received += n
+    elapsed = time.perf_counter() - t0
+    cpu = _cpu_seconds(server_pid) - cpu0
+    sender.join()
+    sock.close()
+    return received, elapsed, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='텔넷 중계 처리량 측정')
+    parser.add_argument('--size', type=int, default=32 << 20, help='한 번에 보낼 데이터 크기(바이트)')
+    parser.add_argument('--rounds', type=int, default=3, help='반복 횟수')
+    parser.add_argument('--session-mode', choices=('subprocess', 'inprocess'), default='subprocess')
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size).replace(b'\xff', b'\x00')
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix='bbs_relay_')
+    ctx = multiprocessing.get_context('fork')
+    server = ctx.Process(target=_serve, args=(port, args.session_mode, workdir), daemon=True)
+    server.start()
+    ok = True
+    try:
+        for rnd in range(args.rounds):
+            received, elapsed, cpu = _transfer(port, payload, server.pid)
+            mb = received / 1e6
+            print(f'[{rnd + 1}회차] {received}/{len(payload)}바이트 왕복 {elapsed:.2f}초 - '
+                  f'{mb / elapsed:.1f}MB/s, 서버 CPU {cpu:.2f}초 (MB당 {cpu / mb * 1000:.1f}ms)')
+            ok = ok and received == len(payload)
+    finally:
+        server.terminate()
+        server.join()
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""게시글 검색 - 색인 검색과 예전 방식(전체 글을 읽어 한 건씩 비교) 비교.
+
+임시 디렉토리에 글 --posts건(기본 50000, 게시판 5개, 한글/영문이 섞인 제목과
+--body-chars자 안팎의 본문)을 만들고, 검색어 몇 개로 첫 페이지/뒤쪽 페이지를
+가져오는 시간을 잰다.
+  scan   - 예전처럼 할 수 있던 유일한 방법: 모든 글(본문 포함)을 읽어 검색어의
+           낱말이 제목/글쓴이/본문에 들어 있는지 하나씩 본다
+  index  - store.search_posts()(core/search.py 역색인)
+두 방식이 찾은 글(색인은 최신 core.search.MAX_RESULTS건까지)이 같은지도 확인한다.
+
+    python3 tools/bench_search.py [--backend json|sqlite] [--posts 50000]
+                                  [--body-chars 200] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BOARDS = ['notice', 'hello', 'bbs', 'plaza', 'market']
+WORDS = ['안녕하세요', '자유게시판', '공지', '모뎀', '통신', '하이텔', '천리안', '질문', '답변', '정모',
+         '후기', '사진', '드립니다', '팝니다', '삽니다', '동호회', '프로그램', '게임', '음악', '영화',
+         'BBS', 'ZMODEM', 'XMODEM', '14400bps', 'DOS', 'Windows', 'IYAGI', 'modem']
+QUERIES = [('모뎀', None), ('하이텔 정모', None), ('zmodem', None), ('천리안 동호회 음악', None),
+           ('팝니다', 'market'), ('iyagi 통신', 'bbs'), ('모', None), ('텔', 'bbs')]
+PER_PAGE = 15
+
+
+def _posts(n, body_chars, seed=1):
+    rnd = random.Random(seed)
+
+    def sentence(chars):
+        out = []
+        while sum(len(w) + 1 for w in out) < chars:
+            out.append(rnd.choice(WORDS) + rnd.choice(['', '을', '이', '는', '에서', '입니다']))
+        return ' '.join(out)
+    return [{'board': BOARDS[i % len(BOARDS)], 'author': f'user{rnd.randrange(300)}',
+             'title': sentence(20), 'content': sentence(body_chars),
+             'date': '2024-01-01 12:00:00', 'attachment': None}
+            for i in range(n)]
+
+
+def _scan(store, query, board_id):
+    """예전 방식 - 모든 글을 읽어 낱말이 다 들어 있는지 본다(최신순). 한글 낱말
+    (한 글자 또는 두 글자)은 색인 낱말이 아니라 글 내용에 그대로 들어 있는지
+    보므로, 한 글자 검색어를 색인이 빠뜨리면 결과가 달라진다."""
+    from core.search import terms
+    wanted = terms(query)
+
+    def matches(post):
+        text = '\n'.join(post.get(k) or '' for k in ('title', 'author', 'content'))
+        words = terms(text)
+        return all(term in text if term[0] >= '가' else term in words for term in wanted)
+    found = [p for p in store.load_posts() if (board_id is None or p['board'] == board_id) and matches(p)]
+    found.sort(key=lambda p: p['id'], reverse=True)
+    return found[:PER_PAGE], len(found)
+
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='게시글 검색 색인 벤치마크')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--body-chars', type=int, default=200, help='본문 글자 수(대략)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['BBS_STORAGE'] = args.backend
+    os.environ['BBS_FSYNC'] = '0'
+    os.chdir(tempfile.mkdtemp(prefix='bbs_bench_'))
+    from core.init import initialize
+    initialize()
+    from core.storage import get_store
+    from core.search import MAX_RESULTS
+    store = get_store()
+    posts = _posts(args.posts, args.body_chars)
+    t0 = time.perf_counter()
+    store.save_posts([dict(p, id=i + 1) for i, p in enumerate(posts)])
+    print(f'글 {args.posts}건 저장 + 색인 {time.perf_counter() - t0:.1f}초 ({args.backend})')
+
+    t0 = time.perf_counter()
+    extra = _posts(200, args.body_chars, seed=2)
+    for p in extra:
+        store.add_post(p)
+    print(f'글쓰기(색인 포함) 한 건당 {(time.perf_counter() - t0) / len(extra) * 1e3:.2f}ms')
+
+    ok = True
+    for query, board_id in QUERIES:
+        label = f'{query!r}' + (f' @{board_id}' if board_id else '')
+        scan_time, (scan_page, scan_total) = _best(lambda: _scan(store, query, board_id), 1)
+        first, (page, total) = _best(lambda: store.search_posts(query, board_id, 0, PER_PAGE), args.repeat)
+        deep, _ = _best(lambda: store.search_posts(query, board_id, max(0, total - PER_PAGE), PER_PAGE),
+                        args.repeat)
+        same = scan_total > 0 and total == min(scan_total, MAX_RESULTS) and [p['id'] for p in page] == [p['id'] for p in scan_page]
+        ok = ok and same
+        print(f'  {label:24s} {scan_total:6d}건  scan {scan_time * 1e3:8.1f}ms  '
+              f'index 첫 페이지 {first * 1e3:6.2f}ms  마지막 페이지 {deep * 1e3:6.2f}ms'
+              f'{"" if same else "  결과 다름!"}')
+    print('검색 결과 일치' if ok else '검색 결과가 서로 다름!')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
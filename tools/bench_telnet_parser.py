@@ -0,0 +1,103 @@
+"""텔넷 수신 필터 비용 비교(마이크로 벤치마크).
+
+server/telnet.py가 클라이언트에서 받은 조각마다 하는 일을 떼어 내서 잰다.
+  legacy - 예전 strip_telnet_iac()(한 바이트씩 파이썬 루프)를 그대로 옮긴 것
+  parser - TelnetParser.feed() (IAC 없는 구간은 bytes.find()로 통째로)
+조각 종류:
+  keys    - 키 입력처럼 1~3바이트짜리 조각
+  text    - IAC가 없는 64KiB 조각(ASCII/한글 업로드)
+  binary  - 무작위 바이너리를 escape_iac()로 이스케이프한 64KiB 조각
+            (BINARY 모드 클라이언트가 보내는 ZMODEM 데이터와 같은 모양, 0xFF가
+            평균 256바이트마다 IAC IAC로 들어 있다)
+legacy는 IAC IAC를 0xFF로 풀기는 하지만 조각 경계에 걸린 커맨드는 호출부가
+따로 처리했으므로 여기서는 필터 자체의 비용만 비교한다. 마지막 줄은 반대
+방향(서버 -> 클라이언트) escape_iac()의 비용이다.
+
+    python3 tools/bench_telnet_parser.py [--mb 16]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+
+import telnet  # noqa: E402
+
+IAC = telnet.IAC
+
+
+def legacy_strip(data):
+    """예전 strip_telnet_iac()의 해석 루프(비교용)."""
+    out = bytearray()
+    responses = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        b = data[i]
+        if b == IAC:
+            if i + 1 < n and data[i + 1] == IAC:
+                out.append(IAC)
+                i += 2
+                continue
+            if i + 2 < n and data[i + 1] in telnet._IAC_COMMANDS:
+                option = data[i + 2]
+                if option not in telnet._IAC_NO_REPLY_OPTIONS:
+                    responses.extend([IAC, telnet._IAC_DECLINE[data[i + 1]], option])
+                i += 3
+                continue
+            out.append(b)
+            i += 1
+            continue
+        out.append(b)
+        i += 1
+    return bytes(out), bytes(responses)
+
+
+def _chunks(kind, total):
+    if kind == 'keys':
+        keys = b'ls\r' + 'ㄱ'.encode('euc-kr') + b'x'
+        return [keys[i % len(keys):i % len(keys) + 1 + i % 3] for i in range(total // 2)]
+    size = 64 * 1024
+    if kind == 'text':
+        line = ('안녕하세요 BBS 업로드 테스트 줄입니다.\r\n'.encode('euc-kr'))
+        chunk = (line * (size // len(line) + 1))[:size]
+        return [chunk] * (total // size)
+    raw = os.urandom(total)
+    escaped = telnet.escape_iac(raw)
+    return [escaped[i:i + size] for i in range(0, len(escaped), size)]
+
+
+def _time(fn, chunks):
+    nbytes = sum(len(c) for c in chunks)
+    t0 = time.perf_counter()
+    for c in chunks:
+        fn(c)
+    elapsed = time.perf_counter() - t0
+    return nbytes / elapsed / 1e6, elapsed / len(chunks) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='텔넷 수신 필터 비용 비교')
+    parser.add_argument('--mb', type=int, default=16, help='조각 종류별로 흘려 볼 데이터 양(MB)')
+    args = parser.parse_args()
+    total = args.mb << 20
+
+    for kind in ('keys', 'text', 'binary'):
+        chunks = _chunks(kind, total if kind != 'keys' else 200000)
+        print(f'[{kind}] 조각 {len(chunks)}개, {sum(len(c) for c in chunks)}바이트')
+        for name, make in (('legacy', lambda: legacy_strip), ('parser', lambda: telnet.TelnetParser().feed)):
+            mbs, us = _time(make(), chunks)
+            print(f'  {name:6s}  {mbs:8.1f}MB/s  조각당 {us:8.2f}us')
+
+    out_chunks = [os.urandom(64 * 1024) for _ in range(total // (64 * 1024))]
+    text_chunks = _chunks('text', total)
+    for label, chunks in (('binary', out_chunks), ('text', text_chunks)):
+        mbs, us = _time(telnet.escape_iac, chunks)
+        print(f'[escape_iac {label}] {mbs:.1f}MB/s  조각당 {us:.2f}us')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""세션 하나가 회원 목록을 몇 번 다시 읽는지 비교하는 벤치마크.
+
+임시 디렉토리의 data/에 회원 --users명(기본 2000)을 넣고, 세션 하나가 메뉴를
+--iterations번(기본 500) 도는 것을 흉내 낸다. 한 바퀴마다
+  - 메인 메뉴 그리기: is_admin() 한 번
+  - 글 목록의 글 몇 개 고치기/지우기 권한: board._can_edit() --checks번
+  - 관리자 전용 게시판 쓰기 권한: is_admin() 한 번
+  - 쪽지 받는 사람 확인: 회원 여부 한 번
+을 부르고, --change-every바퀴마다 다른 세션이 회원 한 명을 고친 것처럼
+(이 세션의 UserDirectory를 거치지 않고) 저장소에 바로 쓴다.
+  legacy    - 예전 is_admin()/쪽지 확인(부를 때마다 load_users())
+  directory - core.profile.UserDirectory(users_version()이 바뀔 때만 다시 읽음)
+회원 목록 파싱(load_users) 횟수와 걸린 시간, 두 방식의 판정이 같은지를 본다.
+
+    python3 tools/bench_user_directory.py [--backend json|sqlite] [--users 2000]
+                                          [--iterations 500] [--checks 5]
+                                          [--change-every 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _legacy_is_admin(store, username):
+    """예전 core.profile.is_admin()(비교용)."""
+    return store.load_users().get(username, {}).get('is_admin', False)
+
+
+def _session(store, directory, mode, args, usernames):
+    """세션 하나의 메뉴 루프. 판정 결과 목록을 돌려준다."""
+    from core import board
+    if mode == 'legacy':
+        is_admin = lambda u: _legacy_is_admin(store, u)  # noqa: E731
+        is_member = lambda u: u in store.load_users()  # noqa: E731
+        can_edit = lambda u, post: u == post['author'] or is_admin(u)  # noqa: E731
+    else:
+        is_admin = directory.is_admin
+        is_member = directory.__contains__
+        can_edit = board._can_edit
+    me = usernames[1]
+    decisions = []
+    for n in range(args.iterations):
+        if n and n % args.change_every == 0:
+            other = usernames[n % len(usernames)]
+            store.put_user(other, {'password': '', 'is_admin': n % 3 == 0})
+        decisions.append(is_admin(me))
+        for k in range(args.checks):
+            decisions.append(can_edit(me, {'author': usernames[(n + k) % len(usernames)]}))
+        decisions.append(is_admin(usernames[n % len(usernames)]))
+        decisions.append(is_member(usernames[(n * 7) % len(usernames)] + ('' if n % 2 else '_x')))
+    return decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='세션당 회원 목록 파싱 횟수 비교')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--users', type=int, default=2000, help='회원 수')
+    parser.add_argument('--iterations', type=int, default=500, help='메뉴 루프 횟수')
+    parser.add_argument('--checks', type=int, default=5, help='루프당 글 권한 확인 횟수')
+    parser.add_argument('--change-every', type=int, default=50,
+                        help='몇 바퀴마다 다른 세션이 회원 정보를 고칠지')
+    args = parser.parse_args()
+
+    os.environ['BBS_STORAGE'] = args.backend
+    os.environ['BBS_FSYNC'] = '0'
+    os.chdir(tempfile.mkdtemp(prefix='bbs_bench_'))
+    from core.init import initialize
+    initialize()
+    from core.storage import get_store
+    from core import profile
+    store = get_store()
+    usernames = [f'user{i:05d}' for i in range(args.users)]
+    store.save_users({u: {'password': '', 'name': f'회원{i}', 'is_admin': i % 100 == 0}
+                      for i, u in enumerate(usernames)})
+
+    parses = {'n': 0}
+    load_users = store.load_users
+
+    def counting_load_users():
+        parses['n'] += 1
+        return load_users()
+    store.load_users = counting_load_users
+
+    results = {}
+    for mode in ('legacy', 'directory'):
+        # 두 방식이 같은 데이터에서 시작하도록 회원 목록을 되돌린다
+        store.save_users({u: {'password': '', 'name': f'회원{i}', 'is_admin': i % 100 == 0}
+                          for i, u in enumerate(usernames)})
+        directory = profile.UserDirectory(store)
+        profile._directory = directory
+        parses['n'] = 0
+        t0 = time.perf_counter()
+        results[mode] = _session(store, directory, mode, args, usernames)
+        elapsed = time.perf_counter() - t0
+        print(f'[{mode:9s}] 조회 {len(results[mode])}번, 회원 목록 파싱 {parses["n"]}번, '
+              f'{elapsed:.3f}초 (조회당 {elapsed / len(results[mode]) * 1e6:.0f}us)')
+    same = results['legacy'] == results['directory']
+    print('판정 일치' if same else '판정이 서로 다름!')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
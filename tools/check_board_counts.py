@@ -0,0 +1,42 @@
+"""게시판별 글 수 카운터가 실제 게시글과 맞는지 검사하고, --repair면 다시 센다.
+
+카운터는 글을 쓰고 지울 때 함께 갱신되지만, JSON 백엔드에서 저널을 쓴 직후
+카운터를 고치기 전에 프로세스가 죽거나 누가 data/posts.json을 손으로 고치면
+어긋날 수 있다. 저장소 루트(bbs.py가 있는 곳)에서 실행한다:
+
+    python3 tools/check_board_counts.py [--repair]
+
+BBS_STORAGE로 고른 백엔드를 검사한다. BBS가 떠 있는 중에 돌려도 된다 -
+글쓰기와 같은 잠금/트랜잭션 안에서 비교하고 고친다.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.storage import STORAGE_BACKEND, get_store  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='게시판별 글 수 카운터 검사/복구')
+    parser.add_argument('--repair', action='store_true', help='어긋난 카운터를 실제 글 수로 다시 쓴다')
+    args = parser.parse_args()
+
+    mismatched = get_store().check_board_counts(repair=args.repair)
+    if not mismatched:
+        print(f'[{STORAGE_BACKEND}] 게시판별 글 수 카운터가 모두 맞습니다.')
+        return 0
+
+    for board_id, (stored, actual) in sorted(mismatched.items(), key=lambda kv: str(kv[0])):
+        stored_str = '없음' if stored is None else str(stored)
+        print(f'  {board_id}: 카운터 {stored_str} / 실제 {actual}')
+    if args.repair:
+        print(f'[{STORAGE_BACKEND}] 게시판 {len(mismatched)}개의 카운터를 다시 셌습니다.')
+        return 0
+    print(f'[{STORAGE_BACKEND}] 게시판 {len(mismatched)}개가 어긋났습니다. --repair로 고칠 수 있습니다.')
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
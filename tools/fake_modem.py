@@ -0,0 +1,367 @@
+"""모뎀 흉내(AT 명령을 알아듣는 PTY)와 다이얼업 데몬 동시 통화 부하 테스트.
+
+FakeModem은 PTY 한 쌍을 만들어서 슬레이브 경로(/dev/pts/N)를 server/dialup.py에
+모뎀 장치인 것처럼 넘기고, 마스터 쪽에서 모뎀 흉내를 낸다.
+  명령 모드: AT... 줄마다 OK. ATA는 울리는 중이면 CONNECT <속도>로 데이터 모드
+             진입, ATH는 통화 끊기.
+  데이터 모드: 데몬이 쓰는 바이트는 발신자 소켓으로, 발신자가 보낸 바이트는
+             데몬으로 그대로 넘긴다. 데몬이 +++를 보내면 명령 모드로, 발신자가
+             소켓을 닫으면 NO CARRIER를 띄우고 명령 모드로 돌아간다.
+call()은 RING을 2초마다 울리다가 데몬이 받으면(CONNECT) 발신자 소켓을 돌려준다.
+
+    python3 tools/fake_modem.py [--lines 4] [--rounds 2] [--hold 3]
+                                [--status-lines] [--hangup caller|bbs]
+
+데몬(dialup_server())을 임시 작업 디렉토리에서 별도 프로세스로 띄우고, 회선
+수만큼 동시에 전화를 걸어 각자 첫 화면(인코딩 선택 프롬프트)을 받을 때까지의
+시간을 잰 뒤 끊는다. --rounds번 반복해서 끊긴 회선이 다시 RING을 받는지도 본다.
+통화가 끝난 순간부터 데몬이 회선을 내려놓고(ATH 또는 DTR) 다음 RING을 받을
+준비가 될 때까지의 시간(끊기 -> 준비)도 잰다.
+  --hangup caller  발신자가 소켓을 닫는다(NO CARRIER, 기본)
+  --hangup bbs     발신자가 로그인 화면에서 QUIT을 입력해 BBS 쪽에서 끊게 한다
+
+PTY에는 모뎀 제어선(DTR/DCD/RI)이 없어서 데몬은 기본적으로 결과 코드(RING,
+NO CARRIER)와 +++/ATH로만 회선을 다룬다. --status-lines를 주면 데몬 프로세스의
+serial.Serial을 StatusLineSerial로 바꿔서 제어선을 흉내 낸다 - 회선마다 공유
+메모리 3바이트(DTR/DCD/RI)를 두고, 데몬이 DTR을 쓰면 모뎀 흉내가 보고(AT&D2처럼
+통화를 끊음), 모뎀 흉내가 DCD/RI를 바꾸면 데몬이 읽는다.
+"""
+import argparse
+import multiprocessing
+import multiprocessing.sharedctypes
+import os
+import pty
+import select
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+
+PROMPT = '선택 (1~3'.encode('euc-kr')
+ID_PROMPT = '이용자 ID'.encode('euc-kr')
+GOODBYE = '다음에 또 만나요'.encode('euc-kr')
+RING_INTERVAL = 2.0
+RI_PULSE = 1.0
+
+# 흉내 내는 모뎀 제어선 - FakeModem.lines의 인덱스
+DTR, DCD, RI = 0, 1, 2
+
+
+class FakeModem:
+    def __init__(self, connect_speed=14400, status_lines=False):
+        self.master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self.connect_speed = connect_speed
+        self.ringing = False
+        self.data_mode = False
+        self.in_call = False
+        self.connected = threading.Event()
+        # 데몬이 ATH로 전화를 내려놓음 - 다음 RING을 받을 준비가 됐다는 뜻
+        self.on_hook = threading.Event()
+        self.calls = 0
+        self._line_sock = None
+        self._caller_sock = None
+        self._cmd = b''
+        self._lock = threading.Lock()
+        # 데몬 프로세스와 공유하는 제어선 상태(fork 전에 만들어야 함)
+        self.lines = multiprocessing.sharedctypes.RawArray('b', 3) if status_lines else None
+        self._dtr = False
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    # --- 발신자 쪽 --------------------------------------------------------
+
+    def call(self, timeout=60):
+        """RING을 울려 데몬이 받으면 발신자 소켓을 반환한다."""
+        with self._lock:
+            self._line_sock, self._caller_sock = socket.socketpair()
+            self.connected.clear()
+            self.on_hook.clear()
+            self.ringing = True
+        deadline = time.time() + timeout
+        while not self.connected.is_set():
+            if time.time() > deadline:
+                self.ringing = False
+                raise TimeoutError(f'{self.port}: 응답 없음')
+            self._set_line(RI, 1)
+            self._send(b'\r\nRING\r\n')
+            self.connected.wait(RI_PULSE)
+            self._set_line(RI, 0)
+            self.connected.wait(RING_INTERVAL - RI_PULSE)
+        return self._caller_sock
+
+    # --- 모뎀 쪽 ----------------------------------------------------------
+
+    def _set_line(self, index, value):
+        if self.lines is not None:
+            self.lines[index] = value
+
+    def _watch_dtr(self):
+        # AT&D2: DTR이 꺼지면 통화를 끊고 명령 모드로. 다시 켜지면 데몬이 다음
+        # RING을 받을 준비가 된 것.
+        dtr = bool(self.lines[DTR])
+        if dtr == self._dtr:
+            return
+        self._dtr = dtr
+        if not dtr:
+            self.data_mode = False
+            self._set_line(DCD, 0)
+            self._end_call()
+        else:
+            self.on_hook.set()
+
+    def _send(self, data):
+        try:
+            os.write(self.master, data)
+        except OSError:
+            pass
+
+    def _loop(self):
+        while True:
+            fds = [self.master]
+            line_sock = self._line_sock if self.data_mode else None
+            if line_sock is not None:
+                fds.append(line_sock)
+            ready, _, _ = select.select(fds, [], [], 0.5 if self.lines is None else 0.01)
+            if self.lines is not None:
+                self._watch_dtr()
+            if self.master in ready:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    # 데몬이 포트를 닫은 순간 - 다시 열 때까지 잠깐 기다린다.
+                    time.sleep(0.1)
+                    continue
+                if self.data_mode:
+                    if data == b'+++':
+                        self.data_mode = False
+                        self._send(b'\r\nOK\r\n')
+                    else:
+                        try:
+                            line_sock.sendall(data)
+                        except OSError:
+                            pass
+                else:
+                    self._command(data)
+            if line_sock is not None and line_sock in ready:
+                try:
+                    data = line_sock.recv(4096)
+                except OSError:
+                    data = b''
+                if data:
+                    self._send(data)
+                else:
+                    # 발신자가 끊음
+                    self.data_mode = False
+                    self._set_line(DCD, 0)
+                    self._send(b'\r\nNO CARRIER\r\n')
+                    self._end_call()
+
+    def _command(self, data):
+        self._cmd += data
+        while b'\r' in self._cmd:
+            line, self._cmd = self._cmd.split(b'\r', 1)
+            line = line.strip().upper()
+            at = line.find(b'AT')
+            if at < 0:
+                continue
+            cmd = line[at:]
+            if cmd.startswith(b'ATA'):
+                if self.ringing:
+                    self.ringing = False
+                    self.data_mode = True
+                    self.in_call = True
+                    self.calls += 1
+                    self._set_line(DCD, 1)
+                    self._send(f'\r\nCONNECT {self.connect_speed}\r\n'.encode())
+                    self.connected.set()
+                else:
+                    self._send(b'\r\nNO CARRIER\r\n')
+            elif cmd.startswith(b'ATH'):
+                self._set_line(DCD, 0)
+                self._send(b'\r\nOK\r\n')
+                self._end_call()
+                self.on_hook.set()
+            else:
+                self._send(b'\r\nOK\r\n')
+
+    def _end_call(self):
+        # 통화 중이 아닐 때 들어온 ATH(이미 NO CARRIER로 끊긴 뒤의 정리)는
+        # 다음 통화용으로 만들어 둔 소켓을 건드리면 안 된다.
+        with self._lock:
+            if self.in_call and self._line_sock is not None:
+                self._line_sock.close()
+                self._line_sock = None
+            self.in_call = False
+
+
+def _status_line_serial(lines_by_port):
+    """제어선을 흉내 내는 serial.Serial. DTR은 공유 메모리에 쓰고, DCD/RI는
+    공유 메모리에서 읽는다. RTS 등 나머지 제어선은 무시한다."""
+    import serial
+
+    class StatusLineSerial(serial.Serial):
+        def _update_dtr_state(self):
+            lines_by_port[self.port][DTR] = int(self._dtr_state)
+
+        def _update_rts_state(self):
+            pass
+
+        @property
+        def cd(self):
+            return bool(lines_by_port[self.port][DCD])
+
+        @property
+        def ri(self):
+            return bool(lines_by_port[self.port][RI])
+
+    return StatusLineSerial
+
+
+def _serve(ports, workdir, lines_by_port=None):
+    # 실제 데몬(__main__)처럼 인자 없이 띄워서 BBS_MODEM_PORTS를 읽는 길도 탄다
+    os.environ['BBS_MODEM_PORTS'] = ','.join(ports)
+    os.chdir(workdir)
+    import dialup
+    if lines_by_port:
+        dialup.serial.Serial = _status_line_serial(lines_by_port)
+    dialup.BBS_COMMAND = ['python3', '-u', os.path.join(ROOT, 'bbs.py'), '--channel=modem']
+    dialup.CID_WAIT_SECONDS = 0.2
+    dialup.dialup_server()
+
+
+def _recv_until(sock, marker, received=b''):
+    while marker not in received:
+        chunk = sock.recv(4096)
+        if not chunk:
+            return None
+        received += chunk
+    return received
+
+
+def _send_until(sock, keys, marker, timeout=30):
+    """keys를 보내고 marker가 올 때까지 기다린다. 모뎀 채널은 화면이 회선으로
+    다 나갈 시간만큼 기다렸다가 입력을 받기 시작하고(bbsio/pacing.py) 그 전에
+    온 키는 버리는데, 이 모뎀 흉내는 화면을 한꺼번에 넘겨서 언제부터 받는지
+    알 수 없다 - 1초 안에 반응이 없으면 다시 보낸다."""
+    received = b''
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        sock.sendall(keys)
+        resend = time.time() + 1.0
+        while marker not in received and time.time() < resend:
+            if select.select([sock], [], [], 0.1)[0]:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    return None
+                received += chunk
+        if marker in received:
+            return received
+    raise socket.timeout
+
+
+def _caller(modem, hold, hangup, results):
+    t0 = time.perf_counter()
+    try:
+        sock = modem.call()
+    except TimeoutError as e:
+        results['failed'].append(str(e))
+        return
+    connected = time.perf_counter() - t0
+    sock.settimeout(30)
+    hung_up = None
+    try:
+        if _recv_until(sock, PROMPT) is None:
+            results['failed'].append(f'{modem.port}: 프롬프트 전에 끊김')
+            return
+        results['connect'].append(connected)
+        results['prompt'].append(time.perf_counter() - t0)
+        time.sleep(hold)
+        if hangup == 'bbs':
+            # 로그인 화면에서 QUIT - BBS가 끝나고 데몬이 회선을 끊는다.
+            if _send_until(sock, b'1\r', ID_PROMPT) is None:
+                results['failed'].append(f'{modem.port}: 로그인 화면 전에 끊김')
+                return
+            if _send_until(sock, b'QUIT\r', GOODBYE) is not None:
+                hung_up = time.perf_counter()
+                while sock.recv(4096):
+                    pass
+    except socket.timeout:
+        results['failed'].append(f'{modem.port}: 프롬프트 대기 시간 초과')
+    finally:
+        sock.close()
+        if hung_up is None:
+            hung_up = time.perf_counter()
+    # 데몬이 회선을 정리한 뒤(ATH 또는 DTR) 다시 RING을 받을 준비가 될
+    # 때까지 기다린다.
+    if modem.on_hook.wait(30):
+        results['ready'].append(time.perf_counter() - hung_up)
+    else:
+        results['failed'].append(f'{modem.port}: 끊은 뒤 회선이 정리되지 않음')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='모뎀 흉내 PTY로 다이얼업 데몬 동시 통화 테스트')
+    parser.add_argument('--lines', type=int, default=4, help='모뎀 회선 수')
+    parser.add_argument('--rounds', type=int, default=2, help='동시 통화를 몇 번 반복할지')
+    parser.add_argument('--hold', type=float, default=3, help='프롬프트를 받은 뒤 통화를 유지할 시간(초)')
+    parser.add_argument('--status-lines', action='store_true', help='모뎀 제어선(DTR/DCD/RI) 흉내')
+    parser.add_argument('--hangup', choices=('caller', 'bbs'), default='caller',
+                        help='통화를 끊는 쪽 (caller: 발신자, bbs: QUIT 입력)')
+    args = parser.parse_args()
+
+    modems = [FakeModem(status_lines=args.status_lines) for _ in range(args.lines)]
+    lines_by_port = {m.port: m.lines for m in modems} if args.status_lines else None
+    workdir = tempfile.mkdtemp(prefix='bbs_dialup_')
+    ctx = multiprocessing.get_context('fork')
+    daemon = ctx.Process(target=_serve, args=([m.port for m in modems], workdir, lines_by_port),
+                         daemon=True)
+    daemon.start()
+    for m in modems:
+        m.start()
+    # 데몬이 회선마다 AT 초기화 명령(ATZ 등)을 보내고 기다리는 시간
+    time.sleep(6)
+
+    ok = True
+    try:
+        for rnd in range(args.rounds):
+            results = {'connect': [], 'prompt': [], 'ready': [], 'failed': []}
+            threads = [threading.Thread(target=_caller, args=(m, args.hold, args.hangup, results))
+                       for m in modems]
+            t0 = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - t0
+            n = len(results['prompt'])
+            print(f'[{rnd + 1}회차] 동시 통화 {args.lines}개: 프롬프트 수신 {n}, '
+                  f'실패 {len(results["failed"])} ({elapsed:.1f}초)')
+            if n:
+                print(f'  RING -> CONNECT   중앙값 {statistics.median(results["connect"]):.2f}초  '
+                      f'최대 {max(results["connect"]):.2f}초')
+                print(f'  RING -> 프롬프트  중앙값 {statistics.median(results["prompt"]):.2f}초  '
+                      f'최대 {max(results["prompt"]):.2f}초')
+            if results['ready']:
+                print(f'  끊기 -> 준비      중앙값 {statistics.median(results["ready"]):.3f}초  '
+                      f'최대 {max(results["ready"]):.3f}초')
+            for reason in results['failed']:
+                print(f'  실패: {reason}')
+            ok = ok and not results['failed']
+    finally:
+        daemon.terminate()
+        daemon.join()
+    print(f'회선별 응답한 통화 수: {[m.calls for m in modems]}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
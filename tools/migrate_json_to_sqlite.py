@@ -0,0 +1,77 @@
+"""data/*.json(JSON 백엔드)에 쌓인 데이터를 SQLite 파일로 한 번에 옮긴다.
+
+BBS를 멈춘 상태에서 저장소 루트(bbs.py가 있는 곳)에서 실행한다:
+
+    python3 tools/migrate_json_to_sqlite.py [--db data/bbs.sqlite3] [--force]
+
+옮긴 뒤 BBS_STORAGE=sqlite로 다시 띄우면 된다. 원본 JSON 파일은 건드리지
+않으므로 문제가 있으면 BBS_STORAGE를 되돌리기만 하면 된다. 대상 DB에 이미
+데이터가 있으면 --force 없이는 덮어쓰지 않는다.
+
+원본은 JsonStore()로 열지 않는다 - JsonStore는 열 때 예전 형식 데이터를 그
+자리에서 바꾼다(본문을 data/posts/로 옮기고 posts.json을 글 머리만으로 다시
+쓰고, messages.json을 쪽지함으로 나누고 .migrated로 바꾸는 등). 여기서는
+바뀌기 전/후 어느 형식이든 파일을 읽기만 한다.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import json_store  # noqa: E402
+from core.atomic import read_json  # noqa: E402
+from core.mailbox import Mailboxes  # noqa: E402
+from core.postlog import PostLog  # noqa: E402
+from core.storage import SQLITE_PATH  # noqa: E402
+from core.sqlite_store import SqliteStore  # noqa: E402
+
+
+def _load_messages():
+    # 아직 쪽지함으로 나누지 않은 데이터면 예전 messages.json이 원본이다
+    # (Mailboxes.migrate()가 다 옮긴 뒤에야 이름을 바꾼다).
+    if os.path.exists(json_store.MAIL_FILE):
+        return read_json(json_store.MAIL_FILE, list)
+    return Mailboxes(json_store.MAIL_DIR, json_store.MAIL_SEQ_FILE).load_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON 데이터를 SQLite로 옮긴다')
+    parser.add_argument('--db', default=SQLITE_PATH, help=f'대상 SQLite 파일 (기본 {SQLITE_PATH})')
+    parser.add_argument('--force', action='store_true', help='대상 DB에 있는 데이터를 덮어쓴다')
+    args = parser.parse_args()
+
+    dst = SqliteStore(args.db)
+
+    if not args.force and (dst.load_users() or dst.load_posts()):
+        print(f'{args.db}에 이미 데이터가 있습니다. 덮어쓰려면 --force를 주세요.', file=sys.stderr)
+        return 1
+
+    users = read_json(json_store.USER_FILE, dict)
+    # 본문이 글 안에 있든(예전 형식) 본문 파일로 나뉘었든 all_posts()가 본문까지
+    # 붙여 준다. 읽기만 하므로 migrate()는 부르지 않는다.
+    post_log = PostLog(json_store.POST_FILE, json_store.POST_JOURNAL, json_store.POST_BODY_DIR)
+    posts = post_log.all_posts()
+    messages = _load_messages()
+    # 지운 맨 끝 글/쪽지의 id도 다시 주지 않도록 원본이 지금까지 준 가장 큰 id를
+    # 같이 옮긴다(글은 저널의 seq, 쪽지는 mail_seq.json).
+    last_post_id = max([post_log.last_id()] + [p.get('id', 0) for p in posts])
+    last_message_id = max([read_json(json_store.MAIL_SEQ_FILE, dict).get('last_id', 0)]
+                          + [m['id'] for m in messages])
+    entries = read_json(json_store.INDEX_FILE, list)
+    stats = read_json(json_store.STATS_FILE, json_store._default_stats)
+
+    dst.save_users(users)
+    dst.save_posts(posts)
+    dst.save_messages(messages)
+    dst.reserve_ids(last_post_id, last_message_id)
+    dst.save_index(entries)
+    dst.save_stats(stats)
+
+    print(f'회원 {len(users)}명, 게시글 {len(posts)}건, 쪽지 {len(messages)}통, '
+          f'자료 {len(entries)}건을 {args.db}로 옮겼습니다.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,33 @@
+"""게시글 검색 색인을 처음부터 다시 만든다.
+
+색인은 글을 쓰고 고치고 지울 때 함께 고쳐지지만, JSON 백엔드에서 글을 저널에
+쓴 직후 색인을 고치기 전에 프로세스가 죽거나 누가 data/posts.json이나
+data/posts/의 본문을 손으로 고치면 어긋날 수 있다. 저장소 루트(bbs.py가 있는
+곳)에서 실행한다:
+
+    python3 tools/rebuild_search_index.py
+
+BBS_STORAGE로 고른 백엔드의 색인을 다시 만든다. BBS가 떠 있는 중에 돌려도
+된다 - 색인 쓰기 트랜잭션 하나 안에서 다시 만든다.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.storage import STORAGE_BACKEND, get_store  # noqa: E402
+
+
+def main():
+    argparse.ArgumentParser(description='게시글 검색 색인 다시 만들기').parse_args()
+    t0 = time.perf_counter()
+    count = get_store().rebuild_search_index()
+    print(f'[{STORAGE_BACKEND}] 글 {count}건으로 검색 색인을 다시 만들었습니다 '
+          f'({time.perf_counter() - t0:.1f}초).')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
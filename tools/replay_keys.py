@@ -0,0 +1,141 @@
+"""입력 함수(rawinput/hidden_input/command_input/multiline_input)에 키 입력
+스크립트를 재생해 본다 - 터미널 없이.
+
+세션을 in-process 방식(server/inprocess.py와 같은 socketpair + Session)으로
+띄워 입력 함수를 부르고, 스크립트의 키 묶음을 차례로 소켓에 써 넣은 뒤
+돌려받은 값과 화면에 찍힌 것(에코)을 기대값과 비교한다. 키 묶음 하나는 한
+번에 도착한 입력(붙여 넣기, 방향키 ESC 시퀀스 등)이고, 묶음 사이는
+--gap초(기본 0.1초 - 백스페이스 디바운스보다 길게) 띄워 사람이 따로 친 것처럼
+보낸다. 화면 비교에서는 에코 스타일 지정(lineedit.PLAIN)을 빼고 본다.
+
+    python3 tools/replay_keys.py [--script cases.json] [--gap 0.1] [-v]
+
+--script는 아래 CASES와 같은 모양의 JSON 목록이다:
+    [{"name": "...", "func": "rawinput", "keys": ["abc", "\\b", "\\r"],
+      "result": "ab", "screen": "abc\\b \\b\\r\\n"}]
+screen은 생략할 수 있다. command_input의 'p'처럼 예외로 끝나는 경우는
+result 대신 "raises": "KeyboardInterrupt".
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bbsio import lineedit, rawio, session as session_mod  # noqa: E402
+
+ENCODING = 'euc-kr'
+
+CASES = [
+    {'name': '한 줄 입력', 'func': 'rawinput', 'keys': ['hello\r'],
+     'result': 'hello', 'screen': 'hello\r\n'},
+    {'name': '한글 지우기', 'func': 'rawinput', 'keys': ['가나', '\x08', '다\r'],
+     'result': '가다', 'screen': '가나\b\b  \b\b다\r\n'},
+    {'name': '백스페이스 디바운스', 'func': 'rawinput', 'keys': ['abc', '\x08\x08', '\r'],
+     'result': 'ab'},
+    {'name': '방향키/기능키 무시', 'func': 'rawinput',
+     'keys': ['a', '\x1b[A', '\x1bOP', '\x1b[3~', 'b\tc\r'],
+     'result': 'abc', 'screen': 'abc\r\n'},
+    {'name': '비밀번호 가리기', 'func': 'hidden_input', 'keys': ['비밀', '\x08', 'x\r'],
+     'result': '비x', 'screen': '**\b \b*\r\n'},
+    {'name': '명령 앞뒤 공백', 'func': 'command_input', 'keys': ['  ls  \r'],
+     'result': 'ls'},
+    {'name': '글로벌 명령 x 취소 후 다시 입력', 'func': 'command_input',
+     'keys': ['x\r', 'n\r', '3\r'], 'result': '3'},
+    {'name': '글로벌 명령 p', 'func': 'command_input', 'keys': ['p\r'],
+     'raises': 'KeyboardInterrupt'},
+    {'name': '여러 줄 붙여 넣기', 'func': 'multiline_input',
+     'keys': ['첫 줄\r둘째 줄\r.\r'], 'result': '첫 줄\n둘째 줄',
+     'screen': '\r\n첫 줄\r\n둘째 줄\r\n.'},
+    {'name': '빈 줄에서 지워 윗줄로', 'func': 'multiline_input',
+     'keys': ['ab\r', '\x08', 'c\r', '.\r'], 'result': 'abc',
+     'screen': '\r\nab\r\n\x1b[F\r  \rabc\r\n.'},
+]
+
+
+def _drain(sock, received):
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return
+        received += chunk
+
+
+def replay(case, gap):
+    """case를 재생해서 (돌려받은 값 또는 예외 이름, 화면) 을 돌려준다."""
+    client, server = socket.socketpair()
+    outcome = {}
+
+    def session_thread():
+        s = session_mod.Session(server.fileno(), server.fileno(), 'telnet', ENCODING)
+        session_mod.activate(s)
+        try:
+            outcome['result'] = getattr(rawio, case['func'])('', ENCODING)
+        except BaseException as e:  # KeyboardInterrupt(p), SystemExit(x -> y)
+            outcome['raises'] = type(e).__name__
+        finally:
+            try:
+                rawio.flush_output()
+            except rawio.ConnectionClosed:
+                pass
+
+    echoed = bytearray()
+    drainer = threading.Thread(target=_drain, args=(client, echoed), daemon=True)
+    drainer.start()
+    t = threading.Thread(target=session_thread, daemon=True)
+    t.start()
+    for keys in case['keys']:
+        # 프롬프트 직전의 flush_input()이 먼저 끝나도록 묶음마다 기다린다
+        time.sleep(gap)
+        client.sendall(keys.encode(ENCODING))
+    t.join(10)
+    if t.is_alive():
+        outcome['raises'] = '시간 초과(입력이 끝나지 않음)'
+    server.shutdown(socket.SHUT_WR)
+    drainer.join()
+    client.close()
+    server.close()
+    screen = bytes(echoed).replace(lineedit.PLAIN.encode(), b'').decode(ENCODING, errors='replace')
+    return outcome, screen
+
+
+def main():
+    parser = argparse.ArgumentParser(description='입력 함수 키 입력 재생')
+    parser.add_argument('--script', help='재생할 경우 목록(JSON). 없으면 내장 CASES')
+    parser.add_argument('--gap', type=float, default=0.1, help='키 묶음 사이 간격(초)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='화면 출력도 보여줌')
+    args = parser.parse_args()
+
+    cases = CASES
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            cases = json.load(f)
+
+    failed = 0
+    for case in cases:
+        outcome, screen = replay(case, args.gap)
+        problems = []
+        if 'raises' in case or 'raises' in outcome:
+            if outcome.get('raises') != case.get('raises'):
+                problems.append(f'예외 {outcome.get("raises")!r} (기대 {case.get("raises")!r})')
+        elif outcome.get('result') != case.get('result'):
+            problems.append(f'값 {outcome.get("result")!r} (기대 {case.get("result")!r})')
+        if 'screen' in case and screen != case['screen']:
+            problems.append(f'화면 {screen!r} (기대 {case["screen"]!r})')
+        failed += bool(problems)
+        print(f'[{"실패" if problems else "통과"}] {case["name"]}')
+        for p in problems:
+            print(f'    {p}')
+        if args.verbose:
+            print(f'    화면: {screen!r}')
+    print(f'{len(cases)}개 중 {len(cases) - failed}개 통과')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""텔넷 서버 동시 접속 부하 테스트 클라이언트.
+
+클라이언트 N개를 동시에 붙여서 각자 첫 화면(인코딩 선택 프롬프트)을 받을
+때까지 기다리고, --hold초 동안 접속을 유지한 뒤 끊는다. 그동안 텔넷 서버
+프로세스(server/telnet.py)의 메모리(VmRSS)와 스레드 수를 주기적으로 재서
+접속 수가 늘 때 중계 쪽 비용이 어떻게 변하는지 보여준다. 세션마다 뜨는
+bbs.py/워커 프로세스는 따로 세지 않는다(서버 자체의 비용만 본다). 대신
+서버의 자식 프로세스 수와 그 RSS 합계를 같이 보여줘서, 세션을 서버 안에서
+돌리는 --session-mode inprocess와 접속당 비용을 비교할 수 있다.
+
+    python3 tools/telnet_load.py [--clients 100] [--hold 5] [--pool-size 0]
+                                 [--session-mode subprocess|inprocess]
+    python3 tools/telnet_load.py --host 127.0.0.1 --port 2323 --pid <telnet.py PID>
+
+--host를 주지 않으면 임시 디렉토리를 작업 디렉토리로 삼아 telnet_server()를
+별도 프로세스에서 빈 포트로 직접 띄운다(접속 빈도 제한은 끄고, 동시 접속
+상한은 --clients 이상으로 올린다). 이미 떠 있는 서버를 칠 때는 같은 IP에서
+몰아서 접속하므로 서버의 접속 빈도 제한(RATE_LIMIT_*)에 걸린다는 점에 주의.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+
+PROMPT = '선택 (1~3'.encode('euc-kr')
+
+
+def _serve(port, clients, pool_size, session_mode, workdir):
+    os.chdir(workdir)
+    import telnet
+    telnet.LISTEN_HOST = '127.0.0.1'
+    telnet.LISTEN_PORT = port
+    telnet.RATE_LIMIT_MAX_ATTEMPTS = 10 ** 9
+    telnet.MAX_CONNECTIONS = max(telnet.MAX_CONNECTIONS, clients)
+    telnet.BBS_COMMAND = ['python3', '-u', os.path.join(ROOT, 'bbs.py'), '--channel=telnet']
+    telnet.POOL_SIZE = pool_size
+    telnet.SESSION_MODE = session_mode
+    telnet.telnet_server()
+
+
+def _proc_status(pid):
+    """(VmRSS KiB, 스레드 수). /proc이 없으면 (None, None)."""
+    rss = threads = None
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1])
+                elif line.startswith('Threads:'):
+                    threads = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, threads
+
+
+def _children_rss(pid):
+    """(자식 프로세스 수, 자식들 VmRSS 합계 KiB)."""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        return 0, 0
+    total = 0
+    for child in children:
+        rss, _ = _proc_status(child)
+        total += rss or 0
+    return len(children), total
+
+
+async def _client(host, port, hold, timeout, results):
+    t0 = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        results['failed'].append(f'접속 실패: {e!r}')
+        return
+    try:
+        received = b''
+        deadline = time.perf_counter() + timeout
+        while PROMPT not in received:
+            left = deadline - time.perf_counter()
+            chunk = await asyncio.wait_for(reader.read(4096), max(0.01, left))
+            if not chunk:
+                results['failed'].append('프롬프트 전에 끊김')
+                return
+            received += chunk
+        results['latency'].append(time.perf_counter() - t0)
+        results['active'] += 1
+        await asyncio.sleep(hold)
+        results['active'] -= 1
+    except asyncio.TimeoutError:
+        results['failed'].append('프롬프트 대기 시간 초과')
+    except OSError as e:
+        results['failed'].append(f'연결 오류: {e!r}')
+    finally:
+        writer.close()
+
+
+async def _sample(pid, results, stop):
+    while not stop.is_set():
+        rss, threads = _proc_status(pid)
+        if rss is not None:
+            children, children_rss = _children_rss(pid)
+            results['samples'].append((results['active'], rss, threads, children, children_rss))
+        try:
+            await asyncio.wait_for(stop.wait(), 0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _run(args, pid):
+    results = {'latency': [], 'failed': [], 'active': 0, 'samples': []}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample(pid, results, stop)) if pid else None
+    await asyncio.sleep(0.5)
+    t0 = time.perf_counter()
+    tasks = []
+    for _ in range(args.clients):
+        tasks.append(asyncio.create_task(_client(args.host, args.port, args.hold, args.timeout, results)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    if sampler:
+        await sampler
+    return results, elapsed
+
+
+def _wait_listening(host, port, deadline=20):
+    end = time.time() + deadline
+    while time.time() < end:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('텔넷 서버가 뜨지 않음')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='텔넷 서버 동시 접속 부하 테스트')
+    parser.add_argument('--clients', type=int, default=100, help='동시 접속 수')
+    parser.add_argument('--hold', type=float, default=5, help='프롬프트를 받은 뒤 접속을 유지할 시간(초)')
+    parser.add_argument('--ramp', type=float, default=0.01, help='접속 시작 사이 간격(초)')
+    parser.add_argument('--timeout', type=float, default=60, help='접속당 프롬프트 대기 한도(초)')
+    parser.add_argument('--host', help='이미 떠 있는 서버 주소(없으면 직접 띄움)')
+    parser.add_argument('--port', type=int, default=2323)
+    parser.add_argument('--pid', type=int, help='--host로 칠 때 메모리/스레드를 잴 telnet.py PID')
+    parser.add_argument('--pool-size', type=int, default=0, help='직접 띄울 때의 워커 풀 크기')
+    parser.add_argument('--session-mode', choices=('subprocess', 'inprocess'), default='subprocess',
+                        help='직접 띄울 때의 세션 실행 방식(BBS_SESSION_MODE)')
+    args = parser.parse_args()
+
+    server = None
+    pid = args.pid
+    if args.host is None:
+        args.host = '127.0.0.1'
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            args.port = s.getsockname()[1]
+        workdir = tempfile.mkdtemp(prefix='bbs_load_')
+        ctx = multiprocessing.get_context('fork')
+        server = ctx.Process(target=_serve, args=(args.port, args.clients + 1, args.pool_size,
+                                                    args.session_mode, workdir),
+                             daemon=True)
+        server.start()
+        pid = server.pid
+        _wait_listening(args.host, args.port)
+        time.sleep(1)
+
+    try:
+        base_rss, base_threads = _proc_status(pid) if pid else (None, None)
+        results, elapsed = asyncio.run(_run(args, pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+    ok = len(results['latency'])
+    print(f'접속 {args.clients}개: 프롬프트 수신 {ok}, 실패 {len(results["failed"])} ({elapsed:.1f}초)')
+    if ok:
+        lat = sorted(results['latency'])
+        p90 = lat[min(ok - 1, int(ok * 0.9))]
+        print(f'  접속->프롬프트  중앙값 {statistics.median(lat) * 1000:.0f}ms  '
+              f'p90 {p90 * 1000:.0f}ms  최대 {lat[-1] * 1000:.0f}ms')
+    for reason in sorted(set(results['failed'])):
+        print(f'  실패: {reason} x{results["failed"].count(reason)}')
+    if results['samples'] and base_rss is not None:
+        peak_active = max(s[0] for s in results['samples'])
+        peak_rss = max(s[1] for s in results['samples'])
+        peak_threads = max(s[2] for s in results['samples'])
+        peak = max(results['samples'], key=lambda s: s[2] + s[4])
+        print(f'  텔넷 서버(PID {pid})  유휴: RSS {base_rss / 1024:.1f}MiB, 스레드 {base_threads}  '
+              f'/ 동시 {peak_active}접속 중 최대: RSS {peak_rss / 1024:.1f}MiB, 스레드 {peak_threads}')
+        print(f'  세션 자식 프로세스  최대 {max(s[3] for s in results["samples"])}개, '
+              f'서버+자식 RSS 합계 최대 {(peak[1] + peak[4]) / 1024:.1f}MiB')
+    return 0 if not results['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())